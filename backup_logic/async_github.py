@@ -0,0 +1,254 @@
+import asyncio
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+
+import requests
+from github import GithubException
+from .http_cache import make_adapter
+
+GITHUB_API_URL = 'https://api.github.com'
+
+_LAST_PAGE_RE = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+
+def parse_github_datetime(value):
+    """Convert a GitHub ISO-8601 timestamp ("2024-01-01T00:00:00Z") to datetime."""
+    if not value or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class RemoteRepo:
+    """Repository record built from a REST payload.
+
+    Exposes the same attribute names the backup reads from PyGithub
+    ``Repository`` objects (name, full_name, clone_url, private, ...), so
+    both can be used interchangeably by the executor and GithubOperations.
+    """
+
+    def __init__(self, data, client=None):
+        self._data = dict(data)
+        self._client = client
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['_data'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __repr__(self):
+        return f"RemoteRepo({self._data.get('full_name')!r})"
+
+    @property
+    def raw_data(self):
+        return self._data
+
+    @property
+    def owner_login(self):
+        owner = self._data.get('owner') or {}
+        return owner.get('login') or self._data.get('full_name', '/').split('/')[0]
+
+    @property
+    def pushed_at(self):
+        return parse_github_datetime(self._data.get('pushed_at'))
+
+    def edit(self, **fields):
+        """Update repository settings through the async client (PATCH /repos/{owner}/{repo})."""
+        if self._client is None:
+            raise ValueError("RemoteRepo sem cliente associado")
+        updated = self._client.run(self._client.edit_repo(self.owner_login, self.name, **fields))
+        self._data.update(updated.raw_data)
+
+    def replace_topics(self, topics):
+        """Replace the repository topics (PUT /repos/{owner}/{repo}/topics)."""
+        if self._client is None:
+            raise ValueError("RemoteRepo sem cliente associado")
+        self._data['topics'] = self._client.run(self._client.replace_topics(self.owner_login, self.name, topics))
+
+
+class AsyncGithubClient:
+    """Asyncio client for the GitHub REST API with a bounded connection pool.
+
+    Requests run on a private event loop thread and are dispatched to a
+    pooled ``requests.Session``; at most ``max_connections`` are in flight at
+    once. Coroutines can be awaited from other coroutines on the same client,
+    and blocking code calls them through ``run()``, which is thread-safe.
+    Errors are raised as ``GithubException`` so existing handlers keep working.
+
+    An optional ``AdaptiveLimiter`` further bounds the calls in flight and is
+    fed the status and rate-limit headers of every response.
+    """
+
+    def __init__(self, token, base_url=GITHUB_API_URL, max_connections=8, timeout=30, session=None, limiter=None):
+        self.base_url = base_url.rstrip('/')
+        self.max_connections = max(1, int(max_connections))
+        self.timeout = timeout
+        self.limiter = limiter
+        self._session = session or requests.Session()
+        # Goes through the HTTP cache when one is installed
+        adapter = make_adapter(self.max_connections)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._session.headers.update({
+            'Accept': 'application/vnd.github+json',
+            'User-Agent': 'github-backup-tool',
+        })
+        if token:
+            self._session.headers['Authorization'] = f'Bearer {token.strip()}'
+        self._executor = None
+        self._loop = None
+        self._loop_thread = None
+        self._semaphore = None
+        self._start_lock = threading.Lock()
+
+    # -- event loop management -------------------------------------------------
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.max_connections, thread_name_prefix="github-api")
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(target=self._loop.run_forever, name="github-api-loop", daemon=True)
+            self._loop_thread.start()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the client loop and return a concurrent Future."""
+        self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro):
+        """Run a coroutine on the client loop and wait for its result."""
+        return self.submit(coro).result()
+
+    def close(self):
+        """Stop the event loop and release pooled connections."""
+        with self._start_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop_thread.join(timeout=5)
+                self._loop.close()
+                self._executor.shutdown(wait=False)
+                self._loop = None
+                self._loop_thread = None
+                self._executor = None
+                self._semaphore = None
+        self._session.close()
+
+    # -- transport -------------------------------------------------------------
+
+    def _url(self, path):
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    async def request(self, method, path, params=None, json=None, expected=(200, 201, 204)):
+        """Send one request; returns the ``requests.Response`` or raises GithubException."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+        loop = asyncio.get_running_loop()
+        send = partial(self._send, method, self._url(path),
+                       params=params, json=json, timeout=self.timeout)
+        async with self._semaphore:
+            try:
+                response = await loop.run_in_executor(self._executor, send)
+            except requests.RequestException as e:
+                raise GithubException(0, {'message': str(e)}, None) from e
+
+        if response.status_code not in expected:
+            try:
+                data = response.json()
+            except ValueError:
+                data = {'message': response.text}
+            raise GithubException(response.status_code, data, dict(response.headers))
+        return response
+
+    def _send(self, method, url, **kwargs):
+        """Blocking send, run on the executor; goes through the limiter when set."""
+        if self.limiter is None:
+            return self._session.request(method, url, **kwargs)
+        with self.limiter.slot():
+            try:
+                response = self._session.request(method, url, **kwargs)
+            except requests.Timeout:
+                self.limiter.record_error("timeout")
+                raise
+        self.limiter.record_response(response.status_code, response.headers)
+        if response.status_code < 400:
+            self.limiter.record_success()
+        return response
+
+    async def get_json(self, path, params=None):
+        response = await self.request('GET', path, params=params)
+        return response.json()
+
+    async def paginate(self, path, params=None):
+        """Fetch every page of a list endpoint.
+
+        The first page tells how many pages exist (``Link: rel="last"``); the
+        remaining pages are then requested concurrently.
+        """
+        params = dict(params or {})
+        params.setdefault('per_page', 100)
+        first = await self.request('GET', path, params=params)
+        items = list(first.json())
+
+        match = _LAST_PAGE_RE.search(first.headers.get('Link', ''))
+        if match:
+            last_page = int(match.group(1))
+            pages = await asyncio.gather(*[
+                self.get_json(path, params={**params, 'page': page})
+                for page in range(2, last_page + 1)
+            ])
+            for page in pages:
+                items.extend(page)
+        return items
+
+    # -- endpoints -------------------------------------------------------------
+
+    async def get_user(self):
+        """GET /user, returning the JSON body and the response headers (scopes, rate limit)."""
+        response = await self.request('GET', '/user')
+        return response.json(), response.headers
+
+    async def get_rate_limit(self):
+        return await self.get_json('/rate_limit')
+
+    async def list_user_repos(self, **params):
+        repos = await self.paginate('/user/repos', params=params)
+        return [RemoteRepo(data, self) for data in repos]
+
+    async def get_repo(self, owner, name):
+        return RemoteRepo(await self.get_json(f'/repos/{owner}/{name}'), self)
+
+    async def create_repo(self, name, **fields):
+        response = await self.request('POST', '/user/repos', json={'name': name, **fields})
+        return RemoteRepo(response.json(), self)
+
+    async def edit_repo(self, owner, name, **fields):
+        response = await self.request('PATCH', f'/repos/{owner}/{name}', json=fields)
+        return RemoteRepo(response.json(), self)
+
+    async def replace_topics(self, owner, name, topics):
+        response = await self.request('PUT', f'/repos/{owner}/{name}/topics', json={'names': list(topics)})
+        return response.json().get('names', list(topics))
+
+    async def graphql(self, query, variables=None):
+        """POST /graphql; GraphQL errors are raised as GithubException."""
+        response = await self.request('POST', '/graphql', json={'query': query, 'variables': variables or {}})
+        body = response.json()
+        if body.get('errors'):
+            raise GithubException(response.status_code, body, dict(response.headers))
+        return body['data']
+
+    async def get_or_create_repo(self, owner, name, **fields):
+        """Return (repo, created). Only a 404 is treated as "does not exist"."""
+        try:
+            return await self.get_repo(owner, name), False
+        except GithubException as e:
+            if e.status != 404:
+                raise
+        return await self.create_repo(name, **fields), True
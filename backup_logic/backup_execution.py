@@ -1,12 +1,58 @@
 import os
+import shutil
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 from github import GithubException
-from .token_validation import validate_tokens
-from .repository_operations import RepositoryOperations
+from .token_validation import DEFAULT_CACHE_FILE as TOKEN_CACHE_FILE, validate_tokens
+from .repository_operations import (RepositoryOperations, fingerprint_refs, staging_path,
+                                    GIT_ERROR_AUTH, GIT_ERROR_CORRUPT, GIT_ERROR_NETWORK, GIT_ERROR_OTHER)
 from .github_operations import GithubOperations
+from .pipeline import PipelineStage, StagedPipeline
+from .concurrency import ConcurrencyController
+from .scheduling import ORDER_SOURCE, order_repositories
+from .http_cache import DEFAULT_CACHE_DIR, ensure_cache
+from .repo_settings import resolve_sync_fields
+from .object_pool import ObjectPoolManager
+from .bundle_export import BundleExporter
+from .git_progress import UPLOAD_OPERATIONS
+from .lfs import LFS_STORAGE_DIR, LfsMirror
+from .object_pool import POOL_DIR
+from .disk_usage import DEFAULT_INDEX_FILE, DiskUsageIndex
+from .disk_space_check import MIN_BUFFER_SPACE, DiskSpaceChecker, DiskWatchdog
+from .cold_storage import COLD_DIR, REASON_ARCHIVED, REASON_DORMANT, ColdStorage
+from .snapshots import SnapshotManager
+from .maintenance import MaintenanceScheduler
+
+class MirrorJob:
+    """State carried by a repository while it moves through the pipeline."""
+
+    def __init__(self, repo, index, total, repo_path):
+        self.repo = repo
+        self.index = index
+        self.total = total
+        self.repo_path = repo_path
+        self.dest_repo = None
+        self.bytes_fetched = 0
+        self.fingerprint = None
+        self.push_plan = None
+        self.unchanged = False  # Incremental mode: refs did not change since the last mirror
+        self.empty = False  # Source has no refs: nothing to fetch or push
+        self.lfs = False  # Tracks files with Git LFS; their objects are mirrored too
+        self.lfs_bytes = 0
 
 class BackupExecutor:
+    # Pipeline stages, in order; each one accepts its own worker limit
+    PIPELINE_STAGES = ('fetch', 'provision', 'push', 'export')
+    # Ceiling for adaptive git transfers per side when --max-jobs is not given
+    DEFAULT_MAX_JOBS = 8
+    # Seconds after which inventory data is re-checked per repository
+    INVENTORY_MAX_AGE = 3600
+    # Network errors while updating a mirror are retried in place this many times
+    NETWORK_RETRIES = 2
+    NETWORK_RETRY_DELAY = 5  # Seconds, doubled after each retry
+
     def __init__(self, logger, error_logger, progress_manager):
         self.logger = logger
         self.error_logger = error_logger
@@ -15,69 +61,345 @@ class BackupExecutor:
         self.pause_event = None
         self._source_token = None
         self._dest_token = None
+        self._progress_lock = threading.Lock()
+        self._completed_count = 0
+        self._pushed_repos = set()
+        self._transfers = {}
+        self.transfer_callback = None
+        self.concurrency = None
+        self.incremental = False
+        self.inventory = None
+        self.object_pools = None
+        self.bundle_exporter = None
+        self.lfs = None
+        self.disk_watchdog = None
+        self.disk_usage = None
+        self.cold_storage = None
+        self.cold_after = None
+        self._progress_shown = 0.0
         self.repo_ops = RepositoryOperations(logger, error_logger)
         self.github_ops = GithubOperations(logger, error_logger)
 
-    def run_backup(self, source_token, dest_token, backup_dir, progress_var, is_running, pause_event, cancel_event, retry_count, repo_limit):
-        """Execute the backup process for all repositories."""
+    def run_backup(self, source_token, dest_token, backup_dir, progress_var, is_running, pause_event, cancel_event, retry_count, repo_limit, jobs=1, stage_workers=None,
+                   adaptive=False, max_jobs=None, concurrency_callback=None, order=ORDER_SOURCE,
+                   incremental=False, sync_fields=None, shared_objects=False, export_dir=None, transfer_callback=None,
+                   lfs=True, lfs_transfers=None, min_free_space=MIN_BUFFER_SPACE, cold_after=None,
+                   snapshot_retention=None, maintenance=None, progress_callback=None):
+        """Execute the backup process for all repositories.
+
+        Repositories flow through a fetch -> provision -> push pipeline, so the
+        next repository downloads while the previous one uploads. ``jobs`` is
+        the default worker count of every stage; ``stage_workers`` overrides it
+        per stage, e.g. ``{'fetch': 4, 'push': 2}``.
+
+        With ``adaptive=True`` those counts are only the starting point: the
+        source and destination limits then move between 1 and ``max_jobs``
+        following throughput, errors and the API rate-limit headers.
+        ``concurrency_callback`` receives the current limits whenever they change.
+
+        ``order`` selects the queue ordering policy (see ``scheduling.ORDER_POLICIES``);
+        it is applied before ``repo_limit``.
+
+        With ``incremental=True`` previously mirrored repositories are checked
+        again, but those whose refs fingerprint did not change skip fetch, push
+        and settings sync.
+
+        ``sync_fields`` selects the repository settings copied to the
+        destination (see ``repo_settings.SETTING_FIELDS``); only values that
+        differ are sent.
+
+        With ``shared_objects=True`` mirrors of the same fork network share a
+        git object pool (see ``object_pool.ObjectPoolManager``).
+
+        With ``export_dir`` an export stage runs after the push and writes
+        incremental git bundles of every changed mirror into that directory
+        (see ``bundle_export.BundleExporter``).
+
+        ``transfer_callback`` receives live snapshots of every git clone, fetch
+        and push (see ``git_progress.TransferProgress.snapshot``); the same
+        data moves the progress bar within each repository.
+
+        ``progress_callback`` receives the overall percentage from worker
+        threads; a GUI must hand it to its own thread (e.g. ``root.after``).
+        Without it, ``progress_var.set`` is called instead.
+
+        With ``lfs=True`` the Git LFS objects of repositories that use LFS are
+        mirrored as well, through a store shared by all mirrors (see
+        ``lfs.LfsMirror``); ``lfs_transfers`` sets its parallel transfers.
+
+        ``min_free_space`` is the free-space watermark in bytes: below it no
+        new clone or fetch starts until space is freed (transfers already
+        running go on). ``0`` disables the watchdog.
+
+        With ``cold_after`` mirrors whose refs did not change for that many
+        runs, or archived at the source, are moved to the compressed cold tier
+        (see ``cold_storage.ColdStorage``). Cold repositories are always only
+        checked against their refs fingerprint, and re-inflated when it changes.
+
+        With ``snapshot_retention`` (e.g. ``{'daily': 7, 'weekly': 4, 'monthly': 12}``)
+        a hardlinked point-in-time snapshot of the backup directory is taken
+        after a complete run, and older ones are pruned by that schedule (see
+        ``snapshots.SnapshotManager``).
+
+        With ``maintenance`` (keyword arguments of
+        ``maintenance.MaintenanceScheduler``, e.g. ``{'workers': 2, 'time_budget': 3600}``)
+        a maintenance pass runs once the pipeline is done, in the idle time
+        before the next backup; it stops as soon as the backup is paused or
+        cancelled.
+        """
         self.is_running = is_running
+        self.transfer_callback = transfer_callback
+        self.incremental = incremental
+        self.cold_after = cold_after
+        self.github_ops.sync_fields = resolve_sync_fields(sync_fields)
         self.pause_event = pause_event
         self.cancel_event = cancel_event
+        http_cache = ensure_cache(self._http_cache_dir(), logger=self.logger)
+        self.disk_usage = DiskUsageIndex(self._state_path(DEFAULT_INDEX_FILE))
         try:
             self._setup_tokens(source_token, dest_token)
             self._validate_tokens()
             
             backup_path = self._setup_backup_directory(backup_dir)
+            stage_workers = self._resolve_stage_workers(jobs, stage_workers)
+            self.concurrency = self._create_concurrency_controller(stage_workers, adaptive, max_jobs, concurrency_callback)
+            self.github_ops.set_api_limiters(self.concurrency.source_api, self.concurrency.dest_api)
             self.github_ops.initialize_clients(self._source_token, self._dest_token)
 
             ignored_repos = self._load_ignored_repos()
-            repos = self.github_ops.get_source_repos()
+            self.inventory = self.github_ops.get_source_inventory()
+            repos = list(self.inventory)
             repos_to_backup = [repo for repo in repos if repo.name not in ignored_repos]
+            repos_to_backup = order_repositories(repos_to_backup, order, self.progress_manager)
+            if order and order != ORDER_SOURCE:
+                self.logger.info(f"Ordenando repositórios pela política: {order}")
+            if incremental:
+                self.logger.info("Modo incremental: repositórios sem alterações nas refs serão pulados")
 
             if repo_limit is not None:
                 repos_to_backup = repos_to_backup[:repo_limit]
                 self.logger.info(f"Limitando backup para os {repo_limit} primeiros repositórios.")
 
+            self.object_pools = ObjectPoolManager(backup_path, self.logger, repos_to_backup) if shared_objects else None
+            self.bundle_exporter = BundleExporter(export_dir, self.logger) if export_dir else None
+            self.lfs = LfsMirror(backup_path, self.logger, lfs_transfers) if lfs else None
+            self.cold_storage = ColdStorage(backup_path, self.logger, self.repo_ops)
+            if self.lfs is not None and not self.lfs.available:
+                self.logger.warning("git-lfs não encontrado: objetos LFS não serão copiados")
+
 
             total_repos = len(repos_to_backup)
             self.logger.info(f"Iniciando backup/mirror de {total_repos} repositórios (ignorando {len(ignored_repos)} repositórios)")
 
-            skipped_repos = []
-            for i, repo in enumerate(repos_to_backup, 1):
-                if self._should_stop_processing():
-                    break
+            self.logger.info(
+                "Workers por etapa: " + ", ".join(f"{stage}={stage_workers[stage]}" for stage in self.PIPELINE_STAGES
+                                                  if stage != 'export' or self.bundle_exporter)
+            )
+            self.logger.info(f"Concorrência {'adaptativa' if adaptive else 'fixa'}: {self.concurrency.describe()}")
 
-                if self._is_repo_already_processed(repo):
-                    continue
+            self._check_disk_space(backup_path, repos_to_backup, min_free_space)
+            self._provision_destinations(repos_to_backup)
 
-                try:
-                    self._process_repository(repo, backup_path, i, total_repos, progress_var, retry_count)
-                except GithubException as e:
-                    if e.status == 404:
-                        self.logger.error(f"Repositório não encontrado, pulando: {repo.name}")
-                        skipped_repos.append((repo.name, "Repositório não encontrado"))
-                    else:
-                        self.logger.error(f"Erro de API do GitHub para {repo.name}: {str(e)}")
-                        skipped_repos.append((repo.name, f"Erro de API: {str(e)}"))
-                    continue
-                except Exception as e:
-                    self.logger.error(f"Erro ao processar {repo.name}: {str(e)}")
-                    skipped_repos.append((repo.name, str(e)))
-                    continue
+            if min_free_space:
+                self.disk_watchdog = DiskWatchdog(backup_path, self.logger, min_free_space)
+                self.disk_watchdog.start()
+            if progress_callback is None and progress_var is not None:
+                progress_callback = progress_var.set
+            skipped_repos = self._run_pipeline(repos_to_backup, backup_path, progress_callback, retry_count, stage_workers)
+            self._log_unpushed_destinations()
+            if self.cold_storage.report()['repositories']:
+                self.logger.info(self.cold_storage.describe())
+            if maintenance is not None and not self._should_stop_processing():
+                scheduler = MaintenanceScheduler(backup_path, self.logger, disk_usage=self.disk_usage, **maintenance)
+                scheduler.run_pass(should_stop=self._should_stop_processing)
+            if self.disk_watchdog is not None and self.disk_watchdog.paused_seconds:
+                self.logger.info(f"Clones pausados por falta de espaço durante {self.disk_watchdog.paused_seconds:.0f}s")
+            growth = self.disk_usage.growth_since_last_run()
+            total = self.disk_usage.record_run()
+            self.logger.info(f"Tamanho do backup: {total / 1e9:.2f}GB"
+                             + (f" ({growth / 1e9:+.2f}GB desde a última execução)" if growth is not None else ""))
 
             if skipped_repos:
                 self.logger.info("\nRepositórios pulados:")
                 for repo_name, reason in skipped_repos:
                     self.logger.info(f"- {repo_name}: {reason}")
 
+            self.logger.info(f"Concorrência final: {self.concurrency.describe()}")
+
             if self.is_running and not (self.pause_event and self.pause_event.is_set()):
                 self.logger.info("Mirror concluído com sucesso!")
+                if snapshot_retention is not None:
+                    snapshots = SnapshotManager(backup_path, self.logger, snapshot_retention)
+                    snapshots.create()
+                    snapshots.prune()
 
         except Exception as e:
             self.error_logger.log_error(e, "Erro durante o processo de mirror")
         except Exception as e:
             self.error_logger.log_error(e, "Erro durante o processo de mirror")
             raise e
+        finally:
+            if self.disk_watchdog is not None:
+                self.disk_watchdog.stop()
+                self.disk_watchdog = None
+            self.github_ops.close()
+            self.disk_usage.close()
+            http_cache.log_stats(self.logger)
+
+    def _run_pipeline(self, repos_to_backup, backup_path, progress_callback, retry_count, stage_workers):
+        """Run the queued repositories through the fetch -> provision -> push (-> export) pipeline.
+
+        Returns the list of (repo_name, reason) tuples for skipped repositories.
+        """
+        total_repos = len(repos_to_backup)
+        skipped_repos = []
+        skipped_lock = threading.Lock()
+        cold_candidates = []
+        self._completed_count = 0
+        self._pushed_repos = set()
+        self._transfers = {}
+        self._progress_shown = 0.0
+        self.repo_ops.progress_callback = lambda snapshot: self._on_transfer(snapshot, total_repos, progress_callback)
+        if self.lfs is not None:
+            self.lfs.progress_callback = self.repo_ops.progress_callback
+
+        def jobs():
+            for i, repo in enumerate(repos_to_backup, 1):
+                if self._is_repo_already_processed(repo):
+                    self._update_progress(total_repos, progress_callback)
+                    continue
+                yield MirrorJob(repo, i, total_repos, backup_path / repo.name)
+
+        def on_complete(job):
+            self.progress_manager.mark_completed(
+                job.repo.full_name,
+                datetime.now().isoformat(),
+                fingerprint=job.fingerprint,
+                pushed_at=self._pushed_at_key(job.repo),
+                unchanged=job.unchanged,
+                lfs_bytes=job.lfs_bytes
+            )
+            self._pushed_repos.add(job.repo.name)
+            if job.unchanged:
+                self.logger.info(f"✓ Sem alterações desde o último backup: {job.repo.name}")
+            else:
+                self.logger.info(f"✓ Backup concluído para: {job.repo.name}")
+            reason = self._cold_reason(job)
+            if reason:
+                with skipped_lock:
+                    cold_candidates.append((job, reason))
+            self._update_progress(total_repos, progress_callback, job.repo.name)
+
+        def on_error(stage_name, job, e):
+            repo = job.repo
+            if isinstance(e, GithubException):
+                if e.status == 404:
+                    self.logger.error(f"Repositório não encontrado, pulando: {repo.name}")
+                    reason = "Repositório não encontrado"
+                else:
+                    self.logger.error(f"Erro de API do GitHub para {repo.name}: {str(e)}")
+                    reason = f"Erro de API: {str(e)}"
+            else:
+                self.logger.error(f"Erro ao processar {repo.name} (etapa {stage_name}): {str(e)}")
+                reason = str(e)
+            with skipped_lock:
+                skipped_repos.append((repo.name, reason))
+            self._update_progress(total_repos, progress_callback, repo.name)
+
+        concurrency = self.concurrency or self._create_concurrency_controller(stage_workers, False, None, None)
+        source_limiter = concurrency.source_repos
+        dest_limiter = concurrency.dest_repos
+        # Git stages get as many workers as their limiter may ever allow;
+        # the limiter decides how many of them are active at a time
+        stages = [
+            PipelineStage("fetch", lambda job: self._run_stage(job, "fetch", self._fetch_source, retry_count, source_limiter),
+                          workers=source_limiter.maximum),
+            PipelineStage("provision", lambda job: self._run_stage(job, "provision", self._provision_destination, retry_count),
+                          workers=stage_workers['provision']),
+            PipelineStage("push", lambda job: self._run_stage(job, "push", self._push_destination, retry_count, dest_limiter),
+                          workers=dest_limiter.maximum),
+        ]
+        if self.bundle_exporter is not None:
+            stages.append(PipelineStage("export", lambda job: self._run_stage(job, "export", self._export_bundle, retry_count),
+                                        workers=stage_workers['export']))
+        pipeline = StagedPipeline(stages, self.logger, should_stop=self._should_stop_processing)
+        pipeline.run(jobs(), on_complete=on_complete, on_error=on_error)
+        if cold_candidates and not self._should_stop_processing():
+            self._freeze_mirrors(cold_candidates)
+
+        # Keep the report in the same order as the serial path would produce it
+        order = {repo.name: index for index, repo in enumerate(repos_to_backup)}
+        skipped_repos.sort(key=lambda item: order.get(item[0], total_repos))
+        return skipped_repos
+
+    def _check_disk_space(self, backup_path, repos_to_backup, min_free_space):
+        """Log the space this run is expected to need; existing mirrors only count their delta."""
+        checker = DiskSpaceChecker(self.logger, self.error_logger)
+        pending = [repo for repo in repos_to_backup if not self._was_processed(repo)]
+        last_pushed_at = {}
+        for repo in pending:
+            previous = self.progress_manager.get_fingerprint(repo.full_name)
+            if previous:
+                last_pushed_at[repo.full_name] = previous.get('pushed_at')
+        required = checker.estimate_required_space(
+            pending, self.progress_manager.get_lfs_sizes(), backup_path, last_pushed_at,
+            mirror_sizes=self.disk_usage.sizes() if self.disk_usage is not None else None
+        )
+        # The watermark that must stay free replaces the checker's fixed buffer
+        required += (min_free_space or 0) - checker.MIN_BUFFER_SPACE
+        free = shutil.disk_usage(str(backup_path)).free
+        self.logger.info(f"Espaço estimado para este backup: {required / 1e9:.2f}GB (livre: {free / 1e9:.2f}GB)")
+        if free < required:
+            self.logger.warning("O espaço livre pode não ser suficiente; novos clones serão pausados "
+                                "se o espaço ficar abaixo do limite")
+
+    def _provision_destinations(self, repos_to_backup):
+        """Create the missing destination repositories before any push starts.
+
+        Creating them in one concurrent batch is much faster than one call per
+        repository, at the cost of creating destinations for sources that may
+        still fail to fetch or be stopped before their push; those are listed
+        by ``_log_unpushed_destinations()`` at the end of the run.
+
+        Failures are only logged here: the provision stage retries them per
+        repository and reports them as skipped if they keep failing.
+        """
+        pending = [repo for repo in repos_to_backup if not self._was_processed(repo)]
+        if not pending:
+            return
+        try:
+            self.github_ops.get_or_create_dest_repos(pending)
+        except GithubException as e:
+            self.error_logger.log_error(e, "Erro ao listar os repositórios do destino")
+
+    def _log_unpushed_destinations(self):
+        """Warn about destinations created up front whose source never reached a successful push."""
+        unpushed = sorted(self.github_ops.created_dest_repos - self._pushed_repos)
+        if unpushed:
+            self.logger.warning(f"Repositórios criados no destino mas ainda sem push ({len(unpushed)}): "
+                                + ", ".join(unpushed))
+
+    def _resolve_stage_workers(self, jobs, stage_workers):
+        """Merge per-stage worker limits with the global jobs default."""
+        jobs = max(1, int(jobs or 1))
+        resolved = {stage: jobs for stage in self.PIPELINE_STAGES}
+        for stage, workers in (stage_workers or {}).items():
+            if stage not in resolved:
+                raise ValueError(f"Etapa de pipeline desconhecida: {stage}")
+            if workers:
+                resolved[stage] = max(1, int(workers))
+        return resolved
+
+    def _http_cache_dir(self):
+        """The HTTP cache lives next to the progress file."""
+        return self._state_path(DEFAULT_CACHE_DIR)
+
+    def _state_path(self, name):
+        """Path of a state file or directory kept next to the progress file."""
+        progress_file = getattr(self.progress_manager, 'progress_file', None)
+        if progress_file is None:
+            return Path(name)
+        return Path(progress_file).parent / name
 
     def _load_ignored_repos(self):
         """Load ignored repositories from ignored_repos.txt."""
@@ -105,7 +427,8 @@ class BackupExecutor:
     def _validate_tokens(self):
         """Validate both tokens have necessary permissions."""
         try:
-            validate_tokens(self._source_token.strip(), self._dest_token.strip(), self.logger, self.error_logger)
+            validate_tokens(self._source_token.strip(), self._dest_token.strip(), self.logger, self.error_logger,
+                            cache_file=self._state_path(TOKEN_CACHE_FILE))
         except Exception as e:
             self.logger.error(f"Falha na validação dos tokens: {str(e)}")
             self.error_logger.log_error(e, "Falha na validação dos tokens")
@@ -122,69 +445,308 @@ class BackupExecutor:
         """Check if processing should be stopped."""
         return not self.is_running or (self.pause_event and self.pause_event.is_set())
 
+    def _was_processed(self, repo):
+        """Whether the repository is skipped as already processed, without logging it.
+
+        In incremental mode nothing is skipped here; the fetch stage compares
+        ref fingerprints instead.
+        """
+        return not self.incremental and repo.full_name in self.progress_manager.current_progress
+
     def _is_repo_already_processed(self, repo):
-        """Check if repository was already processed."""
-        if repo.full_name in self.progress_manager.current_progress:
+        """Check if repository was already processed, logging the skip."""
+        if self._was_processed(repo):
             self.logger.info(f"Pulando {repo.name} - já foi feito backup anteriormente")
             return True
         return False
 
-    def _process_repository(self, repo, backup_path, current_index, total_repos, progress_var, max_retries=3):
-        """Process a single repository."""
+    def _create_concurrency_controller(self, stage_workers, adaptive, max_jobs, callback):
+        """Build the source/destination limiters for git transfers and API calls."""
+        max_jobs = max(1, int(max_jobs or self.DEFAULT_MAX_JOBS))
+        api_max = self.github_ops.max_connections
+        repo_limits = {
+            'source': (stage_workers['fetch'], max(max_jobs, stage_workers['fetch'])),
+            'dest': (stage_workers['push'], max(max_jobs, stage_workers['push'])),
+        }
+        api_initial = max(1, api_max // 2) if adaptive else api_max
+        api_limits = {'source': (api_initial, api_max), 'dest': (api_initial, api_max)}
+        return ConcurrencyController(self.logger, repo_limits, api_limits, adaptive=adaptive, on_change=callback)
+
+    def _run_stage(self, job, stage_name, func, max_retries=3, limiter=None):
+        """Run one pipeline stage for a repository, retrying on failure.
+
+        When a limiter is given each attempt holds one of its slots, and the
+        outcome (bytes moved or the failure) is reported back to it.
+        """
         retry_count = 0
-        
-        self.logger.info(f"\nProcessando repositório {current_index}/{total_repos}: {repo.name}")
-        
-        while retry_count < max_retries:
+        while True:
             try:
-                self._mirror_repository(repo, backup_path)
-                self.progress_manager.current_progress[repo.full_name] = datetime.now().isoformat()
-                self.progress_manager.save_progress()
-                self.logger.info(f"✓ Backup concluído para: {repo.name}")
-                break
+                if limiter is None:
+                    func(job)
+                else:
+                    with limiter.slot():
+                        func(job)
+                    limiter.record_success(job.bytes_fetched)
+                return
             except Exception as e:
+                # A missing repository says nothing about how loaded the link is
+                missing = isinstance(e, GithubException) and e.status == 404
+                if limiter is not None and not missing:
+                    limiter.record_error("timeout" if "timed out" in str(e).lower() else "falha")
                 retry_count += 1
-                self.logger.error(f"Erro no mirror do repositório {repo.name} (tentativa {retry_count}/{max_retries}): {str(e)}")
-                if retry_count == max_retries:
-                    self.logger.error(f"Número máximo de tentativas ({max_retries}) alcançado para {repo.name}")
+                self.logger.error(f"Erro na etapa {stage_name} do repositório {job.repo.name} (tentativa {retry_count}/{max_retries}): {str(e)}")
+                if retry_count >= max_retries:
+                    self.logger.error(f"Número máximo de tentativas ({max_retries}) alcançado para {job.repo.name}")
                     raise
 
-        self._update_progress(current_index, total_repos, progress_var)
+    def _fetch_source(self, job):
+        """Stage 1: clone or update the local mirror from the source account."""
+        source_repo = job.repo
+        repo_path = job.repo_path
+        self.logger.info(f"\nProcessando repositório {job.index}/{job.total}: {source_repo.name}")
 
-    def _mirror_repository(self, source_repo, backup_path):
-        """Mirror a repository to the destination."""
-        repo_path = backup_path / source_repo.name
-        
-        try:
-            # Check if repository exists and is accessible
+        source_repo = self._check_source(job)
+
+        # A cold repository only ever costs a ref check while it does not change
+        cold = self.cold_storage is not None and self.cold_storage.is_cold(source_repo.name)
+        if (self.incremental or cold) and self._is_unchanged(job):
+            job.unchanged = True
+            return
+
+        if getattr(source_repo, 'is_empty', None) is True:
+            # Nothing to clone or push; the destination still gets created and synced
+            self.logger.info(f"Repositório vazio na origem: {source_repo.name}")
+            job.empty = True
+            job.fingerprint = fingerprint_refs([])
+            return
+
+        if self.disk_watchdog is not None and not self.disk_watchdog.wait_for_space(self._should_stop_processing):
+            raise Exception("Backup interrompido enquanto aguardava espaço em disco")
+
+        if cold:
+            released = self.cold_storage.thaw(source_repo.name, repo_path)
+            if self.disk_usage is not None:
+                self.disk_usage.add(COLD_DIR, -released)
+
+        pool = self.object_pools.pool_for(source_repo) if self.object_pools else None
+        size_before = self.repo_ops.get_pack_size(repo_path)
+        if self._sync_mirror(repo_path, source_repo, pool):
+            size_before = 0
+        self._fetch_lfs(job)
+        # Approximates the bytes moved; also used as the push volume estimate
+        job.bytes_fetched = max(0, self.repo_ops.get_pack_size(repo_path) - size_before) + job.lfs_bytes
+        job.fingerprint = self.repo_ops.get_local_fingerprint(repo_path)
+        if pool is not None:
+            self.object_pools.absorb(pool, source_repo, repo_path, new_objects=job.bytes_fetched > 0)
+        self._record_disk_usage(job, pool)
+
+    def _record_disk_usage(self, job, pool):
+        """Update the disk usage index for what this fetch changed."""
+        if self.disk_usage is None:
+            return
+        self.disk_usage.update(job.repo.name, job.repo_path)
+        # The LFS store is shared and can be huge: grow it by what was downloaded
+        self.disk_usage.add(LFS_STORAGE_DIR, job.lfs_bytes)
+        if pool is not None:
+            self.disk_usage.update(f"{POOL_DIR}/{pool.name}", pool)
+
+    def _cold_reason(self, job):
+        """Why a just mirrored repository belongs in the cold tier, or None."""
+        if self.cold_after is None or self.cold_storage is None or job.empty or not job.repo_path.exists():
+            return None
+        if getattr(job.repo, 'archived', None) is True:
+            return REASON_ARCHIVED
+        progress = self.progress_manager.get_progress(job.repo.full_name)
+        if isinstance(progress, dict) and progress.get('unchanged_runs', 0) >= self.cold_after:
+            return REASON_DORMANT
+        return None
+
+    def _freeze_mirrors(self, candidates):
+        """Move mirrors into the cold tier once the pipeline is done, off the transfer path."""
+        reclaimed = 0
+        for job, reason in candidates:
+            try:
+                saved = self.cold_storage.freeze(job.repo.name, job.repo_path, reason)
+            except Exception as e:
+                self.logger.error(f"Erro ao mover {job.repo.name} para o armazenamento frio: {str(e)}")
+                continue
+            if saved is None:
+                continue
+            reclaimed += saved
+            if self.disk_usage is not None:
+                self.disk_usage.remove(job.repo.name)
+                self.disk_usage.add(COLD_DIR, self.cold_storage.bundle_path(job.repo.name).stat().st_size)
+        if reclaimed:
+            self.logger.info(f"Armazenamento frio: {reclaimed / 1e9:.2f}GB liberados nesta execução")
+
+    def _sync_mirror(self, repo_path, source_repo, pool):
+        """Bring the local mirror up to date, re-cloning only as a last resort.
+
+        Update failures are classified first: network errors are retried in
+        place, a corrupt object store is repaired, and authentication errors
+        are raised as is. Only a mirror that cannot be repaired is cloned
+        again, into a staging directory swapped in when complete; an
+        interrupted clone is resumed. Returns True if the mirror was (re)cloned.
+        """
+        clone_url = source_repo.clone_url
+        if not repo_path.exists() or staging_path(repo_path).exists():
+            self.repo_ops.clone_via_staging(repo_path, clone_url, self._source_token, reference=pool)
+            return True
+
+        attempt = 0
+        while True:
             try:
-                source_repo.get_contents("/")
+                self.repo_ops.update_repository(repo_path, clone_url, self._source_token)
+                return False
+            except Exception as e:
+                kind = getattr(e, 'kind', GIT_ERROR_OTHER)
+                if kind == GIT_ERROR_NETWORK and attempt < self.NETWORK_RETRIES:
+                    delay = self.NETWORK_RETRY_DELAY * 2 ** attempt
+                    attempt += 1
+                    self.logger.warning(f"Erro de rede ao atualizar {source_repo.name}, nova tentativa em {delay}s "
+                                        f"({attempt}/{self.NETWORK_RETRIES})")
+                    time.sleep(delay)
+                    continue
+                if kind in (GIT_ERROR_NETWORK, GIT_ERROR_AUTH):
+                    # A new clone would fail the same way
+                    raise
+                error = e
+                break
+
+        if kind == GIT_ERROR_CORRUPT:
+            self.logger.error(f"Objetos corrompidos em {source_repo.name}, tentando reparar: {error}")
+            try:
+                self.repo_ops.repair_repository(repo_path, clone_url, self._source_token)
+                return False
+            except Exception as e:
+                if getattr(e, 'kind', GIT_ERROR_OTHER) in (GIT_ERROR_NETWORK, GIT_ERROR_AUTH):
+                    raise
+                error = e
+        self.logger.error(f"Mirror local inutilizável, clonando novamente: {source_repo.name}: {error}")
+        self.repo_ops.clone_via_staging(repo_path, clone_url, self._source_token, reference=pool)
+        return True
+
+    def _fetch_lfs(self, job):
+        """Download the LFS objects of a repository that uses LFS into the shared store."""
+        if self.lfs is None or not self.lfs.uses_lfs(job.repo_path):
+            return
+        if not self.lfs.available:
+            self.logger.warning(f"{job.repo.name} usa Git LFS, mas git-lfs não está instalado: "
+                                f"os objetos LFS não serão copiados")
+            return
+        job.lfs = True
+        job.lfs_bytes = self.lfs.fetch(job.repo_path)
+
+    def _check_source(self, job):
+        """Accessibility, emptiness and archived status of the source repository.
+
+        Repositories listed in a recent inventory are known to be accessible
+        and their metadata is used as is. Only when the inventory is older than
+        ``INVENTORY_MAX_AGE`` (or missing) is the repository re-read, which
+        raises a 404 if it was deleted in the meantime.
+        """
+        if self.inventory is None or self.inventory.age > self.INVENTORY_MAX_AGE:
+            try:
+                job.repo = self.github_ops.refresh_source_repo(job.repo)
             except GithubException as e:
                 if e.status == 404:
-                    raise GithubException(404, f"Repository {source_repo.name} is not accessible or has been deleted")
+                    raise GithubException(404, f"Repository {job.repo.name} is not accessible or has been deleted")
                 raise
+        if getattr(job.repo, 'archived', None) is True:
+            self.logger.info(f"Repositório arquivado na origem (somente leitura): {job.repo.name}")
+        return job.repo
 
-            if not repo_path.exists():
-                self.repo_ops.clone_repository(repo_path, source_repo.clone_url, self._source_token)
-            else:
-                try:
-                    self.repo_ops.update_repository(repo_path, source_repo.clone_url, self._source_token)
-                except Exception as e:
-                    self.logger.error(f"Erro ao atualizar repositório, tentando clonar novamente: {e}")
-                    self.repo_ops.remove_repository(repo_path)
-                    self.repo_ops.clone_repository(repo_path, source_repo.clone_url, self._source_token)
+    def _is_unchanged(self, job):
+        """Incremental mode and cold tier: True if the source refs match the last mirrored fingerprint.
 
-            dest_repo = self.github_ops.get_or_create_dest_repo(source_repo)
-            self.repo_ops.push_repository(repo_path, dest_repo.clone_url, self._dest_token)
-            self.github_ops.sync_repo_settings(source_repo, dest_repo)
+        An unchanged ``pushed_at`` from the listing answers without any call;
+        otherwise one ``git ls-remote`` decides.
+        """
+        previous = self.progress_manager.get_fingerprint(job.repo.full_name)
+        kept = job.repo_path.exists() or (self.cold_storage is not None and self.cold_storage.is_cold(job.repo.name))
+        if previous is None or not kept:
+            return False
 
-        except Exception as e:
-            self.logger.error(f"Erro durante o mirror do repositório {source_repo.name}: {str(e)}")
-            raise
-
-    def _update_progress(self, current_index, total_repos, progress_var):
-        """Update progress bar in the main thread."""
-        if progress_var:
-            progress = (current_index / total_repos) * 100
-            progress_var.set(progress)
-            progress_var.widget.update_idletasks()  # Force GUI update
+        pushed_at = self._pushed_at_key(job.repo)
+        if pushed_at and pushed_at == previous['pushed_at']:
+            job.fingerprint = previous['fingerprint']
+            return True
+
+        fingerprint = self.repo_ops.get_remote_fingerprint(job.repo.clone_url, self._source_token)
+        if fingerprint == previous['fingerprint']:
+            job.fingerprint = fingerprint
+            return True
+        return False
+
+    @staticmethod
+    def _pushed_at_key(repo):
+        pushed_at = getattr(repo, 'pushed_at', None)
+        return pushed_at.isoformat() if pushed_at else None
+
+    def _provision_destination(self, job):
+        """Stage 2: take the destination repository from the index, creating it if still missing."""
+        if job.unchanged:
+            return
+        job.dest_repo = self.github_ops.get_or_create_dest_repo(job.repo)
+
+    def _push_destination(self, job):
+        """Stage 3: push the mirror and synchronize repository settings."""
+        if job.unchanged:
+            return
+        if not job.empty:
+            def before_push():
+                self.github_ops.unarchive_for_push(job.dest_repo)
+                if job.lfs:
+                    # Objects first, so the pushed refs never point at missing LFS content
+                    self.lfs.push(job.repo_path, job.dest_repo.clone_url, self._dest_token)
+
+            job.push_plan = self.repo_ops.push_repository(
+                job.repo_path, job.dest_repo.clone_url, self._dest_token, before_push=before_push
+            )
+        self.github_ops.sync_repo_settings(job.repo, job.dest_repo)
+
+    def _export_bundle(self, job):
+        """Stage 4 (optional): write an incremental bundle of the refs changed since the last export."""
+        if job.unchanged or job.empty:
+            return
+        self.bundle_exporter.export(job.repo.full_name, job.repo_path)
+
+    def _on_transfer(self, snapshot, total_repos, progress_callback):
+        """Track a running git or LFS transfer of a repository."""
+        with self._progress_lock:
+            self._transfers.setdefault(snapshot['repository'], {})[snapshot['operation']] = snapshot['fraction']
+            if progress_callback and total_repos:
+                progress_callback(self._progress_value(total_repos))
+        if self.transfer_callback is not None:
+            self.transfer_callback(snapshot)
+
+    def _progress_value(self, total_repos):
+        """Percentage of handled repositories plus the share already transferred of running ones.
+
+        Half of a repository is its download (git and LFS), half its upload.
+        The value never goes back, e.g. when an LFS transfer starts after the
+        git one or a failed repository is dropped.
+        """
+        in_flight = 0.0
+        for shares in self._transfers.values():
+            for upload in (False, True):
+                fractions = [fraction for operation, fraction in shares.items()
+                             if (operation in UPLOAD_OPERATIONS) == upload]
+                if fractions:
+                    in_flight += sum(fractions) / len(fractions) / 2
+        value = min(100.0, (self._completed_count + in_flight) / total_repos * 100)
+        self._progress_shown = max(self._progress_shown, value)
+        return self._progress_shown
+
+    def _update_progress(self, total_repos, progress_callback, repo_name=None):
+        """Count a handled repository and report the new percentage.
+
+        With several workers repositories finish out of order, so the bar
+        follows the number of repositories already handled instead of the index.
+        Called from worker threads: ``progress_callback`` must not touch the GUI directly.
+        """
+        with self._progress_lock:
+            self._completed_count += 1
+            self._transfers.pop(repo_name, None)
+            if progress_callback:
+                progress_callback(self._progress_value(total_repos))
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from .repository_operations import PUSHED_REF_NAMESPACES, _parse_ref_lines
+
+INDEX_FILE = 'index.json'
+CHUNK_SIZE = 1024 * 1024
+
+
+class BundleExporter:
+    """Writes incremental git bundles of the local mirrors for offline copies.
+
+    Each repository gets a directory under ``export_dir`` with a chain of
+    bundles and an ``index.json`` describing it. The first bundle of a chain
+    (the base) holds every branch and tag; each later one only holds the refs
+    that changed since the previous bundle and the objects they need, with
+    the previously exported commits as prerequisites. After ``max_chain``
+    deltas a new base is written. ``restore()`` rebuilds a repository from
+    the last base and its deltas.
+
+    Bundles are streamed from ``git bundle create`` to disk in fixed-size
+    chunks (checksummed on the way), so no pack is ever held in memory.
+    """
+
+    def __init__(self, export_dir, logger, max_chain=30):
+        self.export_dir = Path(export_dir)
+        self.logger = logger
+        self.max_chain = max_chain
+        self._lock = threading.Lock()
+
+    def repo_dir(self, full_name):
+        return self.export_dir / full_name.replace('/', '__')
+
+    def load_index(self, full_name):
+        try:
+            with open(self.repo_dir(full_name) / INDEX_FILE, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'repository': full_name, 'bundles': []}
+
+    def export(self, full_name, repo_path):
+        """Write the next bundle of the chain; returns its index entry, or None if nothing changed."""
+        index = self.load_index(full_name)
+        refs = self._local_refs(repo_path)
+        previous = index['bundles'][-1]['refs'] if index['bundles'] else {}
+        changed = sorted(ref for ref, sha in refs.items() if previous.get(ref) != sha)
+        deleted = sorted(ref for ref in previous if ref not in refs)
+        if not changed and not deleted:
+            return None
+
+        chain = self._current_chain(index['bundles'])
+        base = not chain or len(chain) > self.max_chain
+        prerequisites = [] if base else self._existing_objects(repo_path, set(previous.values()))
+        entry = {
+            'created_at': datetime.now().isoformat(),
+            'base': base,
+            'refs': refs,
+            'changed': sorted(refs) if base else changed,
+            'deleted': [] if base else deleted,
+            'prerequisites': prerequisites,
+            'file': None,
+        }
+
+        repo_dir = self.repo_dir(full_name)
+        repo_dir.mkdir(parents=True, exist_ok=True)
+        number = len(index['bundles']) + 1
+        bundle_name = f"{number:05d}-{'base' if base else 'delta'}.bundle"
+        result = None
+        if entry['changed']:
+            result = self._write_bundle(repo_path, repo_dir / bundle_name, entry['changed'], prerequisites)
+        if result is not None:
+            entry['file'] = bundle_name
+            entry['size'], entry['sha256'] = result
+        # Otherwise only ref moves/deletions: the index entry alone records them
+
+        index['bundles'].append(entry)
+        self._write_index(repo_dir, index)
+        kind = 'base' if base else 'incremental'
+        self.logger.info(f"Bundle {kind} exportado para {full_name}: {len(entry['changed'])} refs alteradas, "
+                         f"{entry.get('size', 0) / 1e6:.1f} MB")
+        return entry
+
+    def restore(self, full_name, target_path):
+        """Rebuild a bare repository from the last base bundle and the deltas after it."""
+        index = self.load_index(full_name)
+        chain = self._current_chain(index['bundles'])
+        if not chain:
+            raise Exception(f"Nenhum bundle exportado para {full_name}")
+        repo_dir = self.repo_dir(full_name)
+        self._git(['init', '--bare', '--quiet', str(target_path)])
+        for entry in chain:
+            if entry['file']:
+                bundle = str(repo_dir / entry['file'])
+                self._git(['bundle', 'verify', '--quiet', bundle], cwd=target_path)
+                self._git(['fetch', '--quiet', bundle, '+refs/*:refs/*'], cwd=target_path)
+        # The last entry holds the complete ref state, including moves without new objects
+        commands = [f"update {ref} {sha}" for ref, sha in chain[-1]['refs'].items()]
+        existing = self._local_refs(target_path)
+        commands += [f"delete {ref}" for ref in existing if ref not in chain[-1]['refs']]
+        self._git(['update-ref', '--stdin'], cwd=target_path, input='\n'.join(commands) + '\n')
+
+    @staticmethod
+    def _current_chain(bundles):
+        for position in range(len(bundles) - 1, -1, -1):
+            if bundles[position]['base']:
+                return bundles[position:]
+        return []
+
+    def _write_bundle(self, repo_path, bundle_path, refs, prerequisites):
+        """Stream ``git bundle create`` into ``bundle_path``; returns (size, sha256) or None if empty."""
+        tmp_path = bundle_path.with_suffix('.tmp')
+        digest = hashlib.sha256()
+        size = 0
+        # stderr goes to a file: a pipe read only after stdout could fill up and block git
+        with tempfile.TemporaryFile() as error_output:
+            process = subprocess.Popen(
+                ['git', 'bundle', 'create', '--quiet', '-', *refs, *(f"^{sha}" for sha in prerequisites)],
+                stdout=subprocess.PIPE,
+                stderr=error_output,
+                cwd=str(repo_path)
+            )
+            try:
+                with open(tmp_path, 'wb') as f:
+                    while True:
+                        chunk = process.stdout.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+                returncode = process.wait()
+            except BaseException:
+                process.kill()
+                process.wait()
+                tmp_path.unlink(missing_ok=True)
+                raise
+            finally:
+                process.stdout.close()
+            error_output.seek(0)
+            stderr = error_output.read().decode(errors='replace')
+        if returncode != 0:
+            tmp_path.unlink(missing_ok=True)
+            if 'empty bundle' in stderr:
+                return None
+            error_msg = f"Erro ao criar bundle: {stderr}"
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+        os.replace(tmp_path, bundle_path)
+        return size, digest.hexdigest()
+
+    def _write_index(self, repo_dir, index):
+        with self._lock:
+            tmp_path = repo_dir / (INDEX_FILE + '.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f, indent=2)
+            os.replace(tmp_path, repo_dir / INDEX_FILE)
+
+    def _local_refs(self, repo_path):
+        output = self._git(['for-each-ref', '--format=%(objectname) %(refname)', *PUSHED_REF_NAMESPACES],
+                           cwd=repo_path)
+        return _parse_ref_lines(output)
+
+    def _existing_objects(self, repo_path, shas):
+        """Previously exported commits still present locally (force pushes may have dropped some)."""
+        if not shas:
+            return []
+        output = self._git(['cat-file', '--batch-check=%(objectname)'], cwd=repo_path,
+                           input='\n'.join(sorted(shas)) + '\n')
+        return [line for line in output.splitlines() if line in shas]
+
+    def _git(self, args, cwd=None, input=None):
+        try:
+            process = subprocess.run(
+                ['git'] + args,
+                check=True,
+                capture_output=True,
+                text=True,
+                input=input,
+                cwd=str(cwd) if cwd else None
+            )
+        except subprocess.CalledProcessError as e:
+            error_msg = f"Erro ao exportar bundle ({args[0]}): {e.stderr}"
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+        return process.stdout
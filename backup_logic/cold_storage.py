@@ -0,0 +1,188 @@
+import json
+import os
+import subprocess
+import threading
+from datetime import datetime
+from pathlib import Path
+from .disk_space_check import directory_size
+
+# Frozen mirrors live here as one bundle each, with an index.json describing them
+COLD_DIR = '.cold'
+INDEX_FILE = 'index.json'
+
+REASON_ARCHIVED = 'archived'
+REASON_DORMANT = 'dormant'
+
+
+class ColdStorage:
+    """Compressed tier for mirrors that no longer change.
+
+    A frozen mirror is replaced by a single git bundle in ``<backup>/.cold``:
+    one fully repacked, delta-compressed pack with every ref (and HEAD),
+    without the indexes, loose objects and extra packs of a live mirror.
+    Objects borrowed from an object pool are included, so the bundle stands
+    on its own; a mirror is only frozen if its bundle is smaller.
+
+    While a repository is cold the backup only compares its refs with the
+    source. As soon as they change, ``thaw()`` re-inflates the mirror from
+    the bundle and the usual fetch brings it up to date.
+    """
+
+    def __init__(self, backup_path, logger, repo_ops=None):
+        self.root = Path(backup_path) / COLD_DIR
+        self.logger = logger
+        # Removes and restores mirrors; only needed to freeze and thaw (not for reports)
+        self.repo_ops = repo_ops
+        self._lock = threading.Lock()
+        self._index = self._load()
+
+    def _load(self):
+        try:
+            with open(self.root / INDEX_FILE, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def bundle_path(self, name):
+        return self.root / f"{name}.bundle"
+
+    def is_cold(self, name):
+        with self._lock:
+            return name in self._index
+
+    def freeze(self, name, repo_path, reason):
+        """Replace a mirror with its bundle; returns the bytes reclaimed, or None if not worth it.
+
+        The repository is only recorded as cold once the mirror is gone. If
+        the removal fails halfway, the mirror is restored from the bundle.
+        """
+        repo_path = Path(repo_path)
+        expanded = directory_size(repo_path)
+        self.root.mkdir(parents=True, exist_ok=True)
+        bundle = self.bundle_path(name)
+        tmp_path = bundle.with_suffix('.tmp')
+        try:
+            self._git(['bundle', 'create', '--quiet', str(tmp_path.resolve()), '--all'], cwd=repo_path)
+            self._git(['bundle', 'verify', '--quiet', str(tmp_path.resolve())], cwd=repo_path)
+            head = self._head(repo_path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        size = tmp_path.stat().st_size
+        if size >= expanded:
+            tmp_path.unlink()
+            self.logger.info(f"Armazenamento frio não compensa para {name} ({size / 1e6:.1f} MB >= {expanded / 1e6:.1f} MB)")
+            return None
+        os.replace(tmp_path, bundle)
+        entry = {
+            'frozen_at': datetime.now().isoformat(),
+            'reason': reason,
+            'bundle_bytes': size,
+            'expanded_bytes': expanded,
+            'head': head,
+        }
+        try:
+            self.repo_ops.remove_repository(repo_path)
+        except Exception as e:
+            if repo_path.exists():
+                self._recover_failed_removal(name, repo_path, entry, e)
+                raise
+        with self._lock:
+            self._index[name] = entry
+            self._save()
+        self.logger.info(f"Mirror movido para o armazenamento frio ({reason}): {name}, "
+                         f"{expanded / 1e6:.1f} MB -> {size / 1e6:.1f} MB")
+        return expanded - size
+
+    def _recover_failed_removal(self, name, repo_path, entry, error):
+        """Put back a complete mirror over one left half-deleted by a failed removal."""
+        self.logger.error(f"Erro ao remover {repo_path} para o armazenamento frio, restaurando do bundle: {error}")
+        try:
+            self._restore(name, repo_path, entry.get('head'))
+        except Exception as e:
+            # The bundle is the only intact copy: keep it as cold, thaw() restores it later
+            self.logger.error(f"Não foi possível restaurar {name}; mantido no armazenamento frio: {e}")
+            with self._lock:
+                self._index[name] = entry
+                self._save()
+            return
+        self.bundle_path(name).unlink(missing_ok=True)
+
+    def thaw(self, name, repo_path):
+        """Re-inflate a frozen mirror at ``repo_path``; returns the bundle size released.
+
+        The bundle is fetched into a staging directory and swapped in, so
+        whatever is left at ``repo_path`` (e.g. a partial directory) is
+        replaced. The origin URL points at the bundle until the next fetch
+        replaces it. The bundle is only dropped once restored, or if it
+        turns out to be unreadable; the mirror is then cloned again from
+        the source like a new one.
+        """
+        bundle = self.bundle_path(name)
+        with self._lock:
+            entry = self._index.get(name, {})
+        self.logger.info(f"Restaurando mirror do armazenamento frio: {name}")
+        try:
+            self._restore(name, repo_path, entry.get('head'))
+        except Exception as e:
+            if self._bundle_readable(bundle):
+                raise
+            self.logger.error(f"Bundle de {name} ilegível, o mirror será clonado da origem: {e}")
+        with self._lock:
+            self._index.pop(name, None)
+            self._save()
+        bundle.unlink(missing_ok=True)
+        return entry.get('bundle_bytes', 0)
+
+    def _restore(self, name, repo_path, head):
+        self.repo_ops.clone_via_staging(Path(repo_path), str(self.bundle_path(name).resolve()), None)
+        if head:
+            # A bundle does not tell which branch HEAD pointed to
+            self._git(['symbolic-ref', 'HEAD', head], cwd=repo_path)
+
+    def _bundle_readable(self, bundle):
+        if not bundle.exists():
+            return False
+        process = subprocess.run(['git', 'bundle', 'list-heads', str(bundle.resolve())],
+                                 capture_output=True, text=True)
+        return process.returncode == 0
+
+    def _head(self, repo_path):
+        process = subprocess.run(['git', 'symbolic-ref', '-q', 'HEAD'], capture_output=True, text=True,
+                                 cwd=str(repo_path))
+        return process.stdout.strip() or None
+
+    def report(self):
+        """Summary of the cold tier: repositories, bundle bytes and bytes reclaimed."""
+        with self._lock:
+            entries = list(self._index.values())
+        bundles = sum(entry['bundle_bytes'] for entry in entries)
+        reclaimed = sum(entry['expanded_bytes'] - entry['bundle_bytes'] for entry in entries)
+        return {'repositories': len(entries), 'bundle_bytes': bundles, 'reclaimed_bytes': reclaimed}
+
+    def describe(self):
+        summary = self.report()
+        return (f"Armazenamento frio: {summary['repositories']} repositórios, "
+                f"{summary['bundle_bytes'] / 1e9:.2f}GB em bundles, "
+                f"{summary['reclaimed_bytes'] / 1e9:.2f}GB liberados")
+
+    def _save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.root / (INDEX_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_path, self.root / INDEX_FILE)
+
+    def _git(self, args, cwd=None):
+        try:
+            subprocess.run(
+                ['git'] + args,
+                check=True,
+                capture_output=True,
+                text=True,
+                cwd=str(cwd) if cwd else None
+            )
+        except subprocess.CalledProcessError as e:
+            error_msg = f"Erro no armazenamento frio ({args[0]} {args[1]}): {e.stderr}"
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
@@ -0,0 +1,194 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class AdaptiveLimiter:
+    """Counting semaphore whose limit follows observed throughput and errors.
+
+    Successes are grouped into rounds of ``limit`` operations. After each round
+    the limit grows by one while bytes/sec holds or improves and shrinks by one
+    when it drops by more than 10%. Failures, timeouts and rate-limit responses
+    halve the limit (multiplicative decrease). ``Retry-After`` and exhausted
+    ``X-RateLimit-Remaining`` also pause new acquisitions until the given time.
+    With ``minimum == maximum`` the limit is fixed.
+    """
+
+    # X-RateLimit-Remaining below this value caps the limit to the minimum
+    LOW_REMAINING = 50
+
+    def __init__(self, name, logger, initial=1, minimum=1, maximum=None, on_change=None):
+        self.name = name
+        self.logger = logger
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum or initial))
+        self._limit = min(max(int(initial), self.minimum), self.maximum)
+        self.on_change = on_change
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._round_ops = 0
+        self._round_bytes = 0
+        self._round_started = time.monotonic()
+        self._last_rate = None
+
+    @property
+    def limit(self):
+        return self._limit
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if wait <= 0 and self._in_flight < self._limit:
+                    break
+                self._cond.wait(timeout=wait if wait > 0 else None)
+            self._in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def record_success(self, bytes_transferred=0):
+        """Account a finished operation; adjusts the limit at the end of each round."""
+        with self._cond:
+            self._round_ops += 1
+            self._round_bytes += max(0, int(bytes_transferred or 0))
+            if self._round_ops < self._limit:
+                return
+            elapsed = max(time.monotonic() - self._round_started, 1e-6)
+            # Operations/sec keeps API-only limiters (no bytes) adjustable
+            if self._round_bytes:
+                rate = self._round_bytes / elapsed
+                reason = f"{rate / 1e6:.2f} MB/s"
+            else:
+                rate = self._round_ops / elapsed
+                reason = f"{rate:.1f} op/s"
+            step = -1 if self._last_rate is not None and rate < self._last_rate * 0.9 else 1
+            self._last_rate = rate
+            self._reset_round()
+            self._set_limit(self._limit + step, reason)
+
+    def record_error(self, reason="erro"):
+        """A failure or timeout: halve the limit."""
+        with self._cond:
+            self._reset_round()
+            self._last_rate = None
+            self._set_limit(self._limit // 2, reason)
+
+    def record_response(self, status, headers):
+        """Feed an HTTP response (status and headers) from the GitHub API."""
+        headers = headers or {}
+        retry_after = headers.get('Retry-After')
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+
+        with self._cond:
+            if retry_after is not None:
+                try:
+                    self._pause(float(retry_after), f"Retry-After {retry_after}s")
+                except ValueError:
+                    pass
+            if remaining is not None:
+                try:
+                    remaining = int(remaining)
+                except ValueError:
+                    remaining = None
+            if remaining == 0 and reset:
+                try:
+                    self._pause(float(reset) - time.time(), "limite de API esgotado")
+                except ValueError:
+                    pass
+            throttled = status == 429 or (status == 403 and (retry_after is not None or remaining == 0))
+            if throttled or (status >= 500 and status != 501):
+                self._reset_round()
+                self._last_rate = None
+                self._set_limit(self._limit // 2, f"HTTP {status}")
+            elif remaining is not None and remaining < self.LOW_REMAINING:
+                self._set_limit(self.minimum, f"restam {remaining} chamadas de API")
+
+    def _pause(self, seconds, reason):
+        if seconds <= 0:
+            return
+        until = time.monotonic() + seconds
+        if until > self._paused_until:
+            self._paused_until = until
+            self.logger.info(f"Concorrência {self.name}: pausando novas operações por {seconds:.0f}s ({reason})")
+
+    def _reset_round(self):
+        self._round_ops = 0
+        self._round_bytes = 0
+        self._round_started = time.monotonic()
+
+    def _set_limit(self, value, reason):
+        value = min(max(int(value), self.minimum), self.maximum)
+        if value == self._limit:
+            return
+        previous, self._limit = self._limit, value
+        self._cond.notify_all()
+        self.logger.info(f"Concorrência {self.name}: {previous} -> {value} ({reason})")
+        if self.on_change:
+            try:
+                self.on_change(self.name, value)
+            except Exception as e:
+                self.logger.error(f"Erro ao notificar mudança de concorrência: {str(e)}")
+
+
+class ConcurrencyController:
+    """Separate adaptive limits for each side of the mirror.
+
+    ``source_repos``/``dest_repos`` limit git transfers (fetch and push) and
+    ``source_api``/``dest_api`` limit in-flight GitHub API calls.
+    """
+
+    NAMES = ('source_repos', 'source_api', 'dest_repos', 'dest_api')
+
+    def __init__(self, logger, repo_limits, api_limits, adaptive=True, on_change=None):
+        """``repo_limits``/``api_limits`` map 'source'/'dest' to (initial, maximum)."""
+        self.logger = logger
+        self.on_change = on_change
+        self.limiters = {}
+        for side in ('source', 'dest'):
+            for kind, limits in (('repos', repo_limits), ('api', api_limits)):
+                initial, maximum = limits[side]
+                name = f"{side}_{kind}"
+                self.limiters[name] = AdaptiveLimiter(
+                    name,
+                    logger,
+                    initial=initial,
+                    minimum=1 if adaptive else initial,
+                    maximum=maximum if adaptive else initial,
+                    on_change=self._notify
+                )
+
+    def __getattr__(self, name):
+        limiters = self.__dict__.get('limiters', {})
+        if name in limiters:
+            return limiters[name]
+        raise AttributeError(name)
+
+    def snapshot(self):
+        """Current limit of every limiter, e.g. {'source_repos': 4, ...}."""
+        return {name: limiter.limit for name, limiter in self.limiters.items()}
+
+    def describe(self):
+        limits = self.snapshot()
+        return (f"origem {limits['source_repos']} repos/{limits['source_api']} API, "
+                f"destino {limits['dest_repos']} repos/{limits['dest_api']} API")
+
+    def _notify(self, name, value):
+        if self.on_change:
+            self.on_change(self.snapshot())
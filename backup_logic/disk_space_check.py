@@ -1,27 +1,76 @@
 import os
 import shutil
+import threading
+import time
 from pathlib import Path
 from typing import Tuple
 
+def directory_size(path) -> int:
+    """Soma o tamanho dos arquivos de um diretório (recursivo, sem seguir links)."""
+    total = 0
+    stack = [str(path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+        except FileNotFoundError:
+            continue
+    return total
+
+MIN_BUFFER_SPACE = 2_000_000_000  # 2GB buffer
+
 class DiskSpaceChecker:
     def __init__(self, logger, error_logger):
         self.logger = logger
         self.error_logger = error_logger
-        self.MIN_BUFFER_SPACE = 2_000_000_000  # 2GB buffer
+        self.MIN_BUFFER_SPACE = MIN_BUFFER_SPACE
         
-    def estimate_required_space(self, repos) -> int:
+    def estimate_required_space(self, repos, lfs_sizes=None, backup_path=None, last_pushed_at=None,
+                                mirror_sizes=None) -> int:
         """Estima o espaço necessário para os repositórios.
         
+        Com ``backup_path``, os repositórios que já têm mirror local só
+        precisam do crescimento desde o último mirror: a diferença entre o
+        tamanho informado pelo GitHub e o tamanho real do mirror em disco,
+        ou nada se ``pushed_at`` não mudou desde o último mirror.
+        
         Args:
             repos: Lista de repositórios a serem clonados
+            lfs_sizes: Bytes de objetos LFS por repositório (full_name), como
+                registrados pelo último backup; o tamanho informado pelo
+                GitHub não inclui o LFS
+            backup_path: Diretório dos mirrors locais (opcional)
+            last_pushed_at: ``pushed_at`` (ISO) por repositório no último
+                mirror concluído (opcional)
+            mirror_sizes: Tamanho conhecido de cada mirror (nome), por exemplo
+                do ``DiskUsageIndex``; só os ausentes são medidos no disco
             
         Returns:
             int: Espaço estimado necessário em bytes
         """
+        lfs_sizes = lfs_sizes or {}
+        last_pushed_at = last_pushed_at or {}
+        mirror_sizes = mirror_sizes or {}
         total_size = 0
         for repo in repos:
-            # Usa o tamanho do repo + 20% de margem para operações
             repo_size = repo.size * 1024  # Convert KB to bytes
+            mirror_path = Path(backup_path) / repo.name if backup_path else None
+            if mirror_path is not None and mirror_path.exists():
+                pushed_at = getattr(repo, 'pushed_at', None)
+                if pushed_at and last_pushed_at.get(repo.full_name) == pushed_at.isoformat():
+                    continue
+                # Objetos LFS já baixados estão no armazenamento compartilhado
+                local_size = mirror_sizes.get(repo.name)
+                if local_size is None:
+                    local_size = directory_size(mirror_path)
+                repo_size = max(0, repo_size - local_size)
+            else:
+                repo_size += lfs_sizes.get(repo.full_name, 0)
+            # Usa o tamanho do repo + 20% de margem para operações
             total_size += repo_size * 1.2
         
         # Adiciona buffer mínimo
@@ -114,4 +163,74 @@ class DiskSpaceChecker:
                 e,
                 f"Erro ao verificar espaço em disco em: {path}"
             )
-            raise
\ No newline at end of file
+            raise
+
+class DiskWatchdog:
+    """Monitora o espaço livre durante o backup e segura novos clones.
+    
+    Uma thread mede o espaço livre a cada ``interval`` segundos. Abaixo de
+    ``watermark`` bytes, ``wait_for_space`` passa a bloquear quem vai iniciar
+    um clone ou fetch; as transferências em andamento continuam. A liberação
+    acontece quando o espaço livre volta a ``watermark`` + ``RESUME_MARGIN``,
+    evitando alternar a cada medição.
+    """
+
+    RESUME_MARGIN = 0.1  # Fração do watermark acima dele para retomar
+
+    def __init__(self, path, logger, watermark, interval=5.0):
+        self.path = str(path)
+        self.logger = logger
+        self.watermark = watermark
+        self.resume_at = int(watermark * (1 + self.RESUME_MARGIN))
+        self.interval = interval
+        self.free = None
+        self.paused_seconds = 0.0
+        self._disk_usage = shutil.disk_usage
+        self._space_ok = threading.Event()
+        self._space_ok.set()
+        self._stop = threading.Event()
+        self._thread = None
+        self._paused_since = None
+
+    def start(self):
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="disk-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._space_ok.set()
+
+    def sample(self):
+        """Mede o espaço livre e atualiza o estado de pausa."""
+        self.free = self._disk_usage(self.path).free
+        if self._space_ok.is_set() and self.free < self.watermark:
+            self._paused_since = time.monotonic()
+            self._space_ok.clear()
+            self.logger.warning(
+                f"Espaço livre abaixo do limite ({self.free / 1e9:.2f}GB < {self.watermark / 1e9:.2f}GB): "
+                f"novos clones pausados até liberar {self.resume_at / 1e9:.2f}GB"
+            )
+        elif not self._space_ok.is_set() and self.free >= self.resume_at:
+            self.paused_seconds += time.monotonic() - self._paused_since
+            self._space_ok.set()
+            self.logger.info(f"Espaço livre recuperado ({self.free / 1e9:.2f}GB): retomando clones")
+        return self.free
+
+    def wait_for_space(self, should_stop=None):
+        """Bloqueia enquanto o espaço estiver abaixo do limite; False se o backup foi interrompido."""
+        should_stop = should_stop or (lambda: False)
+        while not self._space_ok.is_set():
+            if should_stop():
+                return False
+            self._space_ok.wait(timeout=1.0)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except OSError as e:
+                self.logger.error(f"Erro ao medir espaço em disco: {e}")
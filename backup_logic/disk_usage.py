@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from .disk_space_check import directory_size
+
+# Kept next to progress.json, like the HTTP cache
+DEFAULT_INDEX_FILE = 'disk_usage.json'
+RUN_HISTORY_LIMIT = 100
+REBUILD_WORKERS = 8
+
+
+class DiskUsageIndex:
+    """Size of every mirror (and shared store) in the backup directory, kept up to date.
+
+    Entries are keyed by their path relative to the backup directory: the
+    mirror name, ``.lfs``, ``.cold`` or ``.objects/<pool>``. Each one is re-measured
+    when its directory changes (fetch, clone, maintenance) so totals,
+    rankings and growth never need a walk of the whole backup directory.
+    ``rebuild()`` recreates the index from scratch when it is lost.
+
+    ``record_run()`` stores the total at the end of each backup, which is
+    what growth is measured against.
+
+    Single updates are written out every ``SAVE_EVERY`` changes rather than
+    each time, so a run does not rewrite the whole file once per mirror;
+    ``close()`` writes whatever is left. Updates lost in a crash only make
+    those entries stale until they are measured again.
+    """
+
+    SAVE_EVERY = 50
+
+    def __init__(self, index_file=DEFAULT_INDEX_FILE):
+        self.index_file = Path(index_file)
+        self._lock = threading.Lock()
+        self._data = self._load()
+        self._unsaved = 0
+
+    def _load(self):
+        try:
+            with open(self.index_file, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            data = {}
+        data.setdefault('entries', {})
+        data.setdefault('runs', [])
+        return data
+
+    def update(self, name, path):
+        """Measure one directory and store its size; returns it."""
+        return self.set(name, directory_size(path))
+
+    def set(self, name, size):
+        with self._lock:
+            self._set(name, size)
+        return size
+
+    def add(self, name, delta):
+        """Grow an entry by ``delta`` bytes without measuring it (large shared stores)."""
+        if not delta:
+            return
+        with self._lock:
+            self._set(name, self._data['entries'].get(name, {}).get('bytes', 0) + delta)
+
+    def remove(self, name):
+        with self._lock:
+            if self._data['entries'].pop(name, None) is not None:
+                self._changed()
+
+    def close(self):
+        """Write the updates not saved yet."""
+        with self._lock:
+            if self._unsaved:
+                self._save()
+
+    def _set(self, name, size):
+        entry = self._data['entries'].get(name, {})
+        self._data['entries'][name] = {
+            'bytes': size,
+            'previous_bytes': entry.get('bytes', size),
+            'updated_at': datetime.now().isoformat(),
+        }
+        self._changed()
+
+    def _changed(self):
+        self._unsaved += 1
+        if self._unsaved >= self.SAVE_EVERY:
+            self._save()
+
+    def sizes(self):
+        with self._lock:
+            return {name: entry['bytes'] for name, entry in self._data['entries'].items()}
+
+    def total(self):
+        return sum(self.sizes().values())
+
+    def top(self, count=10):
+        """The ``count`` largest entries, as (name, bytes), largest first."""
+        return sorted(self.sizes().items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def last_run_total(self):
+        with self._lock:
+            return self._data['runs'][-1]['bytes'] if self._data['runs'] else None
+
+    def growth_since_last_run(self):
+        """Bytes added since the last recorded run (None if there is none)."""
+        previous = self.last_run_total()
+        return None if previous is None else self.total() - previous
+
+    def record_run(self):
+        total = self.total()
+        with self._lock:
+            self._data['runs'] = (self._data['runs'] + [{'at': datetime.now().isoformat(), 'bytes': total}])[-RUN_HISTORY_LIMIT:]
+            self._save()
+        return total
+
+    def rebuild(self, backup_path, workers=REBUILD_WORKERS):
+        """Measure every mirror and shared store again, in parallel; returns the total."""
+        backup_path = Path(backup_path)
+        directories = {}
+        for entry in os.scandir(backup_path):
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            if entry.name == '.objects':
+                for pool in os.scandir(entry.path):
+                    if pool.is_dir(follow_symlinks=False):
+                        directories[f".objects/{pool.name}"] = pool.path
+            elif not entry.name.startswith('.') or entry.name in ('.lfs', '.cold'):
+                directories[entry.name] = entry.path
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="disk-usage") as pool:
+            sizes = dict(zip(directories, pool.map(directory_size, directories.values())))
+        now = datetime.now().isoformat()
+        with self._lock:
+            previous = self._data['entries']
+            self._data['entries'] = {
+                name: {'bytes': size, 'previous_bytes': previous.get(name, {}).get('bytes', size), 'updated_at': now}
+                for name, size in sizes.items()
+            }
+            self._save()
+        return sum(sizes.values())
+
+    def report(self, count=10):
+        """Text summary: total, growth since the last run and the largest entries."""
+        lines = [f"Tamanho total do backup: {self.total() / 1e9:.2f}GB em {len(self.sizes())} diretórios"]
+        growth = self.growth_since_last_run()
+        if growth is not None:
+            lines.append(f"Crescimento desde a última execução: {growth / 1e9:+.2f}GB")
+        for name, size in self.top(count):
+            lines.append(f"  {size / 1e9:10.2f}GB  {name}")
+        return "\n".join(lines)
+
+    def _save(self):
+        self._unsaved = 0
+        tmp_path = self.index_file.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self._data, f, indent=2)
+        os.replace(tmp_path, self.index_file)
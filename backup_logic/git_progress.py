@@ -0,0 +1,232 @@
+import os
+import re
+import subprocess
+import time
+from collections import deque
+
+CHUNK_SIZE = 64 * 1024
+MAX_LINE = 4096        # Longer lines are truncated while reading
+TAIL_LINES = 50        # Non-progress lines kept for error messages
+LOG_INTERVAL = 10.0    # Seconds between progress lines in the log
+CALLBACK_INTERVAL = 0.5
+
+# "remote: Counting objects:  45% (450/1000)", "Receiving objects: 100% (1000/1000), 12.00 MiB | 2.40 MiB/s, done."
+PROGRESS_PATTERN = re.compile(
+    r'^(?:remote: )?(?P<phase>[A-Z][a-z]+(?: (?:[a-z]+|LFS))*): +'
+    r'(?:(?P<percent>\d+)% \((?P<done>\d+)/(?P<total>\d+)\)|(?P<count>\d+))'
+    r'(?:, (?P<size>[\d.]+ (?:bytes|B|[KMGT]i?B))(?: \| (?P<rate>[\d.]+ (?:bytes|B|[KMGT]i?B))/s)?)?'
+)
+# git uses binary units, git-lfs decimal ones
+UNITS = {'bytes': 1, 'B': 1, 'KiB': 1024, 'MiB': 1024 ** 2, 'GiB': 1024 ** 3, 'TiB': 1024 ** 4,
+         'KB': 1000, 'MB': 1000 ** 2, 'GB': 1000 ** 3, 'TB': 1000 ** 4}
+
+# Phases that move the data itself; the fraction of a transfer follows them
+TRANSFER_PHASES = ('Receiving objects', 'Writing objects', 'Downloading LFS objects', 'Uploading LFS objects')
+
+# Operations that send data to the destination; the others download from the source
+UPLOAD_OPERATIONS = ('push', 'lfs-push')
+
+PHASE_NAMES = {
+    'Enumerating objects': 'Enumerando objetos',
+    'Counting objects': 'Contando objetos',
+    'Compressing objects': 'Comprimindo objetos',
+    'Receiving objects': 'Recebendo objetos',
+    'Resolving deltas': 'Resolvendo deltas',
+    'Writing objects': 'Enviando objetos',
+    'Downloading LFS objects': 'Baixando objetos LFS',
+    'Uploading LFS objects': 'Enviando objetos LFS',
+}
+# Credentials in URLs (https://<token>@host) and in http.extraheader values
+CREDENTIAL_PATTERNS = (
+    (re.compile(r'(://)[^/@\s]+@'), r'\1***@'),
+    (re.compile(r'(?i)(authorization:\s*(?:basic|bearer|token)?\s*)[^\s\'"]+'), r'\1***'),
+)
+
+OPERATION_NAMES = {'clone': 'Clone', 'fetch': 'Fetch', 'push': 'Push', 'lfs-fetch': 'Fetch LFS', 'lfs-push': 'Push LFS'}
+
+
+def git_subcommand(args):
+    """The git subcommand of ``args``, skipping global options such as ``-c key=value``."""
+    index = 0
+    while index < len(args) and args[index] in ('-c', '-C'):
+        index += 2
+    return args[index] if index < len(args) else None
+
+
+def redact(text):
+    """``text`` with the credentials git may echo (URLs, extra headers) masked."""
+    for pattern, replacement in CREDENTIAL_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def parse_size(text):
+    """'1.20 MiB' -> bytes."""
+    value, unit = text.split()
+    return int(float(value) * UNITS[unit])
+
+
+def format_size(size):
+    for unit in ('bytes', 'KiB', 'MiB', 'GiB'):
+        if size < 1024 or unit == 'GiB':
+            return f"{size:.0f} {unit}" if unit == 'bytes' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class TransferProgress:
+    """Latest state of one git clone/fetch/push, fed by its ``--progress`` lines."""
+
+    def __init__(self, repository, operation):
+        self.repository = repository
+        self.operation = operation
+        self.phase = None
+        self.percent = None
+        self.objects = 0
+        self.total_objects = None
+        self.transferred_objects = 0
+        self.bytes = 0
+        self.throughput = 0.0
+        self.done = False
+        self.started = time.monotonic()
+        self._transferred = False
+
+    def update(self, line):
+        """Apply one output line; returns False if it is not a progress line."""
+        match = PROGRESS_PATTERN.match(line)
+        if not match:
+            return False
+        phase = match.group('phase')
+        if self.phase in TRANSFER_PHASES and phase != self.phase:
+            self._transferred = True
+        self.phase = phase
+        if match.group('percent') is not None:
+            self.percent = int(match.group('percent'))
+            self.objects = int(match.group('done'))
+            self.total_objects = int(match.group('total'))
+        else:
+            self.percent = None
+            self.objects = int(match.group('count'))
+            self.total_objects = None
+        if match.group('size'):
+            self.bytes = parse_size(match.group('size'))
+        if match.group('rate'):
+            self.throughput = float(parse_size(match.group('rate')))
+        if phase in TRANSFER_PHASES:
+            self.transferred_objects = self.objects
+        return True
+
+    def finish(self):
+        self.done = True
+        if self.phase in TRANSFER_PHASES:
+            self._transferred = True
+        elapsed = time.monotonic() - self.started
+        if elapsed > 0 and self.bytes:
+            self.throughput = self.bytes / elapsed
+
+    @property
+    def fraction(self):
+        """Share of the pack transfer done, from 0.0 to 1.0."""
+        if self.done or self._transferred:
+            return 1.0
+        if self.phase in TRANSFER_PHASES and self.percent is not None:
+            return self.percent / 100
+        return 0.0
+
+    def snapshot(self):
+        """Plain copy for consumers on other threads (e.g. the GUI)."""
+        return {
+            'repository': self.repository,
+            'operation': self.operation,
+            'phase': self.phase,
+            'percent': self.percent,
+            'objects': self.objects,
+            'total_objects': self.total_objects,
+            'transferred_objects': self.transferred_objects,
+            'bytes': self.bytes,
+            'throughput': self.throughput,
+            'fraction': self.fraction,
+            'done': self.done,
+        }
+
+    def describe(self):
+        operation = OPERATION_NAMES.get(self.operation, self.operation)
+        if self.done:
+            elapsed = time.monotonic() - self.started
+            return (f"{operation} concluído: {self.repository}, {self.transferred_objects} objetos, "
+                    f"{format_size(self.bytes)} em {elapsed:.1f}s ({format_size(self.throughput)}/s)")
+        text = f"{operation} de {self.repository}: {PHASE_NAMES.get(self.phase, self.phase)}"
+        if self.percent is not None:
+            text += f" {self.percent}% ({self.objects}/{self.total_objects})"
+        if self.bytes:
+            text += f", {format_size(self.bytes)} a {format_size(self.throughput)}/s"
+        return text
+
+
+def run_git_streaming(args, progress, cwd=None, on_progress=None, logger=None):
+    """Run a git command reading its output while it runs.
+
+    Progress lines (``\\r``-separated) update ``progress``; ``on_progress``
+    receives a snapshot at most every ``CALLBACK_INTERVAL`` seconds and the
+    log gets a line every ``LOG_INTERVAL`` seconds. Output is read in fixed
+    chunks and only the last ``TAIL_LINES`` other lines are kept, so memory
+    does not grow with the size of the repository.
+
+    Raises ``subprocess.CalledProcessError`` (with those lines as ``stderr``)
+    when git fails; returns ``progress`` otherwise.
+    """
+    # Progress lines are only parseable in git's untranslated messages
+    env = dict(os.environ, LC_ALL='C')
+    tail = deque(maxlen=TAIL_LINES)
+    last_callback = last_log = time.monotonic()
+
+    def handle(raw):
+        nonlocal last_callback, last_log
+        line = raw.decode(errors='replace').strip()
+        if not line:
+            return
+        if not progress.update(line):
+            tail.append(line)
+            return
+        now = time.monotonic()
+        if on_progress is not None and now - last_callback >= CALLBACK_INTERVAL:
+            last_callback = now
+            on_progress(progress.snapshot())
+        if logger is not None and now - last_log >= LOG_INTERVAL:
+            last_log = now
+            logger.info(progress.describe())
+
+    process = subprocess.Popen(
+        ['git'] + args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        cwd=str(cwd) if cwd else None,
+        env=env
+    )
+    pending = b''
+    try:
+        while True:
+            chunk = process.stdout.read1(CHUNK_SIZE)
+            if not chunk:
+                break
+            *lines, pending = re.split(rb'[\r\n]', pending + chunk)
+            pending = pending[-MAX_LINE:]
+            for raw in lines:
+                handle(raw[:MAX_LINE])
+        handle(pending)
+        returncode = process.wait()
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        process.stdout.close()
+
+    progress.finish()
+    if on_progress is not None:
+        on_progress(progress.snapshot())
+    if returncode != 0:
+        # Only the subcommand: the arguments and the output may carry a token
+        raise subprocess.CalledProcessError(returncode, ['git', git_subcommand(args)], stderr=redact('\n'.join(tail)))
+    if logger is not None:
+        logger.info(progress.describe())
+    return progress
@@ -1,13 +1,35 @@
+import asyncio
 from github import Github, GithubException
+from .async_github import AsyncGithubClient, RemoteRepo
+from .inventory import RepositoryInventory, fetch_inventory
+from .repo_settings import apply_settings, diff_settings, resolve_sync_fields
 
 class GithubOperations:
-    def __init__(self, logger, error_logger):
+    def __init__(self, logger, error_logger, max_connections=8, sync_fields=None):
         self.logger = logger
         self.error_logger = error_logger
+        self.max_connections = max_connections
+        self.sync_fields = resolve_sync_fields(sync_fields)
         self._source_github = None
         self._dest_github = None
         self._source_user = None
         self._dest_user = None
+        self._source_api = None
+        self._dest_api = None
+        self._dest_login = None
+        self._dest_index = None
+        # Destination repositories created by get_or_create_dest_repos, by name
+        self.created_dest_repos = set()
+        self._source_api_limiter = None
+        self._dest_api_limiter = None
+
+    def set_api_limiters(self, source_limiter, dest_limiter):
+        """Bound the in-flight API calls of each account with adaptive limiters."""
+        self._source_api_limiter = source_limiter
+        self._dest_api_limiter = dest_limiter
+        for client, limiter in ((self._source_api, source_limiter), (self._dest_api, dest_limiter)):
+            if client is not None:
+                client.limiter = limiter
 
     def initialize_clients(self, source_token, dest_token):
         """Initialize GitHub clients with the provided tokens."""
@@ -15,6 +37,26 @@ class GithubOperations:
         self._dest_github = Github(dest_token)
         self._source_user = self._source_github.get_user()
         self._dest_user = self._dest_github.get_user()
+        self._source_api = AsyncGithubClient(source_token, max_connections=self.max_connections,
+                                             limiter=self._source_api_limiter)
+        self._dest_api = AsyncGithubClient(dest_token, max_connections=self.max_connections,
+                                           limiter=self._dest_api_limiter)
+        self._dest_login = None
+        self._dest_index = None
+
+    def close(self):
+        """Release the connection pools of the async API clients."""
+        for client in (self._source_api, self._dest_api):
+            if client is not None:
+                client.close()
+        self._source_api = None
+        self._dest_api = None
+
+    async def _get_dest_login(self):
+        if self._dest_login is None:
+            user, _ = await self._dest_api.get_user()
+            self._dest_login = user['login']
+        return self._dest_login
 
     def get_source_repos(self):
         """Get list of repositories from source account."""
@@ -22,15 +64,75 @@ class GithubOperations:
             raise ValueError("Source GitHub client not initialized")
         return list(self._source_user.get_repos())
 
+    def list_source_repos(self):
+        """List source repositories through the async client, fetching pages concurrently."""
+        if self._source_api is None:
+            raise ValueError("Source GitHub client not initialized")
+        return self._source_api.run(self._source_api.list_user_repos())
+
+    def get_source_inventory(self):
+        """Take the source inventory in bulk (GraphQL, 100 repos per request).
+
+        Falls back to the concurrent REST listing if GraphQL is unavailable.
+        """
+        if self._source_api is None:
+            raise ValueError("Source GitHub client not initialized")
+        try:
+            inventory = self._source_api.run(fetch_inventory(self._source_api))
+        except GithubException as e:
+            self.logger.error(f"Inventário GraphQL indisponível, usando a listagem REST: {str(e)}")
+            inventory = RepositoryInventory(self.list_source_repos(), source="rest")
+        self.logger.info(f"Inventário da origem: {len(inventory)} repositórios ({inventory.source})")
+        return inventory
+
+    def refresh_source_repo(self, source_repo):
+        """Re-read one source repository (one API call) when the inventory is too old to trust.
+
+        Raises GithubException(404) if the repository was deleted or is no
+        longer accessible. Fields only the inventory provides are kept, except
+        ``is_empty``, which the REST payload cannot confirm and becomes unknown.
+        """
+        if self._source_api is None:
+            raise ValueError("Source GitHub client not initialized")
+        owner, name = source_repo.full_name.split('/', 1)
+        fresh = self._source_api.run(self._source_api.get_repo(owner, name))
+        previous = getattr(source_repo, 'raw_data', {})
+        return RemoteRepo({**previous, **fresh.raw_data, 'is_empty': None}, self._source_api)
+
+    def load_dest_index(self):
+        """List the destination account's repositories once into an index keyed by name.
+
+        Existence checks then come from the index instead of one lookup per
+        repository; repositories created later are added to it.
+        """
+        if self._dest_api is None:
+            raise ValueError("Destination GitHub client not initialized")
+        repos = self._dest_api.run(self._dest_api.list_user_repos(affiliation='owner'))
+        # GitHub repository names are case-insensitive
+        self._dest_index = {repo.name.lower(): repo for repo in repos}
+        self.logger.info(f"Índice do destino: {len(self._dest_index)} repositórios")
+        return self._dest_index
+
     def get_or_create_dest_repo(self, source_repo):
         """Get or create a repository in the destination account."""
         if not self._dest_user:
             raise ValueError("Destination GitHub client not initialized")
 
+        if self._dest_api is not None:
+            dest_repo, created = self._dest_api.run(self._get_or_create_dest_repo_async(source_repo))
+            if created:
+                self.logger.info(f"Criado novo repositório destino: {source_repo.name}")
+            else:
+                self.logger.info(f"Repositório destino já existe: {source_repo.name}")
+            return dest_repo
+
         try:
             dest_repo = self._dest_github.get_user().get_repo(source_repo.name)
             self.logger.info(f"Repositório destino já existe: {source_repo.name}")
-        except GithubException:
+        except GithubException as e:
+            # Only "not found" means the repository has to be created
+            if e.status != 404:
+                raise
             dest_repo = self._dest_user.create_repo(
                 source_repo.name,
                 description=source_repo.description or "",
@@ -40,16 +142,87 @@ class GithubOperations:
 
         return dest_repo
 
+    def get_or_create_dest_repos(self, source_repos):
+        """Create the missing destination repositories in one concurrent batch.
+
+        Loads the destination index first if needed, so only repositories
+        absent from it cost an API call. Returns a dict mapping repository
+        name to the destination repository, or to the exception raised for it;
+        the names of the created ones are added to ``created_dest_repos``.
+        """
+        if self._dest_api is None:
+            raise ValueError("Destination GitHub client not initialized")
+        if self._dest_index is None:
+            self.load_dest_index()
+
+        async def provision_all():
+            await self._get_dest_login()
+            return await asyncio.gather(
+                *[self._get_or_create_dest_repo_async(repo) for repo in source_repos],
+                return_exceptions=True
+            )
+
+        results = {}
+        created_count = failed_count = 0
+        for source_repo, outcome in zip(source_repos, self._dest_api.run(provision_all())):
+            if isinstance(outcome, Exception):
+                self.error_logger.log_error(outcome, f"Erro ao obter/criar repositório destino {source_repo.name}")
+                results[source_repo.name] = outcome
+                failed_count += 1
+                continue
+            dest_repo, created = outcome
+            if created:
+                created_count += 1
+                self.created_dest_repos.add(source_repo.name)
+                self.logger.info(f"Criado novo repositório destino: {source_repo.name}")
+            results[source_repo.name] = dest_repo
+        self.logger.info(f"Provisionamento do destino: {created_count} criados, "
+                         f"{len(results) - created_count - failed_count} já existentes, {failed_count} com erro")
+        return results
+
+    async def _get_or_create_dest_repo_async(self, source_repo):
+        fields = {'description': source_repo.description or "", 'private': source_repo.private}
+        if self._dest_index is None:
+            return await self._dest_api.get_or_create_repo(await self._get_dest_login(), source_repo.name, **fields)
+
+        key = source_repo.name.lower()
+        dest_repo = self._dest_index.get(key)
+        if dest_repo is not None:
+            return dest_repo, False
+        try:
+            dest_repo = await self._dest_api.create_repo(source_repo.name, **fields)
+            created = True
+        except GithubException as e:
+            # 422: the name is already taken, i.e. the index is out of date
+            if e.status != 422:
+                raise
+            dest_repo = await self._dest_api.get_repo(await self._get_dest_login(), source_repo.name)
+            created = False
+        self._dest_index[key] = dest_repo
+        return dest_repo, created
+
     def sync_repo_settings(self, source_repo, dest_repo):
-        """Synchronize repository settings between source and destination."""
+        """Synchronize repository settings between source and destination.
+
+        Only the fields in ``sync_fields`` whose values differ are sent, so an
+        unchanged repository costs no API call.
+        """
         try:
-            dest_repo.edit(
-                description=source_repo.description,
-                private=source_repo.private,
-                has_issues=source_repo.has_issues,
-                has_wiki=source_repo.has_wiki
-            )
+            changes = diff_settings(source_repo, dest_repo, self.sync_fields)
+            if not changes:
+                self.logger.info(f"Configurações já sincronizadas: {source_repo.name}")
+                return
+            apply_settings(dest_repo, changes)
             self.logger.info(f"Configurações sincronizadas para: {source_repo.name}")
         except GithubException as e:
             self.error_logger.log_error(e, f"Erro ao sincronizar configurações do repositório {source_repo.name}")
-            raise
\ No newline at end of file
+            raise
+
+    def unarchive_for_push(self, dest_repo):
+        """An archived destination rejects pushes; unarchive it when archived state is synced.
+
+        ``sync_repo_settings`` archives it again afterwards if the source is archived.
+        """
+        if 'archived' in self.sync_fields and getattr(dest_repo, 'archived', None) is True:
+            dest_repo.edit(archived=False)
+            self.logger.info(f"Repositório destino desarquivado para o push: {dest_repo.name}")
@@ -0,0 +1,282 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from github.Requester import Requester, HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass
+
+DEFAULT_CACHE_DIR = '.http_cache'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Headers describing the transfer of the original body, not the body itself
+_TRANSFER_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+class HttpCache:
+    """Disk cache of GET responses revalidated with ETag/Last-Modified.
+
+    Entries are keyed by URL and a hash of the Authorization header, so two
+    tokens never share responses and no token is written to disk. Each entry
+    is a ``<key>.json`` metadata file plus a ``<key>.body`` file; the least
+    recently used entries are evicted once ``max_bytes`` is exceeded.
+
+    By default every use is revalidated (a 304 costs no rate limit). With
+    ``honor_max_age=True`` entries younger than their Cache-Control max-age
+    are returned without any request (a "hit").
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, logger=None, honor_max_age=False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self.honor_max_age = honor_max_age
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'stored': 0, 'evicted': 0}
+        self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(self.directory) if entry.is_file())
+
+    @staticmethod
+    def make_key(url, authorization):
+        identity = hashlib.sha256((authorization or '').encode()).hexdigest()
+        return hashlib.sha256(f"{identity} {url}".encode()).hexdigest()
+
+    def _paths(self, key):
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def lookup(self, key):
+        """Return (metadata, body) for a cached entry, or None."""
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        # Touch for LRU eviction
+        now = time.time()
+        try:
+            os.utime(meta_path, (now, now))
+        except OSError:
+            pass
+        return meta, body
+
+    def store(self, key, url, response):
+        """Save a 200 response that carries a validator (ETag or Last-Modified)."""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        headers = {name: value for name, value in response.headers.items()
+                   if name.lower() not in _TRANSFER_HEADERS}
+        meta = {'url': url, 'etag': etag, 'last_modified': last_modified,
+                'headers': headers, 'encoding': response.encoding, 'stored_at': time.time()}
+        meta_path, body_path = self._paths(key)
+        body = response.content
+        with self.lock:
+            previous = self._entry_size(meta_path, body_path)
+            tmp_body = body_path.with_suffix('.body.tmp')
+            tmp_meta = meta_path.with_suffix('.json.tmp')
+            tmp_body.write_bytes(body)
+            with open(tmp_meta, 'w') as f:
+                json.dump(meta, f)
+            tmp_body.replace(body_path)
+            tmp_meta.replace(meta_path)
+            self._total_bytes += self._entry_size(meta_path, body_path) - previous
+            self.stats['stored'] += 1
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def is_fresh(self, meta):
+        if not self.honor_max_age:
+            return False
+        cache_control = CaseInsensitiveDict(meta['headers']).get('Cache-Control', '')
+        match = _MAX_AGE_RE.search(cache_control)
+        return bool(match) and time.time() - meta.get('stored_at', 0) < int(match.group(1))
+
+    def record(self, outcome):
+        with self.lock:
+            self.stats[outcome] += 1
+
+    def log_stats(self, logger=None):
+        logger = logger or self.logger
+        if logger is None:
+            return
+        stats = dict(self.stats)
+        logger.info(
+            f"Cache HTTP: {stats['hits']} hits, {stats['not_modified']} respostas 304, {stats['misses']} misses, "
+            f"{stats['stored']} armazenadas, {stats['evicted']} removidas "
+            f"({self._total_bytes / 1e6:.1f} MB em {self.directory})"
+        )
+
+    def _entry_size(self, meta_path, body_path):
+        size = 0
+        for path in (meta_path, body_path):
+            try:
+                size += path.stat().st_size
+            except OSError:
+                pass
+        return size
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is at 90% of its budget."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                entries.append((entry.stat().st_mtime, entry.name[:-len('.json')]))
+        entries.sort()
+        target = self.max_bytes * 0.9
+        for _, key in entries:
+            if self._total_bytes <= target:
+                break
+            meta_path, body_path = self._paths(key)
+            size = self._entry_size(meta_path, body_path)
+            for path in (meta_path, body_path):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._total_bytes -= size
+            self.stats['evicted'] += 1
+
+
+class CachingAdapter(HTTPAdapter):
+    """HTTPAdapter that turns repeated GETs into conditional requests.
+
+    A 304 answer (which GitHub does not count against the rate limit) is
+    replaced by the cached body, so callers always see a normal 200.
+    """
+
+    def __init__(self, cache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET':
+            return super().send(request, **kwargs)
+
+        key = self.cache.make_key(request.url, request.headers.get('Authorization'))
+        cached = self.cache.lookup(key)
+        if cached is not None:
+            meta, body = cached
+            if self.cache.is_fresh(meta):
+                self.cache.record('hits')
+                return self._from_cache(request, None, meta, body)
+            if meta.get('etag'):
+                request.headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                request.headers['If-Modified-Since'] = meta['last_modified']
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and cached is not None:
+            self.cache.record('not_modified')
+            return self._from_cache(request, response, *cached)
+        if response.status_code == 200:
+            self.cache.record('misses')
+            self.cache.store(key, request.url, response)
+        return response
+
+    def _from_cache(self, request, not_modified, meta, body):
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response._content = body
+        response.encoding = meta.get('encoding')
+        headers = CaseInsensitiveDict(meta['headers'])
+        # Fresh rate-limit and validator headers come from the 304 answer
+        if not_modified is not None:
+            for name, value in not_modified.headers.items():
+                if name.lower() not in _TRANSFER_HEADERS:
+                    headers[name] = value
+            # Drain the empty 304 body so the connection goes back to the pool
+            not_modified.content
+            not_modified.close()
+        response.headers = headers
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+
+_active_cache = None
+_install_lock = threading.Lock()
+
+
+def install_cache(cache):
+    """Make ``cache`` the process-wide HTTP cache.
+
+    PyGithub clients, AsyncGithubClient sessions and ``cached_session()``
+    created afterwards go through it.
+    """
+    global _active_cache
+    with _install_lock:
+        _active_cache = cache
+        if cache is None:
+            Requester.resetConnectionClasses()
+        else:
+            Requester.injectConnectionClasses(HTTPRequestsConnectionClass, _CachingHTTPSConnectionClass)
+
+
+def get_cache():
+    return _active_cache
+
+
+def ensure_cache(directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, logger=None):
+    """Return the installed cache, installing one at ``directory`` if needed."""
+    with _install_lock:
+        cache = _active_cache
+    if cache is None:
+        cache = HttpCache(directory, max_bytes, logger)
+        install_cache(cache)
+    return cache
+
+
+def make_adapter(pool_size=10, **kwargs):
+    """HTTPAdapter for a new session: caching when a cache is installed."""
+    if _active_cache is not None:
+        return CachingAdapter(_active_cache, pool_connections=pool_size, pool_maxsize=pool_size, **kwargs)
+    return HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, **kwargs)
+
+
+def cached_session(pool_size=10, **kwargs):
+    """requests.Session whose GETs go through the installed cache."""
+    session = requests.Session()
+    adapter = make_adapter(pool_size, **kwargs)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+_shared_pygithub_session = None
+
+
+class _CachingHTTPSConnectionClass(HTTPSRequestsConnectionClass):
+    """PyGithub connection class that sends requests through the cache.
+
+    PyGithub stops reusing connections once custom classes are injected, so
+    every instance shares one pooled session instead of opening its own.
+    """
+
+    def __init__(self, *args, **kwargs):
+        global _shared_pygithub_session
+        super().__init__(*args, **kwargs)
+        self.session.close()
+        with _install_lock:
+            if _shared_pygithub_session is None or _shared_pygithub_session.cache is not _active_cache:
+                session = cached_session(self.pool_size, max_retries=self.retry)
+                session.auth = Requester.noopAuth
+                session.cache = _active_cache
+                _shared_pygithub_session = session
+            self.session = _shared_pygithub_session
+
+    def close(self):
+        # The shared session outlives individual PyGithub connections
+        pass
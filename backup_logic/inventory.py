@@ -0,0 +1,152 @@
+import time
+
+from github import GithubException
+from .async_github import AsyncGithubClient, GITHUB_API_URL, RemoteRepo
+
+# One request returns up to 100 repositories with everything the backup reads
+INVENTORY_QUERY = """
+query($cursor: String) {
+  viewer {
+    repositories(first: 100, after: $cursor,
+                 ownerAffiliations: [OWNER, COLLABORATOR, ORGANIZATION_MEMBER]) {
+      totalCount
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        nameWithOwner
+        owner { login }
+        url
+        description
+        homepageUrl
+        diskUsage
+        isPrivate
+        isArchived
+        isFork
+        isEmpty
+        pushedAt
+        hasIssuesEnabled
+        hasWikiEnabled
+        parent { nameWithOwner parent { nameWithOwner parent { nameWithOwner parent { nameWithOwner } } } }
+        defaultBranchRef { name target { oid } }
+        repositoryTopics(first: 20) { nodes { topic { name } } }
+      }
+    }
+  }
+}
+"""
+
+# Same repositories as INVENTORY_QUERY, counted without fetching any of them
+COUNT_QUERY = """
+query {
+  viewer {
+    repositories(ownerAffiliations: [OWNER, COLLABORATOR, ORGANIZATION_MEMBER]) {
+      totalCount
+    }
+  }
+}
+"""
+
+
+def _network_root(parent):
+    """Oldest ancestor in a chain of ``parent`` nodes (the REST "source" of a fork)."""
+    root = None
+    while parent:
+        root = parent.get('nameWithOwner')
+        parent = parent.get('parent')
+    return root
+
+
+def _node_to_rest(node):
+    """Map a GraphQL repository node to the field names of the REST API."""
+    default_branch = node.get('defaultBranchRef') or {}
+    parent = node.get('parent') or {}
+    topics = (node.get('repositoryTopics') or {}).get('nodes') or []
+    return {
+        'name': node['name'],
+        'full_name': node['nameWithOwner'],
+        'owner': {'login': (node.get('owner') or {}).get('login')},
+        'html_url': node['url'],
+        'clone_url': f"{node['url']}.git",
+        'description': node.get('description'),
+        'homepage': node.get('homepageUrl'),
+        'size': node.get('diskUsage') or 0,  # KB, like the REST "size" field
+        'private': node.get('isPrivate', False),
+        'archived': node.get('isArchived', False),
+        'fork': node.get('isFork', False),
+        'is_empty': node.get('isEmpty', False),
+        'pushed_at': node.get('pushedAt'),
+        'has_issues': node.get('hasIssuesEnabled', True),
+        'has_wiki': node.get('hasWikiEnabled', True),
+        'parent_full_name': parent.get('nameWithOwner'),
+        # Deepest ancestor the query reaches; ObjectPoolManager follows longer chains through the listing
+        'source_full_name': _network_root(parent),
+        'default_branch': default_branch.get('name'),
+        'head_oid': (default_branch.get('target') or {}).get('oid'),
+        'topics': [item['topic']['name'] for item in topics if item.get('topic')],
+    }
+
+
+class RepositoryInventory:
+    """In-memory listing of an account's repositories, taken once per run.
+
+    Every later stage reads repository metadata from here instead of making
+    its own API calls. Iterating yields the repositories in listing order.
+    """
+
+    def __init__(self, repos, source="graphql"):
+        self._repos = list(repos)
+        self._by_full_name = {repo.full_name: repo for repo in self._repos}
+        self.source = source
+        self.fetched_at = time.time()
+
+    def __iter__(self):
+        return iter(self._repos)
+
+    def __len__(self):
+        return len(self._repos)
+
+    def get(self, full_name):
+        return self._by_full_name.get(full_name)
+
+    @property
+    def age(self):
+        """Seconds since the inventory was fetched."""
+        return time.time() - self.fetched_at
+
+
+async def fetch_inventory(client):
+    """Fetch the viewer's repositories through GraphQL, 100 per request."""
+    repos = []
+    cursor = None
+    while True:
+        data = await client.graphql(INVENTORY_QUERY, {'cursor': cursor})
+        connection = data['viewer']['repositories']
+        repos.extend(RemoteRepo(_node_to_rest(node), client) for node in connection['nodes'] if node)
+        page_info = connection['pageInfo']
+        if not page_info['hasNextPage']:
+            break
+        cursor = page_info['endCursor']
+    return RepositoryInventory(repos, source="graphql")
+
+
+async def fetch_repository_count(client):
+    """Number of repositories the inventory would list, in a single request.
+
+    Falls back to the public_repos + total_private_repos counters of /user
+    (repositories owned by the user only) if GraphQL is unavailable.
+    """
+    try:
+        data = await client.graphql(COUNT_QUERY)
+        return data['viewer']['repositories']['totalCount']
+    except GithubException:
+        user, _ = await client.get_user()
+        return (user.get('public_repos') or 0) + (user.get('total_private_repos') or 0)
+
+
+def count_repositories(token, base_url=GITHUB_API_URL):
+    """Blocking wrapper of ``fetch_repository_count`` for a token."""
+    client = AsyncGithubClient(token, base_url=base_url, max_connections=1)
+    try:
+        return client.run(fetch_repository_count(client))
+    finally:
+        client.close()
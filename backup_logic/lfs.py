@@ -0,0 +1,96 @@
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from .git_progress import TransferProgress, run_git_streaming
+from .repository_operations import GitCommandError, add_token_to_url, classify_git_error
+
+# Content-addressed LFS store inside the backup directory, shared by every mirror
+LFS_STORAGE_DIR = '.lfs'
+DEFAULT_TRANSFERS = 8
+
+# Reported by git-lfs when the source server lacks some objects
+INCOMPLETE_FETCH = 'failed to fetch some objects'
+
+
+def lfs_available():
+    """True if the git-lfs extension is installed."""
+    return shutil.which('git-lfs') is not None
+
+
+class LfsMirror:
+    """Copies the Git LFS objects of the mirrors, which ``clone --mirror`` leaves out.
+
+    Every mirror points ``lfs.storage`` at ``<backup>/.lfs``, so objects are
+    stored once by their hash whatever the number of repositories (or forks)
+    referencing them, and ``git lfs fetch`` only downloads what the store
+    lacks. Uploads go through ``git lfs push``, whose batch API skips the
+    objects the destination already has. Both sides run ``transfers``
+    parallel transfers.
+    """
+
+    def __init__(self, backup_path, logger, transfers=DEFAULT_TRANSFERS, progress_callback=None):
+        self.storage = Path(backup_path).resolve() / LFS_STORAGE_DIR
+        self.logger = logger
+        self.transfers = max(1, int(transfers or DEFAULT_TRANSFERS))
+        self.progress_callback = progress_callback
+        self.available = lfs_available()
+
+    def uses_lfs(self, repo_path):
+        """True if the default branch tracks files with LFS (``filter=lfs`` in a .gitattributes)."""
+        process = subprocess.run(
+            ['git', 'grep', '-q', '-e', 'filter=lfs', 'HEAD', '--', ':(glob)**/.gitattributes'],
+            capture_output=True,
+            text=True,
+            cwd=str(repo_path)
+        )
+        # 1: no match, 128: empty repository or no HEAD
+        return process.returncode == 0
+
+    def configure(self, repo_path):
+        """Point the mirror at the shared store; the path is relative, like object pools."""
+        self.storage.mkdir(parents=True, exist_ok=True)
+        settings = {
+            'lfs.storage': os.path.relpath(self.storage, Path(repo_path).resolve()),
+            'lfs.concurrenttransfers': str(self.transfers),
+            # Objects missing on the source must not block the upload of the others
+            'lfs.allowincompletepush': 'true',
+        }
+        for key, value in settings.items():
+            self._git(['config', key, value], repo_path)
+
+    def fetch(self, repo_path):
+        """Download the LFS objects of every ref into the shared store; returns the bytes downloaded."""
+        self.configure(repo_path)
+        progress = TransferProgress(Path(repo_path).name, 'lfs-fetch')
+        try:
+            run_git_streaming(['lfs', 'fetch', '--all', 'origin'], progress, cwd=repo_path,
+                              on_progress=self.progress_callback, logger=self.logger)
+        except subprocess.CalledProcessError as e:
+            if INCOMPLETE_FETCH not in e.stderr:
+                error_msg = f"Erro ao baixar objetos LFS: {e.stderr}"
+                self.logger.error(error_msg)
+                raise GitCommandError(error_msg, classify_git_error(e.stderr))
+            self.logger.warning(f"Objetos LFS ausentes na origem para {Path(repo_path).name}: {e.stderr}")
+        return progress.bytes
+
+    def push(self, repo_path, clone_url, token):
+        """Upload the LFS objects the destination does not have yet; returns the bytes sent."""
+        self.configure(repo_path)
+        progress = TransferProgress(Path(repo_path).name, 'lfs-push')
+        try:
+            run_git_streaming(['lfs', 'push', '--all', add_token_to_url(clone_url, token)], progress, cwd=repo_path,
+                              on_progress=self.progress_callback, logger=self.logger)
+        except subprocess.CalledProcessError as e:
+            error_msg = f"Erro ao enviar objetos LFS: {e.stderr}"
+            self.logger.error(error_msg)
+            raise GitCommandError(error_msg, classify_git_error(e.stderr))
+        return progress.bytes
+
+    def _git(self, args, repo_path):
+        try:
+            subprocess.run(['git'] + args, check=True, capture_output=True, text=True, cwd=str(repo_path))
+        except subprocess.CalledProcessError as e:
+            error_msg = f"Erro ao configurar Git LFS ({args[0]}): {e.stderr}"
+            self.logger.error(error_msg)
+            raise GitCommandError(error_msg, classify_git_error(e.stderr))
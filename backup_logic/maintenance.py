@@ -0,0 +1,251 @@
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from .object_pool import POOL_DIR
+
+HISTORY_FILE = '.maintenance.json'
+HISTORY_LIMIT = 100  # Passes kept in the history file
+
+LOOSE_OBJECTS_THRESHOLD = 1000
+PACK_COUNT_THRESHOLD = 10
+PRUNE_EXPIRE = '2.weeks.ago'
+
+# Task -> git command, in the order they run
+TASK_COMMANDS = {
+    # -l leaves objects borrowed from an object pool (alternates) out of the mirror
+    'repack': ['repack', '-a', '-d', '-l', '-q'],
+    'prune': ['prune', f'--expire={PRUNE_EXPIRE}'],
+    'commit-graph': ['commit-graph', 'write', '--reachable'],
+    'multi-pack-index': ['multi-pack-index', 'write'],
+}
+# Object pools lend objects to other mirrors: nothing is ever dropped from them
+POOL_REPACK = ['repack', '-a', '-d', '-q', '--keep-unreachable']
+
+
+def read_stats(repo_path):
+    """Object statistics of a repository (``git count-objects -v``), sizes in bytes."""
+    process = subprocess.run(
+        ['git', 'count-objects', '-v'],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=str(repo_path)
+    )
+    stats = {}
+    for line in process.stdout.splitlines():
+        key, _, value = line.partition(':')
+        if value.strip().isdigit():
+            stats[key.strip()] = int(value)
+    return {
+        'loose': stats.get('count', 0),
+        'packs': stats.get('packs', 0),
+        'bytes': (stats.get('size', 0) + stats.get('size-pack', 0) + stats.get('size-garbage', 0)) * 1024,
+    }
+
+
+class MaintenanceScheduler:
+    """Keeps local mirrors compact so fetch and push negotiation stay fast.
+
+    Each pass measures every mirror and only works on those past a threshold:
+    too many loose objects or packs trigger a repack plus prune, and a missing
+    commit-graph or multi-pack-index is written. Mirrors run on ``workers``
+    threads of their own, with git at the lowest CPU/IO priority when
+    ``nice``/``ionice`` exist. No new mirror is started once ``time_budget``
+    seconds have passed or ``byte_budget`` bytes of objects were rewritten.
+
+    Every pass is recorded in ``<backup>/.maintenance.json`` with the disk
+    reclaimed and the change in history walk time (``git rev-list --all``)
+    of each mirror. Object pools (``.objects/<pool>``) gain a pack with every
+    absorbed fetch, so they are maintained too, but only repacked (keeping
+    unreachable objects) and indexed, never pruned: other mirrors borrow
+    their objects. With a ``disk_usage`` index, maintained mirrors are
+    re-measured in it.
+    """
+
+    def __init__(self, backup_path, logger, workers=1, time_budget=None, byte_budget=None,
+                 loose_threshold=LOOSE_OBJECTS_THRESHOLD, pack_threshold=PACK_COUNT_THRESHOLD, low_priority=True,
+                 disk_usage=None):
+        self.backup_path = Path(backup_path)
+        self.logger = logger
+        self.workers = max(1, int(workers or 1))
+        self.time_budget = time_budget
+        self.byte_budget = byte_budget
+        self.loose_threshold = loose_threshold
+        self.pack_threshold = pack_threshold
+        self.disk_usage = disk_usage
+        self.priority_prefix = self._priority_prefix() if low_priority else []
+        self._budget_lock = threading.Lock()
+        self._bytes_spent = 0
+        self._started = None
+
+    def find_mirrors(self):
+        """Mirrors and object pools of the backup directory."""
+        directories = [entry for entry in os.scandir(self.backup_path) if not entry.name.startswith('.')]
+        pool_root = self.backup_path / POOL_DIR
+        if pool_root.is_dir():
+            directories += list(os.scandir(pool_root))
+        mirrors = []
+        for entry in directories:
+            path = Path(entry.path)
+            if entry.is_dir() and (path / 'objects').is_dir() and (path / 'HEAD').exists():
+                mirrors.append(path)
+        return sorted(mirrors)
+
+    def is_pool(self, repo_path):
+        return Path(repo_path).parent == self.backup_path / POOL_DIR
+
+    def entry_name(self, repo_path):
+        """Name of a mirror or pool relative to the backup directory, as in the disk usage index."""
+        return Path(repo_path).relative_to(self.backup_path).as_posix()
+
+    def plan(self, repo_path, stats):
+        """Tasks a mirror needs, based on its measured statistics."""
+        tasks = []
+        info_dir = Path(repo_path) / 'objects' / 'info'
+        if stats['loose'] >= self.loose_threshold or stats['packs'] >= self.pack_threshold:
+            tasks += ['repack'] if self.is_pool(repo_path) else ['repack', 'prune']
+        has_graph = (info_dir / 'commit-graph').exists() or (info_dir / 'commit-graphs').exists()
+        if tasks or not has_graph:
+            tasks.append('commit-graph')
+        # After a full repack there is a single pack and nothing to index
+        midx = Path(repo_path) / 'objects' / 'pack' / 'multi-pack-index'
+        if 'repack' not in tasks and stats['packs'] > 1 and not midx.exists():
+            tasks.append('multi-pack-index')
+        return tasks
+
+    def run_pass(self, should_stop=None):
+        """Run one maintenance pass over the mirrors; returns the recorded summary."""
+        should_stop = should_stop or (lambda: False)
+        self._started = time.monotonic()
+        self._bytes_spent = 0
+        candidates = []
+        for repo_path in self.find_mirrors():
+            try:
+                stats = read_stats(repo_path)
+            except subprocess.CalledProcessError as e:
+                self.logger.error(f"Manutenção: não foi possível ler {repo_path}: {e.stderr}")
+                continue
+            tasks = self.plan(repo_path, stats)
+            if tasks:
+                candidates.append((repo_path, stats, tasks))
+        # The most fragmented mirrors first, in case the budget runs out
+        candidates.sort(key=lambda item: (item[1]['packs'], item[1]['loose']), reverse=True)
+        self.logger.info(f"Manutenção: {len(candidates)} mirrors precisam de manutenção")
+
+        results = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="maintenance") as pool:
+            futures = [pool.submit(self._maintain_if_budget, repo_path, stats, tasks, should_stop)
+                       for repo_path, stats, tasks in candidates]
+            for future in futures:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.logger.error(f"Erro na manutenção: {str(e)}")
+                    continue
+                if result is not None:
+                    results.append(result)
+
+        summary = {
+            'started_at': datetime.now().isoformat(),
+            'seconds': round(time.monotonic() - self._started, 2),
+            'mirrors': results,
+            'bytes_saved': sum(r['bytes_before'] - r['bytes_after'] for r in results),
+            'walk_seconds_saved': round(sum(r['walk_before'] - r['walk_after'] for r in results), 3),
+            'skipped_by_budget': len(candidates) - len(results),
+        }
+        self._record(summary)
+        self.logger.info(
+            f"Manutenção concluída: {len(results)} mirrors em {summary['seconds']:.0f}s, "
+            f"{summary['bytes_saved'] / 1e6:.1f} MB liberados, "
+            f"{summary['walk_seconds_saved']:.2f}s a menos para percorrer o histórico"
+        )
+        return summary
+
+    def _maintain_if_budget(self, repo_path, stats, tasks, should_stop):
+        with self._budget_lock:
+            over_time = self.time_budget is not None and time.monotonic() - self._started > self.time_budget
+            over_bytes = self.byte_budget is not None and self._bytes_spent >= self.byte_budget
+            if should_stop() or over_time or over_bytes:
+                return None
+            if 'repack' in tasks:
+                self._bytes_spent += stats['bytes']
+        return self.maintain(repo_path, stats, tasks)
+
+    def maintain(self, repo_path, stats, tasks):
+        """Run the tasks on one mirror and measure what they saved."""
+        started = time.monotonic()
+        walk_before = self._walk_time(repo_path)
+        for task in TASK_COMMANDS:
+            if task in tasks:
+                pool_repack = task == 'repack' and self.is_pool(repo_path)
+                self._git(POOL_REPACK if pool_repack else TASK_COMMANDS[task], repo_path)
+        after = read_stats(repo_path)
+        result = {
+            'repository': self.entry_name(repo_path),
+            'tasks': tasks,
+            'seconds': round(time.monotonic() - started, 2),
+            'loose_before': stats['loose'],
+            'packs_before': stats['packs'],
+            'loose_after': after['loose'],
+            'packs_after': after['packs'],
+            'bytes_before': stats['bytes'],
+            'bytes_after': after['bytes'],
+            'walk_before': walk_before,
+            'walk_after': self._walk_time(repo_path),
+        }
+        if self.disk_usage is not None:
+            self.disk_usage.update(result['repository'], repo_path)
+        self.logger.info(
+            f"Manutenção de {result['repository']} ({', '.join(tasks)}): "
+            f"{stats['packs']} -> {after['packs']} packs, {stats['loose']} -> {after['loose']} objetos soltos, "
+            f"{(stats['bytes'] - after['bytes']) / 1e6:.1f} MB liberados"
+        )
+        return result
+
+    def _walk_time(self, repo_path):
+        """Seconds to walk every commit: a proxy for negotiation cost."""
+        started = time.monotonic()
+        subprocess.run(['git', 'rev-list', '--all', '--count'], capture_output=True, text=True, cwd=str(repo_path))
+        return round(time.monotonic() - started, 4)
+
+    def _git(self, args, repo_path):
+        try:
+            subprocess.run(
+                self.priority_prefix + ['git'] + args,
+                check=True,
+                capture_output=True,
+                text=True,
+                cwd=str(repo_path)
+            )
+        except subprocess.CalledProcessError as e:
+            error_msg = f"Erro na manutenção de {repo_path} ({args[0]}): {e.stderr}"
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+
+    @staticmethod
+    def _priority_prefix():
+        prefix = []
+        if shutil.which('nice'):
+            prefix += ['nice', '-n', '19']
+        if shutil.which('ionice'):
+            prefix += ['ionice', '-c', '3']
+        return prefix
+
+    def _record(self, summary):
+        history_path = self.backup_path / HISTORY_FILE
+        try:
+            with open(history_path, 'r') as f:
+                history = json.load(f)
+        except (FileNotFoundError, ValueError):
+            history = []
+        history = (history + [summary])[-HISTORY_LIMIT:]
+        tmp_path = history_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(history, f, indent=2)
+        os.replace(tmp_path, history_path)
@@ -0,0 +1,152 @@
+import os
+import subprocess
+import threading
+from collections import Counter
+from pathlib import Path
+
+# Pools live inside the backup directory, next to the mirrors
+POOL_DIR = '.objects'
+
+
+def network_key(repo):
+    """Fork network of a repository: the root of its fork chain, itself if it is no fork.
+
+    The root is the inventory's ``source_full_name``; listings that only know
+    the immediate parent fall back to it.
+    """
+    return (getattr(repo, 'source_full_name', None) or getattr(repo, 'parent_full_name', None)
+            or repo.full_name)
+
+
+def network_keys(repos):
+    """Network of every repository by full name, following forks of forks through the listing.
+
+    A fork whose known root is itself a listed fork (e.g. the inventory
+    query stopped short of the real root) is keyed on that fork's root, so
+    the whole network shares one pool.
+    """
+    keys = {repo.full_name: network_key(repo) for repo in repos}
+    resolved = {}
+    for name in keys:
+        key, seen = keys[name], {name}
+        while key in keys and keys[key] != key and key not in seen:
+            seen.add(key)
+            key = keys[key]
+        resolved[name] = key
+    return resolved
+
+
+class ObjectPoolManager:
+    """Shared object stores for mirrors of the same fork network (git alternates).
+
+    Each network with at least two mirrored members gets a bare repository
+    under ``<backup>/.objects``. Members list it in ``objects/info/alternates``,
+    so fetches negotiate with the pool's objects and only store what it lacks.
+
+    The pool keeps a copy of every member's refs (``refs/members/<owner>/<name>/*``),
+    so everything a member borrows stays reachable in the pool: deleting a
+    mirror never breaks another one, and mirrors push normally because git
+    reads borrowed objects transparently. The pool itself must not be
+    deleted while mirrors still point to it.
+    """
+
+    def __init__(self, backup_path, logger, repos):
+        self.root = Path(backup_path) / POOL_DIR
+        self.logger = logger
+        self._keys = network_keys(repos)
+        sizes = Counter(self._keys.values())
+        self._shared = {key for key, count in sizes.items() if count > 1}
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def pool_for(self, repo):
+        """Path of the repository's pool (created if needed), or None if it shares with no one."""
+        key = self._keys.get(repo.full_name) or network_key(repo)
+        if key not in self._shared:
+            return None
+        pool_path = self.root / (key.replace('/', '__') + '.git')
+        with self._lock(pool_path):
+            if not pool_path.exists():
+                pool_path.parent.mkdir(parents=True, exist_ok=True)
+                self._git(['init', '--bare', '--quiet', str(pool_path)])
+                self.logger.info(f"Pool de objetos criado para a rede {key}: {pool_path}")
+        return pool_path
+
+    def absorb(self, pool_path, repo, repo_path, new_objects=True):
+        """Share a member's objects through the pool.
+
+        Links the mirror to the pool, copies its refs (and therefore its new
+        objects) into the pool and repacks the mirror without the objects
+        the pool now holds. Nothing is repacked if the mirror was already
+        linked and fetched nothing new.
+        """
+        with self._lock(pool_path):
+            linked = self.link(pool_path, repo_path)
+            if not (linked or new_objects):
+                return
+            self._git(['fetch', '--quiet', '--no-write-fetch-head', str(Path(repo_path).resolve()),
+                       f'+refs/*:refs/members/{repo.full_name}/*'], cwd=pool_path)
+        # -l leaves out objects reachable through the alternates
+        self._git(['repack', '-a', '-d', '-l', '-q'], cwd=repo_path)
+        self._drop_borrowed_loose_objects(pool_path, repo_path)
+        self.logger.info(f"Objetos de {repo.full_name} compartilhados pelo pool {pool_path.name}")
+
+    def link(self, pool_path, repo_path):
+        """Point the mirror's alternates at the pool; True if the file changed.
+
+        The path is relative, so the backup directory can be moved as a whole.
+        """
+        objects_dir = Path(repo_path) / 'objects'
+        alternates = objects_dir / 'info' / 'alternates'
+        target = os.path.relpath(Path(pool_path).resolve() / 'objects', objects_dir.resolve())
+        try:
+            if alternates.read_text().strip() == target:
+                return False
+        except FileNotFoundError:
+            pass
+        alternates.parent.mkdir(parents=True, exist_ok=True)
+        alternates.write_text(target + '\n')
+        return True
+
+    def _drop_borrowed_loose_objects(self, pool_path, repo_path):
+        """Delete loose objects of the mirror that the pool also has.
+
+        ``repack -d`` only prunes loose objects present in local packs; small
+        fetches arrive as loose objects and would otherwise stay duplicated.
+        """
+        loose = {}
+        for fanout in os.scandir(Path(repo_path) / 'objects'):
+            if len(fanout.name) == 2 and fanout.is_dir():
+                for entry in os.scandir(fanout.path):
+                    loose[fanout.name + entry.name] = entry.path
+        if not loose:
+            return
+        process = subprocess.run(
+            ['git', 'cat-file', '--batch-check=%(objectname)'],
+            input='\n'.join(loose) + '\n',
+            capture_output=True,
+            text=True,
+            cwd=str(pool_path)
+        )
+        # Objects the pool lacks are printed as "<sha> missing"
+        for line in process.stdout.splitlines():
+            if line in loose:
+                os.remove(loose[line])
+
+    def _lock(self, pool_path):
+        with self._locks_lock:
+            return self._locks.setdefault(str(pool_path), threading.Lock())
+
+    def _git(self, args, cwd=None):
+        try:
+            subprocess.run(
+                ['git'] + args,
+                check=True,
+                capture_output=True,
+                text=True,
+                cwd=str(cwd) if cwd else None
+            )
+        except subprocess.CalledProcessError as e:
+            error_msg = f"Erro no pool de objetos ({' '.join(args[:1])}): {e.stderr}"
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
@@ -0,0 +1,101 @@
+import queue
+import threading
+
+_STOP = object()  # Sentinel telling a stage worker there is no more input
+
+
+class PipelineStage:
+    """A named step of the pipeline with its own worker count and input queue.
+
+    The input queue is bounded, so a slow stage blocks the stage feeding it
+    (backpressure) instead of letting finished work pile up.
+    """
+
+    def __init__(self, name, handler, workers=1, queue_size=None):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, int(workers or 1))
+        self.queue_size = max(1, int(queue_size or self.workers))
+
+
+class StagedPipeline:
+    """Runs items through a sequence of stages connected by bounded queues.
+
+    Each handler receives the item, does its work and returns normally to pass
+    the item to the next stage. An exception drops the item from the pipeline
+    and is reported through ``on_error(stage_name, item, exception)``. Items
+    that leave the last stage are reported through ``on_complete(item)``.
+    """
+
+    def __init__(self, stages, logger, should_stop=None):
+        if not stages:
+            raise ValueError("Pipeline precisa de pelo menos um estágio")
+        self.stages = stages
+        self.logger = logger
+        self.should_stop = should_stop or (lambda: False)
+
+    def run(self, items, on_complete=None, on_error=None):
+        """Feed items into the first stage and block until every stage drains."""
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+        threads = []
+
+        def finish_worker(index):
+            with remaining_lock:
+                remaining[index] -= 1
+                last_worker = remaining[index] == 0
+            # The last worker of a stage closes the input of the next one
+            if last_worker and index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].workers):
+                    queues[index + 1].put(_STOP)
+
+        def worker(index):
+            stage = self.stages[index]
+            try:
+                while True:
+                    item = queues[index].get()
+                    if item is _STOP:
+                        return
+                    try:
+                        stage.handler(item)
+                    except Exception as e:
+                        self._notify(on_error, stage.name, item, e)
+                        continue
+                    if index + 1 < len(self.stages):
+                        queues[index + 1].put(item)
+                    else:
+                        self._notify(on_complete, item)
+            finally:
+                finish_worker(index)
+
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=worker,
+                    args=(index,),
+                    name=f"pipeline-{stage.name}-{n + 1}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for item in items:
+                if self.should_stop():
+                    self.logger.info("Interrompendo a entrada de novos repositórios no pipeline")
+                    break
+                queues[0].put(item)
+        finally:
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_STOP)
+            for thread in threads:
+                thread.join()
+
+    def _notify(self, callback, *args):
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            self.logger.error(f"Erro no callback do pipeline: {str(e)}")
@@ -0,0 +1,96 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+
+class ProgressJournal:
+    """Append-only log of progress changes, one JSON record per line.
+
+    ``append()`` only queues a record and returns its sequence number; it is
+    cheap enough to call while holding the caller's own lock, which keeps
+    records in the order the changes were made. ``wait()`` makes a record
+    durable with group commit: the first waiting thread writes every queued
+    record with a single ``fsync`` while the others wait for it, so many
+    workers finishing at once cost one disk flush instead of one each.
+
+    ``reset()`` empties the file once its records are in a snapshot.
+    """
+
+    def __init__(self, journal_file, fsync=True):
+        self.journal_file = Path(journal_file)
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+        self._pending = []
+        self._last = 0      # Sequence number of the last queued record
+        self._durable = 0   # Every record up to this one is on disk
+        self._writing = False
+        self.records = 0    # Records in the file since the last reset
+
+    def replay(self):
+        """Records in the file, oldest first; a torn last line (crash while writing) ends the replay."""
+        try:
+            with open(self.journal_file, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        return
+                    self.records += 1
+                    yield record
+        except FileNotFoundError:
+            return
+
+    def append(self, record):
+        """Queue one record; returns the sequence number to ``wait()`` on."""
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._pending.append(line)
+            self._last += 1
+            return self._last
+
+    def wait(self, seq=None):
+        """Block until record ``seq`` (by default every queued record) is on disk."""
+        with self._lock:
+            seq = self._last if seq is None else seq
+            while self._durable < seq:
+                if self._writing:
+                    self._flushed.wait()
+                    continue
+                # This thread commits the whole group queued so far
+                self._writing = True
+                batch, self._pending = self._pending, []
+                last = self._last
+                self._lock.release()
+                try:
+                    self._write(batch)
+                except BaseException:
+                    self._lock.acquire()
+                    self._pending = batch + self._pending
+                    self._writing = False
+                    self._flushed.notify_all()
+                    raise
+                self._lock.acquire()
+                self.records += len(batch)
+                self._durable = last
+                self._writing = False
+                self._flushed.notify_all()
+
+    def reset(self):
+        """Empty the journal; the caller has written a snapshot holding every record."""
+        self.wait()
+        with self._lock:
+            with open(self.journal_file, 'w') as f:
+                self._sync(f)
+            self.records = 0
+
+    def _write(self, lines):
+        with open(self.journal_file, 'a') as f:
+            f.write(''.join(lines))
+            self._sync(f)
+
+    def _sync(self, f):
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
@@ -2,9 +2,11 @@ import json
 import os
 import threading
 import time
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, Optional
-from threading import Lock, Event
+from threading import RLock, Event
+from .progress_journal import ProgressJournal
 
 class ProgressState:
     RUNNING = "running"
@@ -13,10 +15,24 @@ class ProgressState:
     ERROR = "error"
 
 class ProgressManager:
+    """Progress of every repository, persisted as a snapshot plus a journal.
+
+    ``progress.json`` is a snapshot of ``current_progress``; each change
+    after it is one record appended to ``progress.journal`` (see
+    ``progress_journal.ProgressJournal``), so saving a repository costs one
+    small write instead of rewriting the whole file. The journal is folded
+    into a new snapshot every ``COMPACT_EVERY`` records and by ``close()``;
+    loading replays it over the snapshot.
+    """
+
+    COMPACT_EVERY = 500
+
     def __init__(self, progress_file='progress.json'):
         self.progress_file = Path(progress_file)
+        # Written by older versions; only read as a fallback
         self.backup_file = self.progress_file.with_suffix('.json.bak')
-        self.lock = Lock()
+        self.journal = ProgressJournal(self.progress_file.with_suffix('.journal'))
+        self.lock = RLock()  # save_progress is called while the lock is held
         self.pause_event = Event()
         self.current_progress: Dict = {}
         self.state = ProgressState.RUNNING
@@ -28,6 +44,8 @@ class ProgressManager:
         try:
             with open(temp_file, 'w') as f:
                 json.dump(data, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
             temp_file.replace(file_path)
         except Exception:
             if temp_file.exists():
@@ -54,28 +72,129 @@ class ProgressManager:
                 self.current_progress = {}
         except Exception:
             self.current_progress = {}
+        # Changes made after the snapshot
+        for record in self.journal.replay():
+            self._apply(record)
+
+    def _apply(self, record: Dict) -> None:
+        if 'set' in record:
+            self.current_progress[record['set']] = record['value']
+        elif 'del' in record:
+            self.current_progress.pop(record['del'], None)
+        elif 'clear' in record:
+            self.current_progress.clear()
+
+    def _queue(self, key: str, value) -> int:
+        """Change one entry and queue its journal record; call with the lock held.
+
+        Queuing under the lock keeps the journal in the order of the changes;
+        ``_commit()`` is called after releasing it, so threads finishing at
+        the same time share a single disk flush.
+        """
+        self.current_progress[key] = value
+        return self.journal.append({'set': key, 'value': value})
+
+    def _queue_removal(self, key: str) -> int:
+        """Remove one entry and queue its journal record; call with the lock held."""
+        self.current_progress.pop(key, None)
+        return self.journal.append({'del': key})
+
+    def _set(self, key: str, value) -> None:
+        """Change one entry and persist it through the journal."""
+        with self.lock:
+            seq = self._queue(key, value)
+        self._commit(seq)
+
+    def _commit(self, seq: int) -> None:
+        try:
+            self.journal.wait(seq)
+        except Exception as e:
+            raise Exception(f"Erro ao salvar progresso: {str(e)}")
+        if self.journal.records >= self.COMPACT_EVERY:
+            with self.lock:
+                # Another thread may have compacted in the meantime
+                if self.journal.records >= self.COMPACT_EVERY:
+                    self.save_progress()
 
     def save_progress(self) -> None:
-        """Save progress to file with thread safety and backup."""
+        """Write a snapshot of the whole progress and empty the journal."""
         with self.lock:
             try:
-                # First backup existing file if it exists
-                if self.progress_file.exists():
-                    self._atomic_write(self.backup_file, self.current_progress)
-                
-                # Then write new progress
+                # Records queued by other threads are part of current_progress already
+                self.journal.wait()
                 self._atomic_write(self.progress_file, self.current_progress)
+                # A crash before this point only replays records the snapshot already has
+                self.journal.reset()
             except Exception as e:
                 raise Exception(f"Erro ao salvar progresso: {str(e)}")
 
+    def close(self) -> None:
+        """Compact the journal into progress.json on a clean shutdown."""
+        self.save_progress()
+
     def update_progress(self, repo_name: str, status: str) -> None:
         """Update progress for a repository with thread safety."""
+        self._set(repo_name, {
+            'status': status,
+            'timestamp': time.time()
+        })
+
+    def mark_completed(self, repo_name: str, completed_at: str, fingerprint: Optional[str] = None,
+                       pushed_at: Optional[str] = None, unchanged: bool = False, lfs_bytes: int = 0) -> None:
+        """Record a finished repository and persist it, safe to call from worker threads.
+
+        ``fingerprint`` identifies the mirrored refs; ``unchanged`` tells that
+        the run found nothing new, which is counted in ``unchanged_runs``.
+        ``lfs_bytes`` (LFS objects downloaded by this run) is added to the
+        repository's ``lfs_bytes`` total.
+        """
         with self.lock:
-            self.current_progress[repo_name] = {
-                'status': status,
-                'timestamp': time.time()
+            previous = self.current_progress.get(repo_name)
+            unchanged_runs = previous.get('unchanged_runs', 0) if isinstance(previous, dict) else 0
+            previous_lfs = previous.get('lfs_bytes', 0) if isinstance(previous, dict) else 0
+            seq = self._queue(repo_name, {
+                'status': 'completed',
+                'timestamp': time.time(),
+                'mirrored_at': completed_at,
+                'fingerprint': fingerprint,
+                'pushed_at': pushed_at,
+                'unchanged_runs': unchanged_runs + 1 if unchanged else 0,
+                'lfs_bytes': previous_lfs + lfs_bytes,
+            })
+        self._commit(seq)
+
+    def get_fingerprint(self, repo_name: str) -> Optional[Dict]:
+        """Fingerprint and pushed_at recorded by the last successful mirror, if any."""
+        with self.lock:
+            entry = self.current_progress.get(repo_name)
+        if isinstance(entry, dict) and entry.get('status') == 'completed' and entry.get('fingerprint'):
+            return {'fingerprint': entry['fingerprint'], 'pushed_at': entry.get('pushed_at')}
+        return None
+
+    def get_lfs_sizes(self) -> Dict[str, int]:
+        """LFS bytes downloaded so far per repository (only those that use LFS)."""
+        with self.lock:
+            return {
+                name: info['lfs_bytes']
+                for name, info in self.current_progress.items()
+                if isinstance(info, dict) and info.get('lfs_bytes')
             }
-            self.save_progress()
+
+    def get_last_mirror_time(self, repo_name: str) -> Optional[datetime]:
+        """When the repository was last mirrored successfully, or None if never."""
+        with self.lock:
+            entry = self.current_progress.get(repo_name)
+        try:
+            if isinstance(entry, str):
+                return datetime.fromisoformat(entry)
+            if isinstance(entry, dict) and entry.get('status') == 'completed':
+                if entry.get('mirrored_at'):
+                    return datetime.fromisoformat(entry['mirrored_at'])
+                if entry.get('timestamp'):
+                    return datetime.fromtimestamp(entry['timestamp'])
+        except (TypeError, ValueError):
+            pass
+        return None
 
     def get_progress(self, repo_name: str) -> Optional[Dict]:
         """Get progress for a repository with thread safety."""
@@ -85,8 +204,10 @@ class ProgressManager:
     def clear_progress(self) -> None:
         """Clear all progress with thread safety."""
         with self.lock:
-            self.current_progress = {}
-            self.save_progress()
+            self.current_progress.clear()
+            # Journaled like any change: replaying older records can never bring entries back
+            seq = self.journal.append({'clear': True})
+        self._commit(seq)
 
     def set_state(self, state: str) -> None:
         """Set the current state with thread safety."""
@@ -96,8 +217,8 @@ class ProgressManager:
                 self.pause_event.set()
             else:
                 self.pause_event.clear()
-            self.current_progress['_state'] = state
-            self.save_progress()
+            seq = self._queue('_state', state)
+        self._commit(seq)
 
     def get_state(self) -> str:
         """Get the current state with thread safety."""
@@ -141,10 +262,13 @@ class ProgressManager:
         max_age_seconds = max_age_days * 24 * 60 * 60
         
         with self.lock:
-            self.current_progress = {
-                name: info
-                for name, info in self.current_progress.items()
-                if name == '_state' or
-                (current_time - info.get('timestamp', 0)) < max_age_seconds
-            }
-            self.save_progress()
+            expired = [
+                name for name, info in self.current_progress.items()
+                if name != '_state' and
+                (current_time - info.get('timestamp', 0)) >= max_age_seconds
+            ]
+            if not expired:
+                return
+            for name in expired:
+                seq = self._queue_removal(name)
+        self._commit(seq)
@@ -0,0 +1,108 @@
+class SettingField:
+    """A repository setting copied from the source to the destination.
+
+    ``normalize`` maps equivalent values to one form (e.g. a missing
+    description and an empty one) before source and destination are compared.
+    Fields applied through ``edit()`` are batched into a single call; fields
+    with their own endpoint (such as topics) provide an ``apply(dest_repo, value)``.
+    """
+
+    def __init__(self, name, normalize=None, apply=None):
+        self.name = name
+        self.normalize = normalize or (lambda value: value)
+        self.apply = apply
+
+    def read(self, repo):
+        return self.normalize(getattr(repo, self.name, None))
+
+
+def _text(value):
+    return value or ""
+
+
+def _topics(value):
+    # Topic order is not significant
+    return sorted(value) if isinstance(value, (list, tuple)) else value
+
+
+def _replace_topics(dest_repo, topics):
+    dest_repo.replace_topics(list(topics))
+
+
+SETTING_FIELDS = {}
+
+
+def register_setting_field(field):
+    """Make a field available to ``sync_repo_settings`` by name."""
+    SETTING_FIELDS[field.name] = field
+    return field
+
+
+for _field in (
+    SettingField('description', normalize=_text),
+    SettingField('private'),
+    SettingField('has_issues'),
+    SettingField('has_wiki'),
+    SettingField('homepage', normalize=_text),
+    SettingField('default_branch'),
+    SettingField('topics', normalize=_topics, apply=_replace_topics),
+    SettingField('archived'),
+):
+    register_setting_field(_field)
+
+# Synchronized unless another selection is configured
+DEFAULT_SYNC_FIELDS = ('description', 'private', 'has_issues', 'has_wiki')
+
+
+def resolve_sync_fields(names):
+    """Validate a selection of field names; None selects the defaults."""
+    if names is None:
+        return DEFAULT_SYNC_FIELDS
+    names = tuple(names)
+    unknown = [name for name in names if name not in SETTING_FIELDS]
+    if unknown:
+        raise ValueError(f"Configurações desconhecidas: {', '.join(unknown)}")
+    return names
+
+
+def diff_settings(source_repo, dest_repo, field_names=DEFAULT_SYNC_FIELDS):
+    """Return {field: source value} for the fields that differ.
+
+    Values come from the objects already in memory (inventory and
+    destination index), so computing the diff costs no API call. Fields the
+    source does not report (None) are left untouched.
+    """
+    changes = {}
+    for name in field_names:
+        field = SETTING_FIELDS[name]
+        value = field.read(source_repo)
+        if value is None:
+            continue
+        if value != field.read(dest_repo):
+            changes[name] = value
+    return changes
+
+
+def apply_settings(dest_repo, changes):
+    """Send the changed fields: one ``edit()`` plus one call per special field.
+
+    An archived repository rejects every other change, so unarchiving is
+    sent first and archiving last.
+    """
+    changes = dict(changes)
+    archived = changes.pop('archived', None)
+    if archived is False:
+        dest_repo.edit(archived=False)
+
+    edits = {}
+    for name, value in changes.items():
+        field = SETTING_FIELDS[name]
+        if field.apply is not None:
+            field.apply(dest_repo, value)
+        else:
+            edits[name] = value
+    if edits:
+        dest_repo.edit(**edits)
+
+    if archived is True:
+        dest_repo.edit(archived=True)
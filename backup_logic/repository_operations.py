@@ -1,32 +1,132 @@
 import os
+import hashlib
+import re
 import subprocess
 import shutil
 from pathlib import Path
+from urllib.parse import urlparse, urlunparse
+from .git_progress import TransferProgress, redact, run_git_streaming
+
+def fingerprint_refs(ref_lines):
+    """Stable hash of "<sha> <ref>" lines, as printed by ls-remote/show-ref.
+
+    Only refs/* entries count; HEAD and peeled tag lines (^{}) are ignored so
+    the remote listing and the local mirror produce the same fingerprint.
+    """
+    refs = []
+    for line in ref_lines:
+        parts = line.split()
+        if len(parts) != 2:
+            continue
+        sha, ref = parts
+        if ref.startswith('refs/') and not ref.endswith('^{}'):
+            refs.append(f"{sha} {ref}")
+    return hashlib.sha256("\n".join(sorted(refs)).encode()).hexdigest()
+
+# Same refs as the former "git push --all" + "git push --tags"
+PUSHED_REF_NAMESPACES = ('refs/heads', 'refs/tags')
+
+def _parse_ref_lines(output):
+    """Parse "<sha> <ref>" lines into a dict, skipping peeled tag entries."""
+    refs = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and not parts[1].endswith('^{}'):
+            refs[parts[1]] = parts[0]
+    return refs
+
+# Re-clones are built here (inside the backup directory) and swapped in when complete
+STAGING_DIR = '.staging'
+
+# Kinds of git failures, from classify_git_error
+GIT_ERROR_AUTH = 'auth'
+GIT_ERROR_NETWORK = 'network'
+GIT_ERROR_CORRUPT = 'corrupt'
+GIT_ERROR_BROKEN = 'broken'
+GIT_ERROR_OTHER = 'other'
+
+# Regexes over git's lowercased messages, matched within one line; the first matching kind wins
+GIT_ERROR_PATTERNS = (
+    (GIT_ERROR_AUTH, (r'authentication failed', r'could not read username', r'repository not found',
+                      r'returned error: 40[134]', r'permission denied')),
+    (GIT_ERROR_NETWORK, (r'could not resolve host', r'failed to connect', r'timed out', r'connection reset',
+                         r'connection refused', r'early eof', r'rpc failed', r'remote end hung up',
+                         r'unexpected disconnect', r'transfer closed', r'returned error: 5\d\d', r'\bssl\b',
+                         r'gnutls')),
+    (GIT_ERROR_CORRUPT, (r'corrupt', r'bad object', r'missing (blob|tree|commit)', r'unable to read',
+                         r'inflate', r'object file .* is empty', r'packfile .* cannot be accessed',
+                         r'packfile .* does not match index', r'did not receive expected object',
+                         r'invalid sha1 pointer', r'broken link')),
+    (GIT_ERROR_BROKEN, (r'not a git repository', r'invalid git repository', r'bad config')),
+)
+
+_GIT_ERROR_REGEXES = tuple((kind, re.compile('|'.join(patterns))) for kind, patterns in GIT_ERROR_PATTERNS)
+
+def classify_git_error(message):
+    """Kind of a git failure (one of the GIT_ERROR_* constants) from its output."""
+    text = (message or '').lower()
+    for kind, regex in _GIT_ERROR_REGEXES:
+        if regex.search(text):
+            return kind
+    return GIT_ERROR_OTHER
+
+def add_token_to_url(repo_url, token):
+    """Add authentication token to repository URL."""
+    parsed_url = urlparse(repo_url)
+    if token:
+        return urlunparse(parsed_url._replace(netloc=f"{token}@{parsed_url.netloc}"))
+    return repo_url
+
+def staging_path(repo_path):
+    """Where a new clone of ``repo_path`` is built; it exists only while a clone is unfinished."""
+    repo_path = Path(repo_path)
+    return repo_path.parent / STAGING_DIR / repo_path.name
+
+class GitCommandError(Exception):
+    """A failed git command; ``kind`` tells how it failed (see classify_git_error)."""
+
+    def __init__(self, message, kind=GIT_ERROR_OTHER):
+        # git may echo the authenticated URL; never carry the token into logs
+        super().__init__(redact(message))
+        self.kind = kind
+
+class PushPlan:
+    """Difference between the local mirror refs and the destination refs.
+
+    Refs that exist only on the destination are left untouched, like the
+    previous ``push --all``/``push --tags`` did.
+    """
+
+    # Above this many refs the push uses wildcard refspecs instead of one
+    # argument per ref, keeping the command line short; git still sends only
+    # what differs.
+    MAX_EXPLICIT_REFSPECS = 200
+
+    def __init__(self, local_refs, remote_refs):
+        self.created = sorted(ref for ref in local_refs if ref not in remote_refs)
+        self.updated = sorted(ref for ref, sha in local_refs.items()
+                              if ref in remote_refs and remote_refs[ref] != sha)
+        self.unchanged = sorted(ref for ref, sha in local_refs.items() if remote_refs.get(ref) == sha)
+
+    @property
+    def refspecs(self):
+        changed = self.created + self.updated
+        if not changed:
+            return []
+        if len(changed) > self.MAX_EXPLICIT_REFSPECS:
+            return [f"{namespace}/*:{namespace}/*" for namespace in PUSHED_REF_NAMESPACES]
+        return [f"{ref}:{ref}" for ref in changed]
+
+    def summary(self):
+        return (f"{len(self.created)} refs criadas, {len(self.updated)} atualizadas, "
+                f"{len(self.unchanged)} inalteradas")
 
 class RepositoryOperations:
-    def __init__(self, logger, error_logger):
+    def __init__(self, logger, error_logger, progress_callback=None):
         self.logger = logger
         self.error_logger = error_logger
-
-    def clone_repository(self, repo_path, clone_url, token):
-        """Clone a repository to the specified path."""
-        self.logger.info(f"Repositório local não encontrado, clonando: {repo_path}")
-        try:
-            clone_process = subprocess.run(
-                ['git', 'clone', '--mirror', self._add_token_to_url(clone_url, token), str(repo_path)],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            self.logger.info(f"Clone Output: {clone_process.stdout}")
-            self.logger.error(f"Clone Error Output: {clone_process.stderr}")
-        except subprocess.CalledProcessError as e:
-            error_msg = e.stderr
-            if isinstance(error_msg, bytes):
-                error_msg = error_msg.decode()
-            error_msg = f"Erro ao clonar repositório: {error_msg}"
-            self.logger.error(error_msg)
-            raise Exception(error_msg)
+        # Receives TransferProgress snapshots of running clones/fetches/pushes
+        self.progress_callback = progress_callback
 
     def update_repository(self, repo_path, clone_url, token):
         """Update an existing repository."""
@@ -49,55 +149,155 @@ class RepositoryOperations:
                 text=True
             )
             if git_check_process.returncode != 0:
-                raise Exception("Invalid Git repository")
+                raise GitCommandError("Invalid Git repository", GIT_ERROR_BROKEN)
 
-            fetch_process = subprocess.run(
-                ['git', 'fetch', '--all'],
-                check=True,
-                capture_output=True,
-                text=True,
-                cwd=str(repo_path)
-            )
-            self.logger.info(f"Fetch Output: {fetch_process.stdout}")
-            self.logger.error(f"Fetch Error Output: {fetch_process.stderr}")
+            # --prune drops refs deleted at the source, so the local fingerprint can match ls-remote again
+            self._stream_git('fetch', repo_path, ['fetch', '--all', '--prune', '--progress'], cwd=repo_path)
         except subprocess.CalledProcessError as e:
             error_msg = e.stderr
             if isinstance(error_msg, bytes):
                 error_msg = error_msg.decode()
             error_msg = f"Erro ao fazer fetch do repositório: {error_msg}"
             self.logger.error(error_msg)
-            raise Exception(error_msg)
+            raise GitCommandError(error_msg, classify_git_error(error_msg))
+
+    def repair_repository(self, repo_path, clone_url, token):
+        """Repair a mirror with a damaged object store in place.
 
-    def push_repository(self, repo_path, clone_url, token):
-        """Push all changes to a repository."""
-        self.logger.info(f"Executando git push --all e --tags no diretório: {repo_path}")
+        Every object is downloaded again into the existing mirror
+        (``fetch --refetch``), a repack drops the loose copies that may be
+        corrupt, and connectivity is checked. The mirror is never removed;
+        raises GitCommandError if it is still broken.
+        """
+        self.logger.info(f"Reparando objetos do repositório: {repo_path}")
         try:
-            push_process_all = subprocess.run(
-                ['git', 'push', '--all', self._add_token_to_url(clone_url, token)],
+            self._git(['remote', 'set-url', 'origin', self._add_token_to_url(clone_url, token)], cwd=repo_path)
+            self._stream_git('fetch', repo_path, ['fetch', '--refetch', '--prune', '--progress', 'origin'], cwd=repo_path)
+            self._git(['repack', '-a', '-d', '-l', '-q'], cwd=repo_path)
+            self._git(['fsck', '--connectivity-only'], cwd=repo_path)
+        except subprocess.CalledProcessError as e:
+            error_msg = f"Erro ao reparar repositório: {e.stderr}"
+            self.logger.error(error_msg)
+            raise GitCommandError(error_msg, classify_git_error(e.stderr))
+        self.logger.info(f"Repositório reparado: {repo_path}")
+
+    def clone_via_staging(self, repo_path, clone_url, token, reference=None):
+        """Clone into a staging directory and swap the result into ``repo_path``.
+
+        The staging clone is an init + mirror fetch rather than ``git clone``,
+        so it survives an interruption: the next call fetches into what is
+        already there. The current mirror, if any, stays in place until the
+        new one is complete and connected, then the two are swapped by rename.
+        With ``reference`` (an object pool), objects the pool already has are
+        borrowed through git alternates instead of downloaded.
+        """
+        repo_path = Path(repo_path)
+        staging = staging_path(repo_path)
+        self._finish_interrupted_swap(repo_path)
+        url = self._add_token_to_url(clone_url, token)
+        try:
+            if staging.exists():
+                self.logger.info(f"Retomando clone interrompido: {staging}")
+            else:
+                self.logger.info(f"Clonando em diretório temporário: {staging}")
+                staging.parent.mkdir(parents=True, exist_ok=True)
+                self._git(['init', '--bare', '--quiet', str(staging)])
+                self._git(['config', 'remote.origin.fetch', '+refs/*:refs/*'], cwd=staging)
+                self._git(['config', 'remote.origin.mirror', 'true'], cwd=staging)
+                if reference is not None and Path(reference).exists():
+                    (staging / 'objects' / 'info' / 'alternates').write_text(
+                        str(Path(reference).resolve() / 'objects') + '\n')
+            self._git(['config', 'remote.origin.url', url], cwd=staging)
+            # Keep the download as one pack, as git clone does, instead of unpacking small ones
+            self._stream_git('clone', repo_path, ['-c', 'fetch.unpackLimit=1', 'fetch', '--progress', 'origin'],
+                             cwd=staging)
+            self._set_head(staging)
+            self._git(['fsck', '--connectivity-only'], cwd=staging)
+        except subprocess.CalledProcessError as e:
+            error_msg = f"Erro ao clonar repositório: {e.stderr}"
+            self.logger.error(error_msg)
+            raise GitCommandError(error_msg, classify_git_error(e.stderr))
+        self._swap_into_place(staging, repo_path)
+
+    def _set_head(self, repo_path):
+        """Point HEAD at the remote's default branch, as git clone --mirror does."""
+        output = self._git(['ls-remote', '--symref', 'origin', 'HEAD'], cwd=repo_path)
+        for line in output.splitlines():
+            if line.startswith('ref: ') and line.endswith('HEAD'):
+                self._git(['symbolic-ref', 'HEAD', line[len('ref: '):].split()[0]], cwd=repo_path)
+                return
+
+    def _swap_into_place(self, staging, repo_path):
+        previous = staging.with_name(staging.name + '.old')
+        if repo_path.exists():
+            os.rename(repo_path, previous)
+        os.rename(staging, repo_path)
+        if previous.exists():
+            self.remove_repository(previous)
+        self.logger.info(f"Novo clone instalado em: {repo_path}")
+
+    def _finish_interrupted_swap(self, repo_path):
+        """Clean up after a run stopped between the two renames of a swap."""
+        previous = staging_path(repo_path).with_name(repo_path.name + '.old')
+        if not previous.exists():
+            return
+        if repo_path.exists():
+            self.remove_repository(previous)
+        else:
+            # The new clone never reached its place: bring the old mirror back
+            os.rename(previous, repo_path)
+
+    def push_repository(self, repo_path, clone_url, token, before_push=None):
+        """Push the branches and tags that differ from the destination.
+
+        Local and destination refs are compared first; only missing or
+        different refs are pushed, in a single git push. Nothing is pushed
+        when the destination is already up to date. ``before_push`` is called
+        only when a push is actually needed. Returns the PushPlan.
+        """
+        plan = self.plan_push(repo_path, clone_url, token)
+        self.logger.info(f"Plano de push para {repo_path}: {plan.summary()}")
+        if not plan.refspecs:
+            self.logger.info(f"Destino já está atualizado, push ignorado: {repo_path}")
+            return plan
+        if before_push is not None:
+            before_push()
+
+        try:
+            self._stream_git('push', repo_path,
+                             ['push', '--progress', self._add_token_to_url(clone_url, token)] + plan.refspecs,
+                             cwd=repo_path)
+        except subprocess.CalledProcessError as e:
+            error_msg = e.stderr
+            if isinstance(error_msg, bytes):
+                error_msg = error_msg.decode()
+            error_msg = f"Erro ao fazer push do repositório: {error_msg}"
+            self.logger.error(error_msg)
+            raise GitCommandError(error_msg, classify_git_error(error_msg))
+        return plan
+
+    def plan_push(self, repo_path, clone_url, token):
+        """Compare local branches/tags with the destination and build a PushPlan."""
+        try:
+            local_process = subprocess.run(
+                ['git', 'for-each-ref', '--format=%(objectname) %(refname)', *PUSHED_REF_NAMESPACES],
                 check=True,
                 capture_output=True,
                 text=True,
                 cwd=str(repo_path)
             )
-            self.logger.info(f"Push All Output: {push_process_all.stdout}")
-            self.logger.error(f"Push All Error Output: {push_process_all.stderr}")
-
-            push_process_tags = subprocess.run(
-                ['git', 'push', '--tags', self._add_token_to_url(clone_url, token)],
+            remote_process = subprocess.run(
+                ['git', 'ls-remote', '--heads', '--tags', self._add_token_to_url(clone_url, token)],
                 check=True,
                 capture_output=True,
                 text=True,
                 cwd=str(repo_path)
             )
-            self.logger.info(f"Push Tags Output: {push_process_tags.stdout}")
-            self.logger.error(f"Push Tags Error Output: {push_process_tags.stderr}")
         except subprocess.CalledProcessError as e:
-            error_msg = e.stderr
-            if isinstance(error_msg, bytes):
-                error_msg = error_msg.decode()
-            error_msg = f"Erro ao fazer push do repositório: {error_msg}"
+            error_msg = f"Erro ao comparar refs com o destino: {e.stderr}"
             self.logger.error(error_msg)
             raise Exception(error_msg)
+        return PushPlan(_parse_ref_lines(local_process.stdout), _parse_ref_lines(remote_process.stdout))
 
     def remove_repository(self, repo_path):
         """Remove a repository directory."""
@@ -125,10 +325,57 @@ class RepositoryOperations:
             self.error_logger.log_error(e, f"Erro ao remover {repo_path}: {error_msg}")
             raise e
 
+    def get_remote_fingerprint(self, clone_url, token):
+        """Fingerprint of the refs of a remote repository (git ls-remote)."""
+        try:
+            process = subprocess.run(
+                ['git', 'ls-remote', self._add_token_to_url(clone_url, token)],
+                check=True,
+                capture_output=True,
+                text=True
+            )
+        except subprocess.CalledProcessError as e:
+            error_msg = f"Erro ao listar refs remotas: {e.stderr}"
+            self.logger.error(error_msg)
+            raise Exception(error_msg)
+        return fingerprint_refs(process.stdout.splitlines())
+
+    def get_local_fingerprint(self, repo_path):
+        """Fingerprint of the refs of a local mirror (git show-ref)."""
+        process = subprocess.run(
+            ['git', 'show-ref'],
+            capture_output=True,
+            text=True,
+            cwd=str(repo_path)
+        )
+        # show-ref exits with 1 when the repository has no refs (empty repo)
+        if process.returncode not in (0, 1):
+            raise Exception(f"Erro ao listar refs locais: {process.stderr}")
+        return fingerprint_refs(process.stdout.splitlines())
+
+    def get_pack_size(self, repo_path):
+        """Size in bytes of the packed objects of a mirror (0 if it does not exist)."""
+        pack_dir = Path(repo_path) / 'objects' / 'pack'
+        try:
+            return sum(entry.stat().st_size for entry in os.scandir(pack_dir) if entry.is_file())
+        except FileNotFoundError:
+            return 0
+
+    def _stream_git(self, operation, repo_path, args, cwd=None):
+        """Run a transfer command with its progress streamed to the log and ``progress_callback``."""
+        progress = TransferProgress(Path(repo_path).name, operation)
+        return run_git_streaming(args, progress, cwd=cwd, on_progress=self.progress_callback, logger=self.logger)
+
+    def _git(self, args, cwd=None):
+        """Run a short git command; raises CalledProcessError on failure."""
+        return subprocess.run(
+            ['git'] + args,
+            check=True,
+            capture_output=True,
+            text=True,
+            cwd=str(cwd) if cwd else None
+        ).stdout
+
     def _add_token_to_url(self, repo_url, token):
         """Add authentication token to repository URL."""
-        from urllib.parse import urlparse, urlunparse
-        parsed_url = urlparse(repo_url)
-        if token:
-            return urlunparse(parsed_url._replace(netloc=f"{token}@{parsed_url.netloc}"))
-        return repo_url
\ No newline at end of file
+        return add_token_to_url(repo_url, token)
\ No newline at end of file
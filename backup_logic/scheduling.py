@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+
+# Ordering policies for the repository queue
+ORDER_SOURCE = 'source'                      # As returned by the GitHub listing
+ORDER_SMALLEST_FIRST = 'smallest-first'      # Many small repos finish early
+ORDER_LARGEST_FIRST = 'largest-first'        # Long transfers start early when running in parallel
+ORDER_RECENTLY_PUSHED = 'recently-pushed'    # Hot repos first
+ORDER_OLDEST_MIRROR = 'oldest-mirror'        # Never/least recently mirrored first
+
+ORDER_POLICIES = (
+    ORDER_SOURCE,
+    ORDER_SMALLEST_FIRST,
+    ORDER_LARGEST_FIRST,
+    ORDER_RECENTLY_PUSHED,
+    ORDER_OLDEST_MIRROR,
+)
+
+_EPOCH = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def _as_utc(value):
+    """Normalize naive and aware datetimes so they can be compared."""
+    if value is None:
+        return _EPOCH
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _size(repo):
+    return getattr(repo, 'size', None) or 0
+
+
+def order_repositories(repos, policy, progress_manager=None):
+    """Return the repositories sorted according to an ordering policy.
+
+    Sorting is stable, so repositories that compare equal keep the listing
+    order. ``progress_manager`` is required by ``oldest-mirror``, which
+    reads the last successful mirror time of each repository.
+    """
+    policy = policy or ORDER_SOURCE
+    if policy not in ORDER_POLICIES:
+        raise ValueError(f"Política de ordenação desconhecida: {policy}")
+
+    repos = list(repos)
+    if policy == ORDER_SMALLEST_FIRST:
+        return sorted(repos, key=_size)
+    if policy == ORDER_LARGEST_FIRST:
+        return sorted(repos, key=_size, reverse=True)
+    if policy == ORDER_RECENTLY_PUSHED:
+        return sorted(repos, key=lambda repo: _as_utc(getattr(repo, 'pushed_at', None)), reverse=True)
+    if policy == ORDER_OLDEST_MIRROR:
+        if progress_manager is None:
+            raise ValueError("A política oldest-mirror precisa do ProgressManager")
+        return sorted(repos, key=lambda repo: _as_utc(progress_manager.get_last_mirror_time(repo.full_name)))
+    return repos
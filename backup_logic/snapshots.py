@@ -0,0 +1,179 @@
+import errno
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+
+SNAPSHOT_DIR = '.snapshots'
+MANIFEST_FILE = 'snapshot.json'
+NAME_FORMAT = '%Y%m%d-%H%M%S'
+
+# Snapshots kept per period: the newest one of each of the last N days, weeks and months
+DEFAULT_RETENTION = {'daily': 7, 'weekly': 4, 'monthly': 12}
+
+# Shared stores that are part of a snapshot besides the mirrors (object pools, cold bundles)
+SNAPSHOT_STORES = ('.objects', '.cold')
+
+# Period of each retention rule, as a key shared by the snapshots in that period
+RETENTION_PERIODS = {
+    'daily': lambda moment: moment.date(),
+    'weekly': lambda moment: moment.isocalendar()[:2],
+    'monthly': lambda moment: (moment.year, moment.month),
+}
+
+
+def parse_retention(text):
+    """'7,4,12' -> {'daily': 7, 'weekly': 4, 'monthly': 12}."""
+    try:
+        values = [int(value) for value in text.split(',')]
+    except ValueError:
+        values = []
+    if len(values) != len(DEFAULT_RETENTION) or any(value < 0 for value in values):
+        raise ValueError(f"Retenção inválida: {text} (esperado: diários,semanais,mensais)")
+    return dict(zip(DEFAULT_RETENTION, values))
+
+
+def select_kept(names, retention):
+    """Snapshot names kept by the retention schedule; the newest one is always kept."""
+    moments = sorted((datetime.strptime(name, NAME_FORMAT) for name in names), reverse=True)
+    kept = set(moments[:1])
+    for period, count in retention.items():
+        key = RETENTION_PERIODS[period]
+        seen = set()
+        for moment in moments:
+            if key(moment) in seen:
+                continue
+            if len(seen) >= count:
+                break
+            seen.add(key(moment))
+            kept.add(moment)
+    return {moment.strftime(NAME_FORMAT) for moment in kept}
+
+
+def is_immutable(relative):
+    """True for files git never changes in place once written.
+
+    Everything in the object store (packs, their indexes, loose objects) is
+    written to a temporary file and renamed, so a hardlink keeps the old
+    content safe. ``objects/info`` is the exception: ``alternates`` is
+    rewritten in place. Cold bundles are replaced, never modified.
+    """
+    parts = relative.parts
+    if parts[0] == '.cold':
+        return relative.suffix == '.bundle'
+    # <mirror>/objects/... or .objects/<pool>/objects/...
+    inside = parts[2:] if parts[0] == '.objects' else parts[1:]
+    return len(inside) > 2 and inside[0] == 'objects' and inside[1] != 'info'
+
+
+class SnapshotManager:
+    """Point-in-time copies of the backup directory in ``<backup>/.snapshots``.
+
+    A snapshot reproduces the layout of the mirrors, object pools and cold
+    bundles: immutable object files are hardlinked and only refs, config and
+    the other small mutable files are copied. It costs no data for objects
+    the live mirrors still have; what a later fetch, repack or force-push
+    drops from the mirror stays readable in the snapshot. Old snapshots are
+    pruned by a daily/weekly/monthly retention schedule.
+
+    Space grows with what changed, but time does not: every snapshot walks
+    the whole backup tree and makes one link (or small copy) per file, so
+    taking one is O(files in the backup) even when no mirror changed.
+    Mirrors with few packs (see ``maintenance``) keep that number low; the
+    manifest records the files linked and the seconds taken.
+
+    The LFS store is left out: its objects are never removed by the backup.
+    """
+
+    def __init__(self, backup_path, logger, retention=None):
+        self.backup_path = Path(backup_path)
+        self.root = self.backup_path / SNAPSHOT_DIR
+        self.logger = logger
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+
+    def snapshots(self):
+        """Names of the complete snapshots, oldest first."""
+        if not self.root.is_dir():
+            return []
+        return sorted(entry.name for entry in os.scandir(self.root)
+                      if entry.is_dir() and (Path(entry.path) / MANIFEST_FILE).exists())
+
+    def create(self):
+        """Take a snapshot of the backup directory; returns its manifest."""
+        started = time.monotonic()
+        name = datetime.now().strftime(NAME_FORMAT)
+        target = self.root / name
+        partial = self.root / (name + '.partial')
+        if target.exists():
+            raise Exception(f"Snapshot já existe: {name}")
+        if partial.exists():
+            shutil.rmtree(partial)
+        partial.mkdir(parents=True)
+
+        stats = {'linked_files': 0, 'copied_files': 0, 'copied_bytes': 0}
+        mirrors = 0
+        for entry in sorted(os.scandir(self.backup_path), key=lambda e: e.name):
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            if entry.name.startswith('.') and entry.name not in SNAPSHOT_STORES:
+                continue
+            self._snapshot_tree(Path(entry.path), partial / entry.name, stats)
+            if not entry.name.startswith('.'):
+                mirrors += 1
+
+        manifest = dict(stats, name=name, created_at=datetime.now().isoformat(), mirrors=mirrors,
+                        seconds=round(time.monotonic() - started, 2))
+        with open(partial / MANIFEST_FILE, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        # Only a complete snapshot gets its final name
+        os.rename(partial, target)
+        self.logger.info(
+            f"Snapshot {name} criado em {manifest['seconds']:.1f}s: {mirrors} mirrors, "
+            f"{stats['linked_files']} arquivos vinculados, {stats['copied_bytes'] / 1e6:.1f} MB copiados"
+        )
+        return manifest
+
+    def prune(self):
+        """Delete the snapshots the retention schedule does not keep; returns their names."""
+        names = self.snapshots()
+        kept = select_kept(names, self.retention)
+        removed = [name for name in names if name not in kept]
+        for name in removed:
+            shutil.rmtree(self.root / name)
+        # Leftovers of snapshots interrupted halfway
+        if self.root.is_dir():
+            for entry in os.scandir(self.root):
+                if entry.name.endswith('.partial'):
+                    shutil.rmtree(entry.path)
+        if removed:
+            self.logger.info(f"Snapshots removidos pela política de retenção: {', '.join(removed)}")
+        return removed
+
+    def _snapshot_tree(self, source, target, stats):
+        for root, dirs, files in os.walk(source):
+            relative_root = Path(root).relative_to(self.backup_path)
+            destination = target / Path(root).relative_to(source)
+            destination.mkdir(parents=True, exist_ok=True)
+            for file in files:
+                path = Path(root) / file
+                if os.path.islink(path):
+                    continue
+                if is_immutable(relative_root / file) and self._link(path, destination / file):
+                    stats['linked_files'] += 1
+                else:
+                    shutil.copy2(path, destination / file)
+                    stats['copied_files'] += 1
+                    stats['copied_bytes'] += path.stat().st_size
+
+    @staticmethod
+    def _link(source, target):
+        """Hardlink a file; False when the filesystem does not allow it (a copy is made instead)."""
+        try:
+            os.link(source, target)
+            return True
+        except OSError as e:
+            if e.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                return False
+            raise
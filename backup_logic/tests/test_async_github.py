@@ -0,0 +1,230 @@
+import json
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import Mock, patch
+from backup_logic.async_github import AsyncGithubClient
+from backup_logic.backup_execution import BackupExecutor
+from backup_logic.github_operations import GithubOperations
+from backup_logic.inventory import fetch_inventory, fetch_repository_count
+from backup_logic.http_cache import HttpCache, install_cache
+from backup_logic.token_validation import TokenValidationSession
+from github import GithubException
+
+class StubGithubHandler(BaseHTTPRequestHandler):
+    """Minimal GitHub REST stub: /user, paginated /user/repos, repo get/create/edit."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        state = self.server.state
+        state['auth'].add(self.headers.get('Authorization'))
+        path, _, query = self.path.partition('?')
+        state['requests'].append(path)
+        params = dict(p.split('=') for p in query.split('&') if p)
+        if path == '/user' and state.get('revoked'):
+            self._send(401, {'message': 'Bad credentials'})
+        elif path == '/user':
+            if self.headers.get('If-None-Match') == '"user-v1"':
+                state['not_modified'] += 1
+                self.send_response(304)
+                self.send_header('ETag', '"user-v1"')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self._send(200, {'login': 'dest-user'}, {'X-OAuth-Scopes': state['scopes'], 'ETag': '"user-v1"',
+                                                     'X-RateLimit-Remaining': '4999'})
+        elif path == '/user/orgs':
+            self._send(200, [])
+        elif path == '/rate_limit':
+            self._send(200, {'resources': {'core': {'remaining': 4999}}})
+        elif path == '/user/repos' and params.get('affiliation') == 'owner':
+            self._send(200, list(state['repos'].values()))
+        elif path == '/user/repos':
+            page = int(params.get('page', 1))
+            repos = [{'name': f'repo-{page}-{i}', 'full_name': f'src/repo-{page}-{i}'} for i in range(2)]
+            link = f'<{self.server.url}/user/repos?per_page=100&page=3>; rel="last"'
+            self._send(200, repos, {'Link': link})
+        elif path.startswith('/repos/'):
+            owner, name = path.split('/')[2:4]
+            if name in state['repos']:
+                self._send(200, state['repos'][name])
+            else:
+                self._send(404, {'message': 'Not Found'})
+        else:
+            self._send(404, {'message': 'Not Found'})
+
+    def _graphql(self, body):
+        cursor = body['variables'].get('cursor')
+        page = int(cursor or 0)
+        nodes = [{
+            'name': f'repo-{page}', 'nameWithOwner': f'src/repo-{page}', 'owner': {'login': 'src'},
+            'url': f'https://github.com/src/repo-{page}', 'description': None, 'diskUsage': 10 * (page + 1),
+            'isPrivate': True, 'isArchived': False, 'isFork': False, 'isEmpty': page == 1,
+            'pushedAt': '2024-01-01T00:00:00Z', 'hasIssuesEnabled': True, 'hasWikiEnabled': False,
+            'parent': None, 'defaultBranchRef': {'name': 'main', 'target': {'oid': 'abc'}},
+            'repositoryTopics': {'nodes': [{'topic': {'name': 'backup'}}]},
+        }]
+        page_info = {'hasNextPage': page == 0, 'endCursor': str(page + 1)}
+        self._send(200, {'data': {'viewer': {'repositories': {
+            'totalCount': 2, 'pageInfo': page_info, 'nodes': nodes}}}})
+
+    def do_POST(self):
+        body = self._body()
+        if self.path == '/graphql':
+            return self._graphql(body)
+        self.server.state['created'].append(body['name'])
+        repo = {'name': body['name'], 'full_name': f"dest-user/{body['name']}",
+                'owner': {'login': 'dest-user'}, 'private': body.get('private', False),
+                'description': body.get('description'),
+                'clone_url': f"https://github.com/dest-user/{body['name']}.git"}
+        self.server.state['repos'][body['name']] = repo
+        self._send(201, repo)
+
+    def do_PATCH(self):
+        name = self.path.split('/')[3]
+        repo = self.server.state['repos'][name]
+        repo.update(self._body())
+        self.server.state['edits'].append(name)
+        self._send(200, repo)
+
+class TestAsyncGithubClient(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGithubHandler)
+        self.server.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.server.state = {'repos': {}, 'edits': [], 'auth': set(), 'not_modified': 0, 'created': [],
+                             'requests': [], 'scopes': 'repo, read:org'}
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.client = AsyncGithubClient('test-token', base_url=self.server.url, max_connections=4)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_paginate_fetches_all_pages(self):
+        repos = self.client.run(self.client.list_user_repos())
+        self.assertEqual(len(repos), 6)
+        self.assertEqual(repos[-1].full_name, 'src/repo-3-1')
+        self.assertEqual(self.server.state['auth'], {'Bearer test-token'})
+
+    def test_get_or_create_and_edit(self):
+        repo, created = self.client.run(self.client.get_or_create_repo('dest-user', 'novo', private=True))
+        self.assertTrue(created)
+        repo, created = self.client.run(self.client.get_or_create_repo('dest-user', 'novo'))
+        self.assertFalse(created)
+
+        repo.edit(description='nova descrição')
+        self.assertEqual(repo.description, 'nova descrição')
+        self.assertEqual(self.server.state['edits'], ['novo'])
+
+    def test_errors_raise_github_exception(self):
+        with self.assertRaises(GithubException) as ctx:
+            self.client.run(self.client.get_json('/missing'))
+        self.assertEqual(ctx.exception.status, 404)
+
+    def test_conditional_requests_through_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = HttpCache(cache_dir)
+            install_cache(cache)
+            try:
+                client = AsyncGithubClient('test-token', base_url=self.server.url)
+                first, _ = client.run(client.get_user())
+                second, headers = client.run(client.get_user())
+                client.close()
+            finally:
+                install_cache(None)
+
+        self.assertEqual(first, second)
+        self.assertEqual(headers['X-OAuth-Scopes'], 'repo, read:org')
+        self.assertEqual(self.server.state['not_modified'], 1)
+        self.assertEqual(cache.stats['not_modified'], 1)
+        self.assertEqual(cache.stats['misses'], 1)
+
+    def test_token_validation_session_reuses_results(self):
+        self.server.state['scopes'] = 'repo'
+        source_token, dest_token = 'a' * 40, 'b' * 40
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_file = f"{tmp}/tokens.json"
+            session = TokenValidationSession(cache_file, base_url=self.server.url)
+            self.assertTrue(session.validate_token(source_token))
+            self.assertTrue(session.validate_tokens(source_token, dest_token, Mock()))
+            # One /user per token, plus one read-only probe for the missing org scope
+            self.assertEqual(sorted(self.server.state['requests']), ['/user', '/user', '/user/orgs'])
+
+            self.server.state['requests'].clear()
+            warm = TokenValidationSession(cache_file, base_url=self.server.url)
+            self.assertTrue(warm.validate_tokens(source_token, dest_token, Mock()))
+            self.assertEqual(self.server.state['requests'], ['/user', '/user'])
+        self.assertEqual(self.server.state['created'], [])
+
+    def test_revoked_token_is_noticed_once_info_expires(self):
+        token = 'a' * 40
+        with tempfile.TemporaryDirectory() as tmp:
+            session = TokenValidationSession(f"{tmp}/tokens.json", base_url=self.server.url, info_ttl=-1)
+            self.assertTrue(session.validate_token(token))
+            self.server.state['revoked'] = True
+            self.assertFalse(session.validate_token(token))
+
+    def test_executor_keeps_token_cache_next_to_progress(self):
+        session = TokenValidationSession(base_url=self.server.url)
+        session.validate_tokens = Mock(return_value=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = BackupExecutor(Mock(), Mock(), Mock(progress_file=Path(tmp) / 'progress.json'))
+            executor._setup_tokens('a' * 40, 'b' * 40)
+            with patch('backup_logic.token_validation._default_session', session):
+                executor._validate_tokens()
+            self.assertEqual(session.cache_file, Path(tmp) / '.token_validation.json')
+
+    def test_graphql_inventory(self):
+        inventory = self.client.run(fetch_inventory(self.client))
+        self.assertEqual(len(inventory), 2)
+        repo = inventory.get('src/repo-1')
+        self.assertEqual(repo.clone_url, 'https://github.com/src/repo-1.git')
+        self.assertEqual(repo.size, 20)
+        self.assertTrue(repo.is_empty)
+        self.assertFalse(repo.has_wiki)
+        self.assertEqual(repo.topics, ['backup'])
+        self.assertEqual(repo.pushed_at.year, 2024)
+        self.assertEqual(self.client.run(fetch_repository_count(self.client)), 2)
+
+    def test_github_operations_bulk_provisioning(self):
+        ops = GithubOperations(Mock(), Mock())
+        ops._dest_user = Mock()
+        ops._dest_api = self.client
+        self.server.state['repos']['existente'] = {'name': 'existente', 'full_name': 'dest-user/existente'}
+
+        sources = []
+        for name in ('existente', 'a', 'b'):
+            repo = Mock(description='d', private=False)
+            repo.name = name
+            sources.append(repo)
+
+        results = ops.get_or_create_dest_repos(sources)
+        self.assertEqual(set(results), {'existente', 'a', 'b'})
+        self.assertEqual(sorted(self.server.state['created']), ['a', 'b'])
+
+        # Later lookups are answered by the index
+        self.assertIs(ops.get_or_create_dest_repo(sources[1]), results['a'])
+        self.assertEqual(len(self.server.state['created']), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,292 @@
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import Mock
+from backup_logic.backup_execution import BackupExecutor, MirrorJob
+from backup_logic.inventory import RepositoryInventory
+from backup_logic.repository_operations import (GitCommandError, fingerprint_refs,
+                                                GIT_ERROR_AUTH, GIT_ERROR_CORRUPT, GIT_ERROR_NETWORK)
+from github import GithubException
+
+class ProgressVar:
+    """Stands in for a Tk DoubleVar: only ``set``, nothing else."""
+
+    def __init__(self):
+        self.values = []
+
+    def set(self, value):
+        self.values.append(value)
+
+class TestBackupExecutorPipeline(unittest.TestCase):
+    def setUp(self):
+        self.logger = Mock()
+        self.error_logger = Mock()
+        self.progress_manager = Mock()
+        self.progress_manager.current_progress = {}
+
+    def _make_repos(self, count):
+        repos = []
+        for i in range(count):
+            repo = Mock()
+            repo.name = f"repo-{i}"
+            repo.full_name = f"user/repo-{i}"
+            repos.append(repo)
+        return repos
+
+    def _make_executor(self):
+        executor = BackupExecutor(self.logger, self.error_logger, self.progress_manager)
+        executor.is_running = True
+
+        def fetch(job):
+            if job.repo.name.endswith("3"):
+                raise GithubException(404, "Not Found")
+
+        def push(job):
+            if job.repo.name.endswith("5"):
+                raise Exception("falha no push")
+
+        executor._fetch_source = Mock(side_effect=fetch)
+        executor._provision_destination = Mock()
+        executor._push_destination = Mock(side_effect=push)
+        return executor
+
+    def _run(self, repos, jobs, stage_workers=None):
+        executor = self._make_executor()
+        progress_var = ProgressVar()
+        workers = executor._resolve_stage_workers(jobs, stage_workers)
+        skipped = executor._run_pipeline(repos, Path("backup"), progress_var.set, 1, workers)
+        return executor, skipped, progress_var
+
+    def test_parallel_matches_serial(self):
+        repos = self._make_repos(20)
+        _, serial_skipped, _ = self._run(repos, 1)
+        executor, parallel_skipped, progress_var = self._run(repos, 4, {'push': 2})
+
+        self.assertEqual(serial_skipped, parallel_skipped)
+        self.assertEqual(executor._fetch_source.call_count, 20)
+        # Failed fetches never reach the later stages
+        self.assertEqual(executor._provision_destination.call_count, 18)
+        self.assertEqual(self.progress_manager.mark_completed.call_count, 2 * 16)
+        self.assertEqual(progress_var.values[-1], 100.0)
+
+    def test_already_processed_repos_are_not_processed(self):
+        repos = self._make_repos(4)
+        self.progress_manager.current_progress = {"user/repo-0": "2024-01-01T00:00:00"}
+        executor, skipped, progress_var = self._run(repos, 2)
+
+        self.assertEqual(progress_var.values[-1], 100.0)
+        processed = {call.args[0].repo.name for call in executor._fetch_source.call_args_list}
+        self.assertNotIn("repo-0", processed)
+        self.assertEqual(skipped, [("repo-3", "Repositório não encontrado")])
+
+    def test_skip_is_logged_once_and_unpushed_destinations_reported(self):
+        repos = self._make_repos(4)
+        self.progress_manager.current_progress = {"user/repo-0": "2024-01-01T00:00:00"}
+        executor = self._make_executor()
+        executor.github_ops.get_or_create_dest_repos = Mock(
+            side_effect=lambda pending: executor.github_ops.created_dest_repos.update(r.name for r in pending))
+
+        for repo in repos:
+            repo.size, repo.pushed_at = 10, None
+        self.progress_manager.get_fingerprint.return_value = None
+        self.progress_manager.get_lfs_sizes.return_value = {}
+        executor.disk_usage = None
+        with tempfile.TemporaryDirectory() as tmp:
+            executor._check_disk_space(Path(tmp), repos, 0)
+        executor._provision_destinations(repos)
+        executor._run_pipeline(repos, Path("backup"), None, 1, executor._resolve_stage_workers(2, None))
+        executor._log_unpushed_destinations()
+
+        skips = [call for call in self.logger.info.call_args_list if call.args[0].startswith("Pulando repo-0")]
+        self.assertEqual(len(skips), 1)
+        self.assertEqual([r.name for r in executor.github_ops.get_or_create_dest_repos.call_args.args[0]],
+                         ["repo-1", "repo-2", "repo-3"])
+        # repo-3 fails to fetch after its destination was created
+        self.logger.warning.assert_called_once_with("Repositórios criados no destino mas ainda sem push (1): repo-3")
+
+    def test_fetch_overlaps_push(self):
+        repos = self._make_repos(2)
+        executor = self._make_executor()
+        second_fetch_started = threading.Event()
+
+        def fetch(job):
+            if job.index == 2:
+                second_fetch_started.set()
+
+        def push(job):
+            if job.index == 1:
+                # Repo 2 must be able to download while repo 1 uploads
+                self.assertTrue(second_fetch_started.wait(timeout=5))
+
+        executor._fetch_source = Mock(side_effect=fetch)
+        executor._push_destination = Mock(side_effect=push)
+        skipped = executor._run_pipeline(repos, Path("backup"), None, 1,
+                                         executor._resolve_stage_workers(1, None))
+        self.assertEqual(skipped, [])
+
+    def test_stop_prevents_new_repositories(self):
+        repos = self._make_repos(5)
+        executor = self._make_executor()
+        executor.is_running = False
+
+        executor._run_pipeline(repos, Path("backup"), None, 1, executor._resolve_stage_workers(3, None))
+        executor._fetch_source.assert_not_called()
+
+    def test_unknown_stage_is_rejected(self):
+        executor = self._make_executor()
+        with self.assertRaises(ValueError):
+            executor._resolve_stage_workers(2, {'upload': 1})
+
+class TestIncrementalMode(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_path = Path(self.tmp.name) / "repo"
+        self.repo_path.mkdir()
+        self.progress_manager = Mock()
+        self.executor = BackupExecutor(Mock(), Mock(), self.progress_manager)
+        self.executor.incremental = True
+        self.executor.repo_ops = Mock()
+        self.executor.github_ops = Mock()
+        self.repo = Mock(full_name="user/repo", pushed_at=datetime(2024, 5, 1, tzinfo=timezone.utc),
+                         is_empty=False, archived=False)
+        self.repo.name = "repo"
+        self.executor.inventory = RepositoryInventory([self.repo])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _job(self):
+        return MirrorJob(self.repo, 1, 1, self.repo_path)
+
+    def test_unchanged_pushed_at_skips_everything(self):
+        self.progress_manager.get_fingerprint.return_value = {
+            'fingerprint': 'abc', 'pushed_at': self.repo.pushed_at.isoformat()
+        }
+        job = self._job()
+        self.executor._fetch_source(job)
+        self.executor._provision_destination(job)
+        self.executor._push_destination(job)
+
+        self.assertTrue(job.unchanged)
+        self.assertEqual(job.fingerprint, 'abc')
+        self.executor.github_ops.refresh_source_repo.assert_not_called()
+        self.executor.repo_ops.get_remote_fingerprint.assert_not_called()
+        self.executor.repo_ops.update_repository.assert_not_called()
+        self.executor.repo_ops.push_repository.assert_not_called()
+
+    def test_same_refs_after_new_pushed_at_skips(self):
+        self.progress_manager.get_fingerprint.return_value = {'fingerprint': 'abc', 'pushed_at': 'antigo'}
+        self.executor.repo_ops.get_remote_fingerprint.return_value = 'abc'
+        job = self._job()
+        self.executor._fetch_source(job)
+        self.assertTrue(job.unchanged)
+
+    def test_changed_refs_are_fetched(self):
+        self.progress_manager.get_fingerprint.return_value = {'fingerprint': 'abc', 'pushed_at': 'antigo'}
+        self.executor.repo_ops.get_remote_fingerprint.return_value = 'def'
+        self.executor.repo_ops.get_pack_size.return_value = 0
+        self.executor.repo_ops.get_local_fingerprint.return_value = 'def'
+        job = self._job()
+        self.executor._fetch_source(job)
+
+        self.assertFalse(job.unchanged)
+        self.assertEqual(job.fingerprint, 'def')
+        self.executor.repo_ops.update_repository.assert_called_once()
+
+class TestSourceChecks(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_path = Path(self.tmp.name) / "repo"
+        self.repo_path.mkdir()
+        self.executor = BackupExecutor(Mock(), Mock(), Mock())
+        self.executor.repo_ops = Mock()
+        self.executor.repo_ops.get_pack_size.return_value = 0
+        self.executor.github_ops = Mock()
+        self.repo = Mock(full_name="user/repo", is_empty=False, archived=False)
+        self.repo.name = "repo"
+        self.executor.inventory = RepositoryInventory([self.repo])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _job(self):
+        return MirrorJob(self.repo, 1, 1, self.repo_path)
+
+    def test_empty_repo_is_provisioned_without_git(self):
+        self.repo.is_empty = True
+        job = self._job()
+        self.executor._fetch_source(job)
+        self.executor._provision_destination(job)
+        self.executor._push_destination(job)
+
+        self.assertTrue(job.empty)
+        self.assertEqual(job.fingerprint, fingerprint_refs([]))
+        self.executor.repo_ops.update_repository.assert_not_called()
+        self.executor.repo_ops.push_repository.assert_not_called()
+        self.executor.github_ops.sync_repo_settings.assert_called_once()
+
+    def test_stale_inventory_rechecks_repo(self):
+        self.executor.inventory.fetched_at -= BackupExecutor.INVENTORY_MAX_AGE + 1
+        self.executor.github_ops.refresh_source_repo.side_effect = GithubException(404, "Not Found")
+        with self.assertRaises(GithubException) as ctx:
+            self.executor._fetch_source(self._job())
+        self.assertEqual(ctx.exception.status, 404)
+
+    def test_fresh_inventory_is_trusted(self):
+        self.executor._fetch_source(self._job())
+        self.executor.github_ops.refresh_source_repo.assert_not_called()
+        self.executor.repo_ops.update_repository.assert_called_once()
+
+class TestMirrorRepair(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_path = Path(self.tmp.name) / "repo"
+        self.repo_path.mkdir()
+        self.executor = BackupExecutor(Mock(), Mock(), Mock())
+        self.executor.NETWORK_RETRY_DELAY = 0
+        self.executor.repo_ops = Mock()
+        self.repo = Mock(clone_url="https://github.com/user/repo.git")
+        self.repo.name = "repo"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _sync(self):
+        return self.executor._sync_mirror(self.repo_path, self.repo, None)
+
+    def test_network_error_is_retried_in_place(self):
+        self.executor.repo_ops.update_repository.side_effect = [GitCommandError("early EOF", GIT_ERROR_NETWORK), None]
+        self.assertFalse(self._sync())
+        self.assertEqual(self.executor.repo_ops.update_repository.call_count, 2)
+        self.executor.repo_ops.clone_via_staging.assert_not_called()
+
+    def test_persistent_network_error_never_reclones(self):
+        self.executor.repo_ops.update_repository.side_effect = GitCommandError("early EOF", GIT_ERROR_NETWORK)
+        with self.assertRaises(GitCommandError):
+            self._sync()
+        self.assertEqual(self.executor.repo_ops.update_repository.call_count, BackupExecutor.NETWORK_RETRIES + 1)
+        self.executor.repo_ops.clone_via_staging.assert_not_called()
+
+    def test_auth_error_is_raised(self):
+        self.executor.repo_ops.update_repository.side_effect = GitCommandError("Authentication failed", GIT_ERROR_AUTH)
+        with self.assertRaises(GitCommandError):
+            self._sync()
+        self.executor.repo_ops.clone_via_staging.assert_not_called()
+
+    def test_corrupt_store_is_repaired(self):
+        self.executor.repo_ops.update_repository.side_effect = GitCommandError("bad object", GIT_ERROR_CORRUPT)
+        self.assertFalse(self._sync())
+        self.executor.repo_ops.repair_repository.assert_called_once()
+        self.executor.repo_ops.clone_via_staging.assert_not_called()
+
+    def test_unrepairable_mirror_is_recloned(self):
+        self.executor.repo_ops.update_repository.side_effect = GitCommandError("bad object", GIT_ERROR_CORRUPT)
+        self.executor.repo_ops.repair_repository.side_effect = GitCommandError("still broken", GIT_ERROR_CORRUPT)
+        self.assertTrue(self._sync())
+        self.executor.repo_ops.clone_via_staging.assert_called_once()
+        self.executor.repo_ops.remove_repository.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
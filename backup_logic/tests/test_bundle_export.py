@@ -0,0 +1,77 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+from backup_logic.bundle_export import BundleExporter
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME='t', GIT_AUTHOR_EMAIL='t@t', GIT_COMMITTER_NAME='t', GIT_COMMITTER_EMAIL='t@t')
+
+
+def git(*args, cwd=None):
+    return subprocess.run(['git', *args], cwd=cwd, env=GIT_ENV, check=True, capture_output=True, text=True).stdout
+
+
+@unittest.skipUnless(shutil.which('git'), "git não encontrado")
+class TestBundleExporter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.work = self.tmp / 'work'
+        git('init', '--quiet', '-b', 'main', str(self.work))
+        self._commit('inicial', size=50000)
+        self.mirror = self.tmp / 'mirror.git'
+        git('clone', '--quiet', '--mirror', str(self.work), str(self.mirror))
+        self.exporter = BundleExporter(self.tmp / 'export', Mock())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _commit(self, message, size=100):
+        (self.work / f'{message}.txt').write_text(os.urandom(size).hex())
+        git('add', '.', cwd=self.work)
+        git('commit', '--quiet', '-m', message, cwd=self.work)
+
+    def _sync(self):
+        git('fetch', '--quiet', '--prune', 'origin', cwd=self.mirror)
+
+    def test_chain_restores_latest_state(self):
+        base = self.exporter.export('u/repo', self.mirror)
+        self.assertTrue(base['base'])
+        self.assertIsNone(self.exporter.export('u/repo', self.mirror))
+
+        self._commit('segundo')
+        git('tag', '-a', 'v1', '-m', 'v1', cwd=self.work)
+        self._sync()
+        delta = self.exporter.export('u/repo', self.mirror)
+        self.assertFalse(delta['base'])
+        self.assertEqual(delta['changed'], ['refs/heads/main', 'refs/tags/v1'])
+        self.assertEqual(len(delta['prerequisites']), 1)
+        self.assertLess(delta['size'], base['size'])
+
+        # A new branch on an exported commit and a deleted tag need no new objects
+        git('branch', 'outra', cwd=self.work)
+        git('tag', '-d', 'v1', cwd=self.work)
+        self._sync()
+        moved = self.exporter.export('u/repo', self.mirror)
+        self.assertIsNone(moved['file'])
+        self.assertEqual(moved['deleted'], ['refs/tags/v1'])
+
+        restored = self.tmp / 'restored.git'
+        self.exporter.restore('u/repo', restored)
+        self.assertEqual(git('show-ref', cwd=restored), git('show-ref', '--heads', '--tags', cwd=self.mirror))
+        git('fsck', '--connectivity-only', cwd=restored)
+
+    def test_new_base_after_max_chain(self):
+        self.exporter.max_chain = 1
+        self.exporter.export('u/repo', self.mirror)
+        for message in ('a', 'b'):
+            self._commit(message)
+            self._sync()
+            entry = self.exporter.export('u/repo', self.mirror)
+        self.assertTrue(entry['base'])
+        self.assertEqual(len(self.exporter.load_index('u/repo')['bundles']), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+from backup_logic.backup_execution import BackupExecutor, MirrorJob
+from backup_logic.cold_storage import REASON_ARCHIVED, REASON_DORMANT, ColdStorage
+from backup_logic.repository_operations import RepositoryOperations
+
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME='t', GIT_AUTHOR_EMAIL='t@t', GIT_COMMITTER_NAME='t', GIT_COMMITTER_EMAIL='t@t')
+
+
+def git(*args, cwd=None):
+    return subprocess.run(['git', *args], cwd=cwd, env=GIT_ENV, check=True, capture_output=True, text=True).stdout
+
+
+class TestColdStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.work = self.tmp / 'work'
+        git('init', '--quiet', '-b', 'trunk', str(self.work))
+        for i in range(3):
+            (self.work / f'file{i}.txt').write_text(os.urandom(20000).hex())
+            git('add', '.', cwd=self.work)
+            git('commit', '--quiet', '-m', f'c{i}', cwd=self.work)
+        self.backup = self.tmp / 'backup'
+        self.mirror = self.backup / 'repo'
+        git('clone', '--mirror', '--quiet', '--no-local', str(self.work), str(self.mirror))
+        self.repo_ops = RepositoryOperations(Mock(), Mock())
+        self.cold = ColdStorage(self.backup, Mock(), self.repo_ops)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_freeze_and_thaw_round_trip(self):
+        refs = git('show-ref', cwd=self.mirror)
+        reclaimed = self.cold.freeze('repo', self.mirror, REASON_DORMANT)
+
+        self.assertGreater(reclaimed, 0)
+        self.assertFalse(self.mirror.exists())
+        self.assertTrue(self.cold.bundle_path('repo').exists())
+        report = ColdStorage(self.backup, Mock()).report()
+        self.assertEqual(report['repositories'], 1)
+        self.assertEqual(report['reclaimed_bytes'], reclaimed)
+
+        released = self.cold.thaw('repo', self.mirror)
+        self.assertEqual(released, report['bundle_bytes'])
+        self.assertFalse(self.cold.is_cold('repo'))
+        self.assertFalse(self.cold.bundle_path('repo').exists())
+        self.assertEqual(git('show-ref', cwd=self.mirror), refs)
+        self.assertEqual(git('symbolic-ref', 'HEAD', cwd=self.mirror).strip(), 'refs/heads/trunk')
+        # The re-inflated mirror takes the normal update path
+        RepositoryOperations(Mock(), Mock()).update_repository(self.mirror, self.work.as_uri(), None)
+
+    def test_unreadable_bundle_is_dropped(self):
+        self.cold.freeze('repo', self.mirror, REASON_ARCHIVED)
+        self.cold.bundle_path('repo').write_bytes(b'not a bundle')
+
+        self.cold.thaw('repo', self.mirror)
+        # Nothing left behind: the mirror is cloned again from the source
+        self.assertFalse(self.mirror.exists())
+        self.assertFalse(self.cold.is_cold('repo'))
+
+    def test_thaw_replaces_partial_directory(self):
+        refs = git('show-ref', cwd=self.mirror)
+        self.cold.freeze('repo', self.mirror, REASON_DORMANT)
+        (self.mirror / 'objects').mkdir(parents=True)
+        (self.mirror / 'config').write_text('restos')
+
+        self.cold.thaw('repo', self.mirror)
+        self.assertEqual(git('show-ref', cwd=self.mirror), refs)
+        self.assertEqual(git('symbolic-ref', 'HEAD', cwd=self.mirror).strip(), 'refs/heads/trunk')
+        git('fsck', '--no-progress', cwd=self.mirror)
+
+    def test_failed_removal_keeps_the_mirror(self):
+        refs = git('show-ref', cwd=self.mirror)
+
+        remove = self.repo_ops.remove_repository
+
+        def partial_removal(path):
+            # Only the first removal (the mirror being frozen) fails halfway
+            self.repo_ops.remove_repository = remove
+            shutil.rmtree(Path(path) / 'refs')
+            (Path(path) / 'packed-refs').unlink(missing_ok=True)
+            raise PermissionError("somente leitura")
+
+        self.repo_ops.remove_repository = partial_removal
+        with self.assertRaises(PermissionError):
+            self.cold.freeze('repo', self.mirror, REASON_DORMANT)
+
+        self.assertFalse(self.cold.is_cold('repo'))
+        self.assertFalse(self.cold.bundle_path('repo').exists())
+        self.assertEqual(git('show-ref', cwd=self.mirror), refs)
+
+
+class TestColdTierInBackup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.backup = Path(self.tmp.name)
+        self.progress_manager = Mock()
+        self.progress_manager.get_fingerprint.return_value = {'fingerprint': 'abc', 'pushed_at': '2024-01-01T00:00:00'}
+        self.executor = BackupExecutor(Mock(), Mock(), self.progress_manager)
+        self.executor.repo_ops = Mock()
+        self.executor.cold_storage = Mock()
+        self.executor.inventory = Mock(age=0)
+        self.repo = Mock(full_name='user/repo', archived=False, is_empty=False)
+        self.repo.name = 'repo'
+        self.job = MirrorJob(self.repo, 1, 1, self.backup / 'repo')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unchanged_cold_repository_only_checks_refs(self):
+        self.executor.cold_storage.is_cold.return_value = True
+        self.executor.repo_ops.get_remote_fingerprint.return_value = 'abc'
+
+        self.executor._fetch_source(self.job)
+        self.assertTrue(self.job.unchanged)
+        self.executor.cold_storage.thaw.assert_not_called()
+        self.executor.repo_ops.clone_via_staging.assert_not_called()
+
+    def test_changed_cold_repository_is_thawed_before_fetch(self):
+        self.executor.cold_storage.is_cold.return_value = True
+        self.executor.cold_storage.thaw.side_effect = lambda name, path: path.mkdir()
+        self.executor.repo_ops.get_remote_fingerprint.return_value = 'def'
+        self.executor.repo_ops.get_pack_size.return_value = 0
+        self.executor._fetch_lfs = Mock()
+
+        self.executor._fetch_source(self.job)
+        self.assertFalse(self.job.unchanged)
+        self.executor.cold_storage.thaw.assert_called_once_with('repo', self.job.repo_path)
+        self.executor.repo_ops.update_repository.assert_called_once()
+
+    def test_cold_reason(self):
+        self.job.repo_path.mkdir()
+        self.assertIsNone(self.executor._cold_reason(self.job))
+
+        self.executor.cold_after = 3
+        self.progress_manager.get_progress.return_value = {'unchanged_runs': 2}
+        self.assertIsNone(self.executor._cold_reason(self.job))
+        self.progress_manager.get_progress.return_value = {'unchanged_runs': 3}
+        self.assertEqual(self.executor._cold_reason(self.job), REASON_DORMANT)
+        self.repo.archived = True
+        self.assertEqual(self.executor._cold_reason(self.job), REASON_ARCHIVED)
+
+if __name__ == '__main__':
+    unittest.main()
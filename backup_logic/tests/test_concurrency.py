@@ -0,0 +1,53 @@
+import time
+import unittest
+from unittest.mock import Mock
+from backup_logic.concurrency import AdaptiveLimiter, ConcurrencyController
+
+class TestAdaptiveLimiter(unittest.TestCase):
+    def setUp(self):
+        self.logger = Mock()
+
+    def test_grows_while_throughput_holds(self):
+        limiter = AdaptiveLimiter("source_repos", self.logger, initial=1, maximum=4)
+        for _ in range(10):
+            limiter.record_success(1_000_000)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_errors_halve_the_limit(self):
+        limiter = AdaptiveLimiter("dest_repos", self.logger, initial=8, maximum=8)
+        limiter.record_error("timeout")
+        self.assertEqual(limiter.limit, 4)
+        limiter.record_error("timeout")
+        limiter.record_error("timeout")
+        limiter.record_error("timeout")
+        self.assertEqual(limiter.limit, 1)
+
+    def test_secondary_rate_limit_pauses_and_shrinks(self):
+        limiter = AdaptiveLimiter("dest_api", self.logger, initial=6, maximum=6)
+        limiter.record_response(403, {'Retry-After': '1'})
+        self.assertEqual(limiter.limit, 3)
+
+        started = time.monotonic()
+        with limiter.slot():
+            pass
+        self.assertGreaterEqual(time.monotonic() - started, 0.5)
+
+    def test_low_remaining_drops_to_minimum(self):
+        limiter = AdaptiveLimiter("source_api", self.logger, initial=5, maximum=5)
+        limiter.record_response(200, {'X-RateLimit-Remaining': '10'})
+        self.assertEqual(limiter.limit, 1)
+
+    def test_fixed_controller_never_moves(self):
+        callback = Mock()
+        controller = ConcurrencyController(self.logger, {'source': (3, 10), 'dest': (2, 10)},
+                                           {'source': (8, 8), 'dest': (8, 8)}, adaptive=False,
+                                           on_change=callback)
+        controller.dest_repos.record_error()
+        for _ in range(20):
+            controller.source_repos.record_success(10)
+        self.assertEqual(controller.snapshot()['source_repos'], 3)
+        self.assertEqual(controller.snapshot()['dest_repos'], 2)
+        callback.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import tempfile
+import threading
+import time
+import unittest
+from collections import namedtuple
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import Mock
+from backup_logic.backup_execution import BackupExecutor, MirrorJob
+from backup_logic.disk_space_check import DiskSpaceChecker, DiskWatchdog, directory_size
+from backup_logic.inventory import RepositoryInventory
+
+Usage = namedtuple('Usage', 'total used free')
+
+
+class TestIncrementalEstimate(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.backup = Path(self.tmp.name)
+        mirror = self.backup / 'mirrored'
+        (mirror / 'objects').mkdir(parents=True)
+        (mirror / 'objects' / 'pack.pack').write_bytes(b'x' * 8000)
+        self.pushed_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        self.mirrored = Mock(full_name='u/mirrored', size=10, pushed_at=self.pushed_at)
+        self.mirrored.name = 'mirrored'
+        self.new = Mock(full_name='u/new', size=10, pushed_at=self.pushed_at)
+        self.new.name = 'new'
+        self.checker = DiskSpaceChecker(Mock(), Mock())
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _without_buffer(self, *args, **kwargs):
+        return self.checker.estimate_required_space(*args, **kwargs) - self.checker.MIN_BUFFER_SPACE
+
+    def test_existing_mirror_only_counts_delta(self):
+        self.assertEqual(directory_size(self.backup / 'mirrored'), 8000)
+        self.assertEqual(self._without_buffer([self.mirrored]), int(10240 * 1.2))
+        self.assertEqual(self._without_buffer([self.mirrored], backup_path=self.backup), int((10240 - 8000) * 1.2))
+        self.assertEqual(self._without_buffer([self.new], backup_path=self.backup), int(10240 * 1.2))
+
+    def test_unchanged_mirror_needs_nothing(self):
+        last = {'u/mirrored': self.pushed_at.isoformat()}
+        self.assertEqual(self._without_buffer([self.mirrored], backup_path=self.backup, last_pushed_at=last), 0)
+
+
+class TestDiskWatchdog(unittest.TestCase):
+    def setUp(self):
+        self.free = 5000
+        self.watchdog = DiskWatchdog('.', Mock(), watermark=1000, interval=0.01)
+        self.watchdog._disk_usage = lambda path: Usage(10000, 10000 - self.free, self.free)
+
+    def test_pauses_below_watermark_and_resumes_with_margin(self):
+        self.assertTrue(self.watchdog.wait_for_space())
+        self.free = 900
+        self.watchdog.sample()
+        stop = threading.Event()
+        stop.set()
+        self.assertFalse(self.watchdog.wait_for_space(stop.is_set))
+
+        self.free = 1050  # Above the watermark, below the resume margin
+        self.watchdog.sample()
+        self.assertFalse(self.watchdog.wait_for_space(stop.is_set))
+
+        self.free = 1200
+        self.watchdog.sample()
+        self.assertTrue(self.watchdog.wait_for_space())
+        self.assertGreater(self.watchdog.paused_seconds, 0)
+
+    def test_waiting_clone_resumes_when_space_frees(self):
+        self.free = 500
+        self.watchdog.start()
+        try:
+            released = []
+            waiter = threading.Thread(target=lambda: released.append(self.watchdog.wait_for_space()))
+            waiter.start()
+            time.sleep(0.05)
+            self.assertEqual(released, [])
+            self.free = 5000
+            waiter.join(timeout=5)
+            self.assertEqual(released, [True])
+        finally:
+            self.watchdog.stop()
+
+    def test_fetch_stage_waits_before_new_transfers(self):
+        executor = BackupExecutor(Mock(), Mock(), Mock())
+        executor.repo_ops = Mock()
+        executor.github_ops = Mock()
+        executor.is_running = False  # The backup is being stopped
+        executor.disk_watchdog = self.watchdog
+        self.free = 500
+        self.watchdog.sample()
+        repo = Mock(full_name='u/repo', is_empty=False, archived=False)
+        repo.name = 'repo'
+        executor.inventory = RepositoryInventory([repo])
+        with self.assertRaisesRegex(Exception, "espaço em disco"):
+            executor._fetch_source(MirrorJob(repo, 1, 1, Path('repo')))
+        executor.repo_ops.update_repository.assert_not_called()
+        executor.repo_ops.clone_via_staging.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
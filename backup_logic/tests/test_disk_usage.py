@@ -0,0 +1,78 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+from backup_logic.disk_space_check import DiskSpaceChecker
+from backup_logic.disk_usage import DiskUsageIndex
+
+
+class TestDiskUsageIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.backup = self.root / 'backup'
+        for name, size in (('small', 100), ('large', 5000), ('.lfs', 700), ('.objects/u__net.git', 300),
+                           ('.staging/partial', 999)):
+            (self.backup / name / 'objects').mkdir(parents=True)
+            (self.backup / name / 'objects' / 'data').write_bytes(b'x' * size)
+        self.index_file = self.root / 'disk_usage.json'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rebuild_measures_mirrors_and_shared_stores(self):
+        index = DiskUsageIndex(self.index_file)
+        self.assertEqual(index.rebuild(self.backup), 6100)
+        self.assertEqual(index.top(2), [('large', 5000), ('.lfs', 700)])
+        # Unfinished clones are not part of the backup
+        self.assertNotIn('.staging', index.sizes())
+        self.assertEqual(DiskUsageIndex(self.index_file).sizes()['.objects/u__net.git'], 300)
+
+    def test_incremental_updates_and_growth(self):
+        index = DiskUsageIndex(self.index_file)
+        index.rebuild(self.backup)
+        index.record_run()
+        self.assertEqual(index.growth_since_last_run(), 0)
+
+        (self.backup / 'small' / 'objects' / 'more').write_bytes(b'x' * 400)
+        index.update('small', self.backup / 'small')
+        index.add('.lfs', 50)
+        index.add('.lfs', 0)
+        index.close()
+
+        reloaded = DiskUsageIndex(self.index_file)
+        self.assertEqual(reloaded.growth_since_last_run(), 450)
+        self.assertEqual(reloaded.sizes()['.lfs'], 750)
+        self.assertIn("Crescimento desde a última execução", reloaded.report())
+
+    def test_concurrent_adds_are_not_lost(self):
+        index = DiskUsageIndex(self.index_file)
+        threads = [threading.Thread(target=lambda: [index.add('.lfs', 1) for _ in range(200)]) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(index.sizes()['.lfs'], 1600)
+
+    def test_updates_are_saved_in_batches(self):
+        index = DiskUsageIndex(self.index_file)
+        index.SAVE_EVERY = 3
+        index.set('a', 1)
+        index.set('b', 2)
+        self.assertFalse(self.index_file.exists())
+        index.set('c', 3)
+        self.assertEqual(len(DiskUsageIndex(self.index_file).sizes()), 3)
+        index.remove('a')
+        index.close()
+        self.assertEqual(DiskUsageIndex(self.index_file).sizes(), {'b': 2, 'c': 3})
+
+    def test_estimate_uses_indexed_sizes(self):
+        repo = Mock(full_name='u/large', size=10, pushed_at=None)
+        repo.name = 'large'
+        checker = DiskSpaceChecker(Mock(), Mock())
+        indexed = checker.estimate_required_space([repo], backup_path=self.backup, mirror_sizes={'large': 10240})
+        self.assertEqual(indexed, checker.MIN_BUFFER_SPACE)
+
+if __name__ == '__main__':
+    unittest.main()
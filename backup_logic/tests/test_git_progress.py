@@ -0,0 +1,91 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+from backup_logic.git_progress import TransferProgress, git_subcommand, redact, run_git_streaming
+from backup_logic.repository_operations import RepositoryOperations
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME='t', GIT_AUTHOR_EMAIL='t@t', GIT_COMMITTER_NAME='t', GIT_COMMITTER_EMAIL='t@t')
+
+
+def git(*args, cwd=None):
+    return subprocess.run(['git', *args], cwd=cwd, env=GIT_ENV, check=True, capture_output=True, text=True).stdout
+
+
+class TestTransferProgress(unittest.TestCase):
+    def test_receiving_line(self):
+        progress = TransferProgress('repo', 'clone')
+        self.assertTrue(progress.update("Receiving objects:  45% (450/1000), 1.50 MiB | 2.00 MiB/s"))
+        self.assertEqual((progress.percent, progress.objects, progress.total_objects), (45, 450, 1000))
+        self.assertEqual(progress.bytes, int(1.5 * 1024 ** 2))
+        self.assertEqual(progress.throughput, 2 * 1024 ** 2)
+        self.assertAlmostEqual(progress.fraction, 0.45)
+
+    def test_remote_and_other_lines(self):
+        progress = TransferProgress('repo', 'fetch')
+        self.assertTrue(progress.update("remote: Enumerating objects: 1234, done."))
+        self.assertEqual((progress.objects, progress.percent), (1234, None))
+        self.assertEqual(progress.fraction, 0.0)
+        self.assertFalse(progress.update(" * [new branch]      main       -> main"))
+
+    def test_transfer_complete_after_next_phase(self):
+        progress = TransferProgress('repo', 'clone')
+        progress.update("Receiving objects:  99% (99/100), 10.00 KiB | 1.00 KiB/s")
+        progress.update("Resolving deltas:  10% (1/10)")
+        self.assertEqual(progress.fraction, 1.0)
+
+
+@unittest.skipUnless(shutil.which('git'), "git não encontrado")
+class TestStreamingGit(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.work = self.tmp / 'work'
+        git('init', '--quiet', str(self.work))
+        for i in range(3):
+            (self.work / f'file{i}.txt').write_text(os.urandom(50000).hex())
+            git('add', '.', cwd=self.work)
+            git('commit', '--quiet', '-m', f'c{i}', cwd=self.work)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_clone_reports_progress(self):
+        snapshots = []
+        repo_ops = RepositoryOperations(Mock(), Mock(), progress_callback=snapshots.append)
+        repo_ops.clone_via_staging(self.tmp / 'mirror', self.work.as_uri(), None)
+
+        final = snapshots[-1]
+        self.assertTrue(final['done'])
+        self.assertEqual(final['fraction'], 1.0)
+        self.assertEqual(final['operation'], 'clone')
+        self.assertGreater(final['bytes'], 0)
+        repo_ops.logger.info.assert_called()
+
+    def test_failure_keeps_output_tail(self):
+        progress = TransferProgress('missing', 'clone')
+        with self.assertRaises(subprocess.CalledProcessError) as context:
+            run_git_streaming(['clone', '--mirror', (self.tmp / 'missing').as_uri(), str(self.tmp / 'out')], progress)
+        self.assertIn('does not appear to be a git repository', context.exception.stderr)
+        self.assertEqual(context.exception.cmd, ['git', 'clone'])
+
+    def test_failure_names_subcommand_without_credentials(self):
+        progress = TransferProgress('work', 'fetch')
+        with self.assertRaises(subprocess.CalledProcessError) as context:
+            run_git_streaming(['-c', 'http.extraheader=Authorization: Bearer s3cret', 'fetch',
+                               'https://t0ken@127.0.0.1:1/u/r.git'], progress, cwd=self.work)
+        self.assertEqual(context.exception.cmd, ['git', 'fetch'])
+        self.assertNotIn('s3cret', context.exception.stderr)
+        self.assertNotIn('t0ken', context.exception.stderr)
+
+    def test_redact(self):
+        self.assertEqual(git_subcommand(['-c', 'a=b', '-C', 'dir', 'push', 'origin']), 'push')
+        self.assertEqual(redact("fatal: unable to access 'https://ghp_abc@github.com/u/r/'"),
+                         "fatal: unable to access 'https://***@github.com/u/r/'")
+        self.assertEqual(redact("http.extraheader=AUTHORIZATION: basic dG9rZW4="),
+                         "http.extraheader=AUTHORIZATION: basic ***")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import Mock, patch, PropertyMock
+from unittest.mock import Mock, call, patch, PropertyMock
 from backup_logic.github_operations import GithubOperations
 from github import Github, GithubException
 
@@ -145,5 +145,26 @@ class TestGithubOperations(unittest.TestCase):
             
         self.error_logger.log_error.assert_called()
 
+    def test_sync_repo_settings_unchanged_costs_no_call(self):
+        fields = dict(description=None, private=True, has_issues=True, has_wiki=False)
+        mock_source_repo = Mock(**fields)
+        mock_source_repo.name = "test-repo"
+        mock_dest_repo = Mock(**dict(fields, description=""))
+
+        self.github_ops.sync_repo_settings(mock_source_repo, mock_dest_repo)
+
+        mock_dest_repo.edit.assert_not_called()
+
+    def test_sync_repo_settings_sends_only_differences(self):
+        self.github_ops.sync_fields = ('description', 'private', 'topics', 'archived')
+        mock_source_repo = Mock(description="nova", private=True, topics=['b', 'a'], archived=False)
+        mock_dest_repo = Mock(description="antiga", private=True, topics=['a', 'b'], archived=True)
+
+        self.github_ops.sync_repo_settings(mock_source_repo, mock_dest_repo)
+
+        # Unarchiving goes first: an archived repository rejects other edits
+        self.assertEqual(mock_dest_repo.edit.call_args_list, [call(archived=False), call(description="nova")])
+        mock_dest_repo.replace_topics.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
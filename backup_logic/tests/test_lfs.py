@@ -0,0 +1,110 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+from backup_logic.backup_execution import BackupExecutor, MirrorJob
+from backup_logic.disk_space_check import DiskSpaceChecker
+from backup_logic.lfs import LFS_STORAGE_DIR, LfsMirror
+from backup_logic.progress_management import ProgressManager
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME='t', GIT_AUTHOR_EMAIL='t@t', GIT_COMMITTER_NAME='t', GIT_COMMITTER_EMAIL='t@t')
+
+
+def git(*args, cwd=None):
+    return subprocess.run(['git', *args], cwd=cwd, env=GIT_ENV, check=True, capture_output=True, text=True).stdout
+
+
+@unittest.skipUnless(shutil.which('git'), "git não encontrado")
+class TestLfsMirror(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.work = self.tmp / 'work'
+        git('init', '--quiet', str(self.work))
+        (self.work / 'README').write_text('x')
+        git('add', '.', cwd=self.work)
+        git('commit', '--quiet', '-m', 'inicial', cwd=self.work)
+        self.backup = self.tmp / 'backup'
+        self.mirror = self.backup / 'repo'
+        self.lfs = LfsMirror(self.backup, Mock())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _mirror(self):
+        git('clone', '--quiet', '--mirror', str(self.work), str(self.mirror))
+
+    def test_detects_lfs_attributes(self):
+        self._mirror()
+        self.assertFalse(self.lfs.uses_lfs(self.mirror))
+
+        (self.work / 'assets').mkdir()
+        (self.work / 'assets' / '.gitattributes').write_text('*.psd filter=lfs diff=lfs merge=lfs -text\n')
+        git('add', '.', cwd=self.work)
+        git('commit', '--quiet', '-m', 'lfs', cwd=self.work)
+        git('fetch', '--quiet', 'origin', cwd=self.mirror)
+        self.assertTrue(self.lfs.uses_lfs(self.mirror))
+
+    def test_empty_repository_does_not_use_lfs(self):
+        git('init', '--bare', '--quiet', str(self.mirror))
+        self.assertFalse(self.lfs.uses_lfs(self.mirror))
+
+    def test_mirrors_share_one_relative_store(self):
+        self._mirror()
+        self.lfs.configure(self.mirror)
+        storage = git('config', 'lfs.storage', cwd=self.mirror).strip()
+        self.assertEqual(storage, os.path.join('..', LFS_STORAGE_DIR))
+        self.assertEqual((self.mirror / storage).resolve(), (self.backup / LFS_STORAGE_DIR).resolve())
+
+
+class TestLfsInPipeline(unittest.TestCase):
+    def setUp(self):
+        self.executor = BackupExecutor(Mock(), Mock(), Mock())
+        self.executor.repo_ops = Mock()
+        self.executor.github_ops = Mock()
+        self.executor.lfs = Mock(available=True)
+        self.executor.lfs.uses_lfs.return_value = True
+        self.executor.lfs.fetch.return_value = 5000
+        repo = Mock(full_name="user/repo")
+        repo.name = "repo"
+        self.job = MirrorJob(repo, 1, 1, Path("repo"))
+
+    def test_lfs_objects_fetched_and_pushed_before_refs(self):
+        self.executor._fetch_lfs(self.job)
+        self.assertTrue(self.job.lfs)
+        self.assertEqual(self.job.lfs_bytes, 5000)
+
+        self.job.dest_repo = Mock(clone_url="https://github.com/dest/repo.git")
+        self.executor._push_destination(self.job)
+        before_push = self.executor.repo_ops.push_repository.call_args.kwargs['before_push']
+        self.executor.lfs.push.assert_not_called()
+        before_push()
+        self.executor.lfs.push.assert_called_once_with(Path("repo"), "https://github.com/dest/repo.git", None)
+
+    def test_missing_git_lfs_is_reported(self):
+        self.executor.lfs.available = False
+        self.executor._fetch_lfs(self.job)
+        self.assertFalse(self.job.lfs)
+        self.executor.lfs.fetch.assert_not_called()
+        self.executor.logger.warning.assert_called_once()
+
+
+class TestLfsSizes(unittest.TestCase):
+    def test_lfs_bytes_accumulate_into_estimate(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            progress = ProgressManager(Path(tmp) / 'progress.json')
+            progress.mark_completed('user/repo', '2024-01-01T00:00:00', lfs_bytes=3000)
+            progress.mark_completed('user/repo', '2024-01-02T00:00:00', lfs_bytes=2000)
+            progress.mark_completed('user/other', '2024-01-02T00:00:00')
+            sizes = progress.get_lfs_sizes()
+        self.assertEqual(sizes, {'user/repo': 5000})
+
+        checker = DiskSpaceChecker(Mock(), Mock())
+        repos = [Mock(full_name='user/repo', size=1), Mock(full_name='user/other', size=1)]
+        without_lfs = checker.estimate_required_space(repos)
+        self.assertEqual(checker.estimate_required_space(repos, sizes) - without_lfs, 6000)
+
+if __name__ == '__main__':
+    unittest.main()
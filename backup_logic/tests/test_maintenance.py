@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+from backup_logic.maintenance import MaintenanceScheduler, HISTORY_FILE, read_stats
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME='t', GIT_AUTHOR_EMAIL='t@t', GIT_COMMITTER_NAME='t', GIT_COMMITTER_EMAIL='t@t')
+
+
+def git(*args, cwd=None):
+    return subprocess.run(['git', *args], cwd=cwd, env=GIT_ENV, check=True, capture_output=True, text=True).stdout
+
+
+@unittest.skipUnless(shutil.which('git'), "git não encontrado")
+class TestMaintenanceScheduler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.work = self.tmp / 'work'
+        git('init', '--quiet', str(self.work))
+        self.backup = self.tmp / 'backup'
+        self.backup.mkdir()
+        self.mirror = self.backup / 'repo'
+        self._commit('inicial')
+        git('clone', '--quiet', '--mirror', str(self.work), str(self.mirror))
+        # Every fetch leaves its own small pack, as incremental backups do
+        git('config', 'fetch.unpackLimit', '1', cwd=self.mirror)
+        for i in range(4):
+            self._commit(f'c{i}')
+            git('fetch', '--quiet', 'origin', cwd=self.mirror)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _commit(self, message):
+        (self.work / f'{message}.txt').write_text(os.urandom(2000).hex())
+        git('add', '.', cwd=self.work)
+        git('commit', '--quiet', '-m', message, cwd=self.work)
+
+    def test_fragmented_mirror_is_repacked_and_recorded(self):
+        self.assertEqual(read_stats(self.mirror)['packs'], 4)
+        scheduler = MaintenanceScheduler(self.backup, Mock(), pack_threshold=3)
+        summary = scheduler.run_pass()
+
+        self.assertEqual(read_stats(self.mirror)['packs'], 1)
+        self.assertTrue((self.mirror / 'objects' / 'info' / 'commit-graph').exists())
+        self.assertEqual(summary['mirrors'][0]['tasks'], ['repack', 'prune', 'commit-graph'])
+        history = json.loads((self.backup / HISTORY_FILE).read_text())
+        self.assertEqual(history[0]['mirrors'][0]['repository'], 'repo')
+        git('fsck', '--connectivity-only', cwd=self.mirror)
+
+        # A second pass finds nothing to do
+        self.assertEqual(scheduler.run_pass()['mirrors'], [])
+
+    def test_pool_is_repacked_without_dropping_objects(self):
+        pool = self.backup / '.objects' / 'u__net.git'
+        shutil.copytree(self.mirror, pool)
+        branch = git('symbolic-ref', 'HEAD', cwd=pool).strip()
+        tip = git('rev-parse', branch, cwd=pool).strip()
+        # The tip is now only reachable from a mirror that borrows it
+        git('update-ref', 'refs/members/u/repo/first', f'{branch}~3', cwd=pool)
+        git('update-ref', '-d', branch, cwd=pool)
+        disk_usage = Mock()
+
+        scheduler = MaintenanceScheduler(self.backup, Mock(), pack_threshold=3, disk_usage=disk_usage)
+        summary = scheduler.run_pass()
+
+        results = {result['repository']: result for result in summary['mirrors']}
+        self.assertEqual(results['.objects/u__net.git']['tasks'], ['repack', 'commit-graph'])
+        self.assertEqual(read_stats(pool)['packs'], 1)
+        git('cat-file', '-e', tip, cwd=pool)
+        disk_usage.update.assert_any_call('.objects/u__net.git', pool)
+
+    def test_below_thresholds_only_indexes(self):
+        scheduler = MaintenanceScheduler(self.backup, Mock())
+        self.assertEqual(scheduler.plan(self.mirror, read_stats(self.mirror)), ['commit-graph', 'multi-pack-index'])
+
+    def test_budget_stops_new_mirrors(self):
+        scheduler = MaintenanceScheduler(self.backup, Mock(), time_budget=0)
+        scheduler.run_pass(should_stop=lambda: True)
+        summary = json.loads((self.backup / HISTORY_FILE).read_text())[-1]
+        self.assertEqual(summary['skipped_by_budget'], 1)
+        self.assertEqual(read_stats(self.mirror)['packs'], 4)
+
+if __name__ == '__main__':
+    unittest.main()
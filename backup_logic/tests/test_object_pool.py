@@ -0,0 +1,101 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+from backup_logic.inventory import _node_to_rest
+from backup_logic.object_pool import ObjectPoolManager, network_keys
+from backup_logic.repository_operations import RepositoryOperations
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME='t', GIT_AUTHOR_EMAIL='t@t', GIT_COMMITTER_NAME='t', GIT_COMMITTER_EMAIL='t@t')
+
+
+def git(*args, cwd=None):
+    return subprocess.run(['git', *args], cwd=cwd, env=GIT_ENV, check=True, capture_output=True, text=True).stdout
+
+
+def listed(full_name, parent=None, source=None):
+    return Mock(full_name=full_name, parent_full_name=parent, source_full_name=source)
+
+
+class TestNetworkKeys(unittest.TestCase):
+    def test_fork_of_fork_shares_the_root_network(self):
+        repos = [listed('u/root'), listed('a/fork', 'u/root', 'u/root'), listed('b/fork', 'a/fork', 'u/root')]
+        self.assertEqual(set(network_keys(repos).values()), {'u/root'})
+
+    def test_chain_is_followed_through_the_listing(self):
+        # Only the immediate parents are known (e.g. a REST listing)
+        repos = [listed('a/fork', 'u/root'), listed('b/fork', 'a/fork'), listed('c/fork', 'b/fork')]
+        self.assertEqual(set(network_keys(repos).values()), {'u/root'})
+
+    def test_inventory_records_network_root(self):
+        node = {'name': 'fork', 'nameWithOwner': 'b/fork', 'url': 'https://github.com/b/fork',
+                'parent': {'nameWithOwner': 'a/fork', 'parent': {'nameWithOwner': 'u/root', 'parent': None}}}
+        data = _node_to_rest(node)
+        self.assertEqual(data['parent_full_name'], 'a/fork')
+        self.assertEqual(data['source_full_name'], 'u/root')
+        self.assertIsNone(_node_to_rest(dict(node, parent=None))['source_full_name'])
+
+@unittest.skipUnless(shutil.which('git'), "git não encontrado")
+class TestObjectPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        # An upstream with some history and a fork that adds one commit
+        self.upstream = self.tmp / 'upstream'
+        git('init', '--quiet', str(self.upstream))
+        for i in range(5):
+            (self.upstream / f'file{i}.txt').write_text(os.urandom(20000).hex())
+            git('add', '.', cwd=self.upstream)
+            git('commit', '--quiet', '-m', f'c{i}', cwd=self.upstream)
+        self.fork = self.tmp / 'fork'
+        git('clone', '--quiet', str(self.upstream), str(self.fork))
+        (self.fork / 'extra.txt').write_text('fork')
+        git('add', '.', cwd=self.fork)
+        git('commit', '--quiet', '-m', 'fork', cwd=self.fork)
+
+        self.backup = self.tmp / 'backup'
+        self.backup.mkdir()
+        self.repos = [Mock(full_name='u/upstream', parent_full_name=None, source_full_name=None),
+                      Mock(full_name='f/fork', parent_full_name='u/upstream', source_full_name='u/upstream')]
+        self.pools = ObjectPoolManager(self.backup, Mock(), self.repos)
+        self.repo_ops = RepositoryOperations(Mock(), Mock())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _mirror(self, repo, url, name):
+        pool = self.pools.pool_for(repo)
+        path = self.backup / name
+        self.repo_ops.clone_via_staging(path, str(url), None, reference=pool)
+        self.pools.absorb(pool, repo, path)
+        return path
+
+    def test_fork_borrows_objects_and_survives_deletion(self):
+        upstream_mirror = self._mirror(self.repos[0], self.upstream, 'upstream')
+        fork_mirror = self._mirror(self.repos[1], self.fork, 'fork')
+
+        # Everything the fork has is held by the pool
+        local_objects = git('count-objects', '-v', cwd=fork_mirror)
+        self.assertIn('count: 0\n', local_objects)
+        self.assertIn('in-pack: 0\n', local_objects)
+        self.assertEqual((fork_mirror / 'objects' / 'info' / 'alternates').read_text().strip(),
+                         os.path.join('..', '..', '.objects', 'u__upstream.git', 'objects'))
+
+        self.repo_ops.remove_repository(upstream_mirror)
+        git('fsck', '--connectivity-only', cwd=fork_mirror)
+
+        # Pushing from a mirror that borrows objects sends a complete history
+        target = self.tmp / 'target.git'
+        git('init', '--bare', '--quiet', str(target))
+        self.repo_ops.push_repository(fork_mirror, str(target), None)
+        git('fsck', '--connectivity-only', cwd=target)
+        self.assertEqual(git('show-ref', '--heads', cwd=fork_mirror), git('show-ref', '--heads', cwd=target))
+
+    def test_repository_without_network_has_no_pool(self):
+        pools = ObjectPoolManager(self.backup, Mock(), self.repos[:1])
+        self.assertIsNone(pools.pool_for(self.repos[0]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from backup_logic.progress_journal import ProgressJournal
+from backup_logic.progress_management import ProgressManager
+
+
+class TestProgressJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.progress_file = Path(self.tmp.name) / 'progress.json'
+        self.journal_file = Path(self.tmp.name) / 'progress.journal'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_changes_are_journaled_and_replayed(self):
+        progress = ProgressManager(self.progress_file)
+        progress.mark_completed('user/repo', '2024-01-01T00:00:00', fingerprint='abc')
+        progress.mark_completed('user/repo', '2024-01-02T00:00:00', fingerprint='abc', unchanged=True)
+
+        # No full rewrite: one small record per change
+        self.assertFalse(self.progress_file.exists())
+        self.assertEqual(len(self.journal_file.read_text().splitlines()), 2)
+
+        reloaded = ProgressManager(self.progress_file)
+        self.assertEqual(reloaded.get_fingerprint('user/repo')['fingerprint'], 'abc')
+        self.assertEqual(reloaded.get_progress('user/repo')['unchanged_runs'], 1)
+
+    def test_close_compacts_into_snapshot(self):
+        progress = ProgressManager(self.progress_file)
+        progress.mark_completed('user/repo', '2024-01-01T00:00:00', fingerprint='abc')
+        progress.close()
+
+        self.assertEqual(self.journal_file.read_text(), '')
+        with open(self.progress_file) as f:
+            self.assertEqual(json.load(f)['user/repo']['fingerprint'], 'abc')
+        self.assertEqual(ProgressManager(self.progress_file).get_fingerprint('user/repo')['fingerprint'], 'abc')
+
+    def test_periodic_compaction(self):
+        progress = ProgressManager(self.progress_file)
+        progress.COMPACT_EVERY = 10
+        for i in range(25):
+            progress.mark_completed(f'user/repo{i}', '2024-01-01T00:00:00')
+        self.assertEqual(progress.journal.records, 5)
+        with open(self.progress_file) as f:
+            self.assertEqual(len(json.load(f)), 20)
+        self.assertEqual(len(ProgressManager(self.progress_file).current_progress), 25)
+
+    def test_removals_are_journaled(self):
+        progress = ProgressManager(self.progress_file)
+        progress.mark_completed('user/old', '2024-01-01T00:00:00')
+        progress.mark_completed('user/new', '2024-01-02T00:00:00')
+        progress.current_progress['user/old']['timestamp'] = 0
+        progress.cleanup_old_progress(max_age_days=7)
+        self.assertEqual(set(ProgressManager(self.progress_file).current_progress), {'user/new'})
+
+        progress.clear_progress()
+        self.assertEqual(ProgressManager(self.progress_file).current_progress, {})
+
+    def test_snapshot_without_journal_reset_keeps_removals(self):
+        progress = ProgressManager(self.progress_file)
+        progress.mark_completed('user/repo', '2024-01-01T00:00:00')
+        progress.clear_progress()
+        # Crash between writing the snapshot and emptying the journal
+        progress.journal.reset = lambda: None
+        progress.save_progress()
+        self.assertEqual(ProgressManager(self.progress_file).current_progress, {})
+
+    def test_torn_record_is_ignored(self):
+        progress = ProgressManager(self.progress_file)
+        progress.mark_completed('user/repo', '2024-01-01T00:00:00', fingerprint='abc')
+        with open(self.journal_file, 'a') as f:
+            f.write('{"set":"user/other","val')
+
+        reloaded = ProgressManager(self.progress_file)
+        self.assertIsNotNone(reloaded.get_fingerprint('user/repo'))
+        self.assertIsNone(reloaded.get_progress('user/other'))
+
+    def test_concurrent_writers_share_flushes(self):
+        progress = ProgressManager(self.progress_file)
+        writes = []
+        write = progress.journal._write
+
+        def slow_write(lines):
+            writes.append(len(lines))
+            time.sleep(0.005)
+            write(lines)
+
+        progress.journal._write = slow_write
+
+        def worker(n):
+            for i in range(25):
+                progress.mark_completed(f'user/repo{n}-{i}', '2024-01-01T00:00:00', fingerprint=str(i))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sum(writes), 200)
+        self.assertLess(len(writes), 200)
+        self.assertEqual(len(ProgressManager(self.progress_file).current_progress), 200)
+
+    def test_failed_write_is_retried(self):
+        journal = ProgressJournal(self.journal_file, fsync=False)
+        write = journal._write
+        failures = [OSError("disco cheio")]
+
+        def flaky_write(lines):
+            if failures:
+                raise failures.pop()
+            write(lines)
+
+        journal._write = flaky_write
+        seq = journal.append({'set': 'a', 'value': 1})
+        with self.assertRaises(OSError):
+            journal.wait(seq)
+        journal.wait(seq)
+        self.assertEqual(list(ProgressJournal(self.journal_file).replay()), [{'set': 'a', 'value': 1}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+from backup_logic.repository_operations import (
+    PushPlan, RepositoryOperations, _parse_ref_lines, classify_git_error, fingerprint_refs, staging_path,
+    GIT_ERROR_AUTH, GIT_ERROR_BROKEN, GIT_ERROR_CORRUPT, GIT_ERROR_NETWORK, GIT_ERROR_OTHER
+)
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME='t', GIT_AUTHOR_EMAIL='t@t', GIT_COMMITTER_NAME='t', GIT_COMMITTER_EMAIL='t@t')
+
+
+def git(*args, cwd=None):
+    return subprocess.run(['git', *args], cwd=cwd, env=GIT_ENV, check=True, capture_output=True, text=True).stdout
+
+class TestPushPlan(unittest.TestCase):
+    def test_only_missing_and_different_refs_are_pushed(self):
+        local = {'refs/heads/main': 'a1', 'refs/heads/dev': 'b1', 'refs/tags/v1': 'c1'}
+        remote = {'refs/heads/main': 'a1', 'refs/heads/dev': 'b0', 'refs/heads/old': 'd0'}
+        plan = PushPlan(local, remote)
+
+        self.assertEqual(plan.created, ['refs/tags/v1'])
+        self.assertEqual(plan.updated, ['refs/heads/dev'])
+        self.assertEqual(plan.unchanged, ['refs/heads/main'])
+        self.assertEqual(plan.refspecs, ['refs/tags/v1:refs/tags/v1', 'refs/heads/dev:refs/heads/dev'])
+
+    def test_up_to_date_destination_needs_no_push(self):
+        refs = {'refs/heads/main': 'a1'}
+        self.assertEqual(PushPlan(refs, dict(refs)).refspecs, [])
+
+    def test_many_refs_use_wildcard_refspecs(self):
+        local = {f'refs/tags/v{i}': str(i) for i in range(PushPlan.MAX_EXPLICIT_REFSPECS + 1)}
+        plan = PushPlan(local, {})
+        self.assertEqual(plan.refspecs, ['refs/heads/*:refs/heads/*', 'refs/tags/*:refs/tags/*'])
+
+    def test_peeled_tags_are_ignored(self):
+        output = "a1\trefs/heads/main\nc1\trefs/tags/v1\nc2\trefs/tags/v1^{}\n"
+        self.assertEqual(_parse_ref_lines(output), {'refs/heads/main': 'a1', 'refs/tags/v1': 'c1'})
+
+    def test_fingerprint_ignores_head_and_order(self):
+        remote = ["a1\tHEAD", "c1\trefs/tags/v1", "c2\trefs/tags/v1^{}", "a1\trefs/heads/main"]
+        local = ["a1 refs/heads/main", "c1 refs/tags/v1"]
+        self.assertEqual(fingerprint_refs(remote), fingerprint_refs(local))
+
+class TestClassifyGitError(unittest.TestCase):
+    def test_kinds(self):
+        cases = {
+            "error: RPC failed; curl 56 GnuTLS recv error\nfatal: early EOF\nfatal: index-pack failed": GIT_ERROR_NETWORK,
+            "fatal: unable to access 'https://github.com/u/r/': Could not resolve host: github.com": GIT_ERROR_NETWORK,
+            "remote: Repository not found.\nfatal: repository 'https://github.com/u/r/' not found": GIT_ERROR_AUTH,
+            "fatal: Authentication failed for 'https://github.com/u/r/'": GIT_ERROR_AUTH,
+            "error: object file objects/ab/cdef is empty\nfatal: loose object abcdef is corrupt": GIT_ERROR_CORRUPT,
+            "fatal: bad object refs/heads/main": GIT_ERROR_CORRUPT,
+            "error: packfile objects/pack/pack-1a2b.pack cannot be accessed": GIT_ERROR_CORRUPT,
+            "warning: you appear to have cloned an empty repository; the branch is empty": GIT_ERROR_OTHER,
+            "fatal: unable to parse packfile uri": GIT_ERROR_OTHER,
+            "fatal: unable to access 'https://github.com/u/r/': The requested URL returned error: 502": GIT_ERROR_NETWORK,
+            "fatal: not a git repository: '.'": GIT_ERROR_BROKEN,
+            "fatal: something else": GIT_ERROR_OTHER,
+        }
+        for message, kind in cases.items():
+            self.assertEqual(classify_git_error(message), kind, message)
+
+@unittest.skipUnless(shutil.which('git'), "git não encontrado")
+class TestStagingClone(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.work = self.tmp / 'work'
+        git('init', '--quiet', '-b', 'trunk', str(self.work))
+        for i in range(3):
+            (self.work / f'file{i}.txt').write_text(os.urandom(20000).hex())
+            git('add', '.', cwd=self.work)
+            git('commit', '--quiet', '-m', f'c{i}', cwd=self.work)
+        self.url = self.work.as_uri()
+        self.mirror = self.tmp / 'backup' / 'repo'
+        self.repo_ops = RepositoryOperations(Mock(), Mock())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_reclone_swaps_in_complete_mirror(self):
+        self.mirror.mkdir(parents=True)
+        (self.mirror / 'lixo').write_text('mirror antigo')
+        self.repo_ops.clone_via_staging(self.mirror, self.url, None)
+
+        self.assertFalse(staging_path(self.mirror).exists())
+        self.assertEqual(os.listdir(staging_path(self.mirror).parent), [])
+        self.assertEqual(git('symbolic-ref', 'HEAD', cwd=self.mirror).strip(), 'refs/heads/trunk')
+        self.assertEqual(git('show-ref', cwd=self.mirror), git('show-ref', cwd=self.work))
+        # The mirror keeps working with the normal update path
+        self.repo_ops.update_repository(self.mirror, self.url, None)
+
+    def test_update_prunes_refs_deleted_at_source(self):
+        git('branch', 'temporaria', cwd=self.work)
+        git('tag', 'v1', cwd=self.work)
+        self.repo_ops.clone_via_staging(self.mirror, self.url, None)
+        git('branch', '-D', 'temporaria', cwd=self.work)
+        git('tag', '-d', 'v1', cwd=self.work)
+
+        self.repo_ops.update_repository(self.mirror, self.url, None)
+        self.assertEqual(self.repo_ops.get_local_fingerprint(self.mirror),
+                         self.repo_ops.get_remote_fingerprint(self.url, None))
+
+    def test_interrupted_clone_is_resumed(self):
+        staging = staging_path(self.mirror)
+        staging.parent.mkdir(parents=True)
+        git('init', '--bare', '--quiet', str(staging))
+        git('config', 'remote.origin.fetch', '+refs/*:refs/*', cwd=staging)
+        git('fetch', '--quiet', self.url, 'trunk:refs/heads/trunk', cwd=staging)
+        # The source moved on while the clone was interrupted
+        (self.work / 'novo.txt').write_text('novo')
+        git('add', '.', cwd=self.work)
+        git('commit', '--quiet', '-m', 'novo', cwd=self.work)
+
+        self.repo_ops.clone_via_staging(self.mirror, self.url, None)
+        self.assertEqual(git('rev-parse', 'trunk', cwd=self.mirror), git('rev-parse', 'trunk', cwd=self.work))
+        self.assertFalse(staging.exists())
+
+    def test_repair_refetches_missing_objects(self):
+        git('clone', '--quiet', '--mirror', self.url, str(self.mirror))
+        for pack in (self.mirror / 'objects' / 'pack').iterdir():
+            pack.unlink()
+        with self.assertRaises(subprocess.CalledProcessError):
+            git('fsck', '--connectivity-only', cwd=self.mirror)
+
+        self.repo_ops.repair_repository(self.mirror, self.url, None)
+        git('fsck', '--connectivity-only', cwd=self.mirror)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import Mock
+from backup_logic.progress_management import ProgressManager
+from backup_logic.scheduling import (ORDER_LARGEST_FIRST, ORDER_OLDEST_MIRROR, ORDER_RECENTLY_PUSHED,
+                                     ORDER_SMALLEST_FIRST, ORDER_SOURCE, order_repositories)
+
+
+def repo(name, size=None, pushed_at=None):
+    return Mock(full_name=f'user/{name}', size=size, pushed_at=pushed_at)
+
+
+def names(repos):
+    return [r.full_name.split('/')[1] for r in repos]
+
+
+class TestOrderRepositories(unittest.TestCase):
+    def setUp(self):
+        self.repos = [
+            repo('a', size=300, pushed_at=datetime(2024, 3, 1, 12, 0)),
+            repo('b', size=None, pushed_at=None),
+            repo('c', size=50, pushed_at=datetime(2024, 3, 1, 13, 0, tzinfo=timezone.utc)),
+            repo('d', size=300, pushed_at=datetime(2024, 1, 1, tzinfo=timezone.utc)),
+        ]
+
+    def test_source_keeps_listing_order(self):
+        self.assertEqual(names(order_repositories(self.repos, ORDER_SOURCE)), ['a', 'b', 'c', 'd'])
+        self.assertEqual(names(order_repositories(self.repos, None)), ['a', 'b', 'c', 'd'])
+
+    def test_size_policies_are_stable(self):
+        self.assertEqual(names(order_repositories(self.repos, ORDER_SMALLEST_FIRST)), ['b', 'c', 'a', 'd'])
+        self.assertEqual(names(order_repositories(self.repos, ORDER_LARGEST_FIRST)), ['a', 'd', 'c', 'b'])
+
+    def test_recently_pushed_mixes_naive_and_aware(self):
+        # Naive datetimes count as UTC; never pushed goes last
+        self.assertEqual(names(order_repositories(self.repos, ORDER_RECENTLY_PUSHED)), ['c', 'a', 'd', 'b'])
+
+    def test_oldest_mirror(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            progress = ProgressManager(Path(tmp) / 'progress.json')
+            progress.current_progress.update({
+                'user/a': {'status': 'completed', 'mirrored_at': '2024-03-02T00:00:00+00:00'},
+                # Legacy entry: only the mirror time as a string
+                'user/c': '2024-03-01T00:00:00',
+                'user/d': {'status': 'completed', 'timestamp': datetime(2024, 2, 1, tzinfo=timezone.utc).timestamp()},
+            })
+            ordered = order_repositories(self.repos, ORDER_OLDEST_MIRROR, progress)
+        # Never mirrored first
+        self.assertEqual(names(ordered), ['b', 'd', 'c', 'a'])
+
+    def test_oldest_mirror_needs_progress(self):
+        with self.assertRaises(ValueError):
+            order_repositories(self.repos, ORDER_OLDEST_MIRROR)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            order_repositories(self.repos, 'random')
+
+
+class TestLastMirrorTime(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.progress = ProgressManager(Path(self.tmp.name) / 'progress.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_entries(self):
+        self.progress.current_progress.update({
+            'user/legacy': '2024-01-05T10:00:00',
+            'user/mirrored': {'status': 'completed', 'mirrored_at': '2024-02-01T00:00:00+00:00', 'timestamp': 0},
+            'user/timestamp': {'status': 'completed', 'timestamp': 1700000000},
+            'user/failed': {'status': 'error', 'timestamp': 1700000000},
+            'user/bad': '???',
+        })
+        self.assertEqual(self.progress.get_last_mirror_time('user/legacy'), datetime(2024, 1, 5, 10, 0))
+        self.assertEqual(self.progress.get_last_mirror_time('user/mirrored'),
+                         datetime(2024, 2, 1, tzinfo=timezone.utc))
+        self.assertEqual(self.progress.get_last_mirror_time('user/timestamp'), datetime.fromtimestamp(1700000000))
+        self.assertIsNone(self.progress.get_last_mirror_time('user/failed'))
+        self.assertIsNone(self.progress.get_last_mirror_time('user/bad'))
+        self.assertIsNone(self.progress.get_last_mirror_time('user/never'))
+
+    def test_mark_completed_is_read_back(self):
+        self.progress.mark_completed('user/repo', '2024-03-01T08:00:00')
+        self.assertEqual(self.progress.get_last_mirror_time('user/repo'), datetime(2024, 3, 1, 8, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+from backup_logic.snapshots import SNAPSHOT_DIR, SnapshotManager, is_immutable, parse_retention, select_kept
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME='t', GIT_AUTHOR_EMAIL='t@t', GIT_COMMITTER_NAME='t', GIT_COMMITTER_EMAIL='t@t')
+
+
+def git(*args, cwd=None):
+    return subprocess.run(['git', *args], cwd=cwd, env=GIT_ENV, check=True, capture_output=True, text=True).stdout
+
+
+class TestRetention(unittest.TestCase):
+    def test_newest_snapshot_of_each_period_is_kept(self):
+        names = ['20240101-020000', '20240115-020000', '20240131-020000', '20240201-020000',
+                 '20240210-020000', '20240211-020000', '20240211-140000', '20240212-020000']
+        kept = select_kept(names, {'daily': 2, 'weekly': 2, 'monthly': 2})
+        # Days: 12/02 and 11/02 (its last one); weeks: 12/02 and 11/02 (previous ISO week); months: Feb and Jan
+        self.assertEqual(kept, {'20240212-020000', '20240211-140000', '20240131-020000'})
+
+    def test_newest_is_always_kept(self):
+        self.assertEqual(select_kept(['20240101-020000', '20240102-020000'], {'daily': 0, 'weekly': 0, 'monthly': 0}),
+                         {'20240102-020000'})
+
+    def test_parse_retention(self):
+        self.assertEqual(parse_retention('7,4,12'), {'daily': 7, 'weekly': 4, 'monthly': 12})
+        for text in ('7,4', '7,x,1', '7,-1,2'):
+            with self.assertRaises(ValueError):
+                parse_retention(text)
+
+    def test_immutable_files(self):
+        self.assertTrue(is_immutable(Path('repo/objects/pack/pack-1.pack')))
+        self.assertTrue(is_immutable(Path('repo/objects/ab/cdef')))
+        self.assertTrue(is_immutable(Path('.objects/u__net.git/objects/pack/pack-1.idx')))
+        self.assertTrue(is_immutable(Path('.cold/repo.bundle')))
+        self.assertFalse(is_immutable(Path('repo/objects/info/alternates')))
+        self.assertFalse(is_immutable(Path('repo/refs/heads/objects/x/y')))
+        self.assertFalse(is_immutable(Path('repo/packed-refs')))
+        self.assertFalse(is_immutable(Path('.cold/index.json')))
+
+
+class TestSnapshotManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.work = self.tmp / 'work'
+        git('init', '--quiet', '-b', 'trunk', str(self.work))
+        self._commit('c0')
+        self.backup = self.tmp / 'backup'
+        self.mirror = self.backup / 'repo'
+        git('clone', '--mirror', '--quiet', '--no-local', str(self.work), str(self.mirror))
+        self.snapshots = SnapshotManager(self.backup, Mock())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _commit(self, message):
+        (self.work / 'file.txt').write_text(os.urandom(20000).hex())
+        git('add', '.', cwd=self.work)
+        git('commit', '--quiet', '-m', message, cwd=self.work)
+
+    def test_snapshot_survives_force_push(self):
+        before = git('rev-parse', 'trunk', cwd=self.mirror)
+        manifest = self.snapshots.create()
+        snapshot = self.backup / SNAPSHOT_DIR / manifest['name'] / 'repo'
+
+        self.assertEqual(manifest['mirrors'], 1)
+        self.assertGreater(manifest['linked_files'], 0)
+        pack = next((self.mirror / 'objects' / 'pack').glob('*.pack'))
+        self.assertEqual(os.stat(pack).st_ino, os.stat(snapshot / 'objects' / 'pack' / pack.name).st_ino)
+
+        # The source rewrites history and the mirror follows it
+        git('reset', '--quiet', '--hard', 'HEAD', cwd=self.work)
+        git('commit', '--quiet', '--amend', '-m', 'reescrito', cwd=self.work)
+        git('fetch', '--quiet', '--prune', str(self.work), '+refs/*:refs/*', cwd=self.mirror)
+        git('repack', '-a', '-d', '-q', cwd=self.mirror)
+        git('prune', '--expire=now', cwd=self.mirror)
+        self.assertNotEqual(git('rev-parse', 'trunk', cwd=self.mirror), before)
+
+        self.assertEqual(git('rev-parse', 'trunk', cwd=snapshot), before)
+        git('fsck', '--no-progress', cwd=snapshot)
+
+    def test_prune_follows_retention(self):
+        root = self.backup / SNAPSHOT_DIR
+        for name in ('20240101-020000', '20240102-020000'):
+            (root / name).mkdir(parents=True)
+            (root / name / 'snapshot.json').write_text('{}')
+        (root / '20240103-020000.partial').mkdir()
+
+        self.snapshots.retention = {'daily': 1, 'weekly': 0, 'monthly': 0}
+        self.assertEqual(self.snapshots.prune(), ['20240101-020000'])
+        self.assertEqual(sorted(os.listdir(root)), ['20240102-020000'])
+
+if __name__ == '__main__':
+    unittest.main()
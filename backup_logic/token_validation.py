@@ -1,7 +1,13 @@
-from github import Github
 from github.GithubException import BadCredentialsException, GithubException
+import hashlib
+import json
 import re
+import threading
+import time
+from pathlib import Path
 import requests
+from .async_github import AsyncGithubClient, GITHUB_API_URL
+from .http_cache import cached_session
 
 # Mapeamento de escopos necessários para permissões
 REQUIRED_SCOPES = {
@@ -15,6 +21,9 @@ REQUIRED_SCOPES = {
     }
 }
 
+# Cache of successful validations; BackupExecutor keeps it next to the progress file
+DEFAULT_CACHE_FILE = '.token_validation.json'
+
 def _validate_token_format(token):
     """Validate token format matches GitHub's pattern."""
     if not token or not isinstance(token, str):
@@ -22,78 +31,117 @@ def _validate_token_format(token):
     # GitHub tokens are 40 hex chars for classic or start with ghp_ for fine-grained
     return bool(re.match(r'^(ghp_[a-zA-Z0-9]{36}|[a-f0-9]{40})$', token))
 
-def _check_rate_limits(github_client, logger):
-    """Check if the token has sufficient API rate limits."""
+def _check_core_remaining(core_remaining, logger):
+    """Check the remaining core API calls reported by /rate_limit."""
+    logger.info(f"Rate limit remaining: {core_remaining}")
+    if core_remaining < 100:  # Ensure enough calls available
+        raise Exception(f"Taxa limite da API muito baixa: {core_remaining} chamadas restantes")
+    return True
+
+async def _fetch_token_info(client):
+    """Fetch user, OAuth scopes header and remaining core calls of one token.
+
+    The /user response already carries X-RateLimit-Remaining, so /rate_limit
+    is only requested when that header is missing.
+    """
+    user, headers = await client.get_user()
+    core_remaining = headers.get('X-RateLimit-Remaining')
+    if core_remaining is None:
+        rate_limit = await client.get_rate_limit()
+        core_remaining = rate_limit['resources']['core']['remaining']
+    return {
+        'user': user,
+        'scopes_header': headers.get('X-OAuth-Scopes'),
+        'core_remaining': int(core_remaining),
+    }
+
+def fetch_tokens_info(tokens, base_url=GITHUB_API_URL):
+    """Fetch token information for several tokens at once.
+
+    Every token gets its own async client; all requests are in flight at the
+    same time. Returns one info dict (or the raised exception) per token.
+    """
+    clients = [AsyncGithubClient(token, base_url=base_url, max_connections=2) for token in tokens]
     try:
-        rate_limit = github_client.get_rate_limit()
-        core_remaining = rate_limit.core.remaining
-        logger.info(f"Rate limit remaining: {core_remaining}")
-        if core_remaining < 100:  # Ensure enough calls available
-            raise Exception(f"Taxa limite da API muito baixa: {core_remaining} chamadas restantes")
-        return True
-    except GithubException as e:
-        raise Exception(f"Erro ao verificar limites de API: {str(e)}")
+        futures = [client.submit(_fetch_token_info(client)) for client in clients]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+    finally:
+        for client in clients:
+            client.close()
 
 def _has_required_scope(scopes, required_options):
     """Check if any of the required scope options is present."""
     return any(scope in scopes for scope in required_options)
 
-def _validate_scopes(token, required_scopes, token_type, logger):
-    """Validate if token has required scopes using GitHub API."""
+def _parse_scopes(scopes_header, token_type, logger):
+    """Scopes listed in X-OAuth-Scopes; tokens without the header are treated as classic."""
+    if scopes_header is not None:
+        scopes = [s.strip() for s in scopes_header.split(',') if s.strip()]
+        logger.info(f"Escopos encontrados para token {token_type}: {', '.join(scopes)}")
+    else:
+        # Se não houver cabeçalho de escopos, pode ser um token de acesso pessoal
+        scopes = ['repo']  # Assume acesso total para tokens clássicos
+        logger.info(f"Token {token_type} parece ser um token de acesso pessoal clássico")
+    return scopes
+
+# Cheap, read-only requests confirming a permission the scopes header does not list
+_PERMISSION_PROBES = {
+    'repo': ('/user/repos', {'visibility': 'private', 'per_page': 1}),
+    'org': ('/user/orgs', {'per_page': 1}),
+}
+
+# Default of _validate_scopes: no /user response available yet
+_FETCH = object()
+
+def _validate_scopes(token, required_scopes, token_type, logger, scopes_header=_FETCH, base_url=GITHUB_API_URL):
+    """Validate if token has required scopes.
+
+    ``scopes_header`` is the X-OAuth-Scopes value of a /user response that
+    was already fetched (None if the response had no such header); when
+    omitted /user is requested here. Permissions missing from the header are
+    confirmed with a single read-only request each; nothing is created or
+    deleted.
+    """
     try:
-        # Primeiro tenta obter os escopos via API
-        response = requests.get(
-            'https://api.github.com/user',
-            headers={'Authorization': f'Bearer {token}'}
-        )
-        response.raise_for_status()
-
-        # Obtém os escopos do cabeçalho
-        if 'X-OAuth-Scopes' in response.headers:
-            # Get scopes from header first
-            logger.info(f'Headers: {response.headers}')
-            scopes = [s.strip() for s in response.headers['X-OAuth-Scopes'].split(',') if s.strip()]
-            logger.info(f"Escopos encontrados para token {token_type}: {', '.join(scopes)}")
-        else:
-            # Se não houver cabeçalho de escopos, pode ser um token de acesso pessoal
-            scopes = ['repo']  # Assume acesso total para tokens clássicos
-            logger.info(f"Token {token_type} parece ser um token de acesso pessoal clássico")
+        if scopes_header is _FETCH:
+            with cached_session(pool_size=1) as session:
+                response = session.get(
+                    'https://api.github.com/user',
+                    headers={'Authorization': f'Bearer {token}'}
+                )
+            response.raise_for_status()
+            scopes_header = response.headers.get('X-OAuth-Scopes')
 
-        # Verifica cada tipo de permissão necessária
-        missing_permissions = []
+        scopes = _parse_scopes(scopes_header, token_type, logger)
 
-        for perm_type, scope_options in required_scopes.items():
-            if not _has_required_scope(scopes, scope_options):
-                missing_permissions.append(perm_type)
+        # Verifica cada tipo de permissão necessária
+        missing_permissions = [perm_type for perm_type, scope_options in required_scopes.items()
+                               if not _has_required_scope(scopes, scope_options)]
 
-        if missing_permissions:
-            # Se encontrou permissões faltando, tenta validar através de chamadas API específicas
-            try:
-                # Testa acesso a repositórios
-                if 'repo' in missing_permissions:
-                    g = Github(token)
-                    # Tenta listar repositórios privados
-                    list(g.get_user().get_repos(type='private'))
-                    missing_permissions.remove('repo')
-                    logger.info(f"Token {token_type} tem acesso a repositórios confirmado via API")
-             # Testa acesso a organizações
-                if 'org' in missing_permissions:
-                    g = Github(token)
-                    # Tenta listar organizações
-                    list(g.get_user().get_orgs())
-                    missing_permissions.remove('org')
-                    logger.info(f"Token {token_type} tem acesso a organizações confirmado via API")
-             # Testa permissão de deleção
-                if 'delete' in missing_permissions and token_type == 'destino':
-                    g = Github(token)
-                    user = g.get_user()
-                    # Tenta criar e deletar um repo de teste
-                    repo = user.create_repo('temp-test-delete-repo', auto_init=True, private=True)
-                    repo.delete()
-                    missing_permissions.remove('delete')
-                    logger.info(f"Token {token_type} tem permissão de deleção confirmada via API")
-            except Exception as e:
-                logger.info(f"Erro ao verificar permissões via API para {token_type}: {str(e)}")
+        client = None
+        if any(perm in _PERMISSION_PROBES for perm in missing_permissions):
+            client = AsyncGithubClient(token, base_url=base_url, max_connections=1)
+        try:
+            for perm_type in list(missing_permissions):
+                if perm_type not in _PERMISSION_PROBES:
+                    continue
+                path, params = _PERMISSION_PROBES[perm_type]
+                try:
+                    client.run(client.get_json(path, params=params))
+                except GithubException as e:
+                    logger.info(f"Erro ao verificar permissões via API para {token_type}: {str(e)}")
+                    continue
+                missing_permissions.remove(perm_type)
+                logger.info(f"Token {token_type} tem permissão '{perm_type}' confirmada via API")
+        finally:
+            if client is not None:
+                client.close()
 
         if missing_permissions:
             missing_scopes = []
@@ -107,72 +155,169 @@ def _validate_scopes(token, required_scopes, token_type, logger):
     except requests.RequestException as e:
         raise Exception(f"Erro ao validar escopos do token {token_type}: {str(e)}")
 
-def validate_token(token):
-    """Basic token validation for UI checks."""
-    try:
+def _token_hash(token):
+    return hashlib.sha256(token.strip().encode()).hexdigest()
+
+class TokenValidationSession:
+    """Validates tokens concurrently and remembers the results.
+
+    Within the session each token's /user response (user, scopes header and
+    rate limit) is reused by later checks for ``info_ttl`` seconds, short
+    enough that a token revoked or stripped of scopes mid-session is noticed
+    by the next validation. Successful
+    validations are also saved in ``cache_file``, keyed by a SHA-256 of the
+    token, and trusted for ``ttl`` seconds: while the login and scopes are
+    unchanged a warm start costs a single /user request per token (usually a
+    304 through the HTTP cache) and skips the permission probes.
+    """
+
+    DEFAULT_TTL = 12 * 3600
+    DEFAULT_INFO_TTL = 300
+
+    def __init__(self, cache_file=DEFAULT_CACHE_FILE, ttl=DEFAULT_TTL, base_url=GITHUB_API_URL,
+                 info_ttl=DEFAULT_INFO_TTL):
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.ttl = ttl
+        self.info_ttl = info_ttl
+        self.base_url = base_url
+        self.lock = threading.Lock()
+        self._info = {}  # token hash -> (fetched_at, info)
+
+    def get_info(self, tokens):
+        """Return one info dict (or exception) per token, fetching only the unknown ones concurrently."""
+        hashes = [_token_hash(token) for token in tokens]
+        now = time.time()
+        with self.lock:
+            missing = [(token, key) for token, key in zip(tokens, hashes)
+                       if key not in self._info or now - self._info[key][0] > self.info_ttl]
+        if missing:
+            # Deduplicate: the same token may be used on both sides
+            unique = dict((key, token) for token, key in missing)
+            results = fetch_tokens_info([token.strip() for token in unique.values()], self.base_url)
+            with self.lock:
+                for key, result in zip(unique, results):
+                    if not isinstance(result, Exception):
+                        self._info[key] = (now, result)
+            failures = {key: result for key, result in zip(unique, results) if isinstance(result, Exception)}
+        else:
+            failures = {}
+        with self.lock:
+            return [failures[key] if key in failures else self._info[key][1] for key in hashes]
+
+    def validate_token(self, token):
+        """Format check plus a (shared) /user request; False instead of raising."""
         if not _validate_token_format(token):
             return False
+        info = self.get_info([token])[0]
+        return not isinstance(info, Exception) and bool(info['user'].get('login'))
 
-        g = Github(token)
-        g.get_user().login
+    def validate_tokens(self, source_token, dest_token, logger):
+        """Validate the source and destination tokens; raises on the first problem."""
+        if not _validate_token_format(source_token):
+            raise Exception("Token de origem em formato inválido")
+        if not _validate_token_format(dest_token):
+            raise Exception("Token de destino em formato inválido")
+
+        source_info, dest_info = self.get_info([source_token, dest_token])
+        for token, info, role, label in (
+            (source_token, source_info, 'source', 'origem'),
+            (dest_token, dest_info, 'dest', 'destino'),
+        ):
+            try:
+                if isinstance(info, Exception):
+                    raise info
+                _check_core_remaining(info['core_remaining'], logger)
+                if self._is_cached(token, role, info):
+                    logger.info(f"Permissões do token de {label} reaproveitadas da validação anterior")
+                else:
+                    _validate_scopes(token.strip(), REQUIRED_SCOPES[role], label, logger,
+                                     info['scopes_header'], self.base_url)
+                    self._remember(token, role, info)
+                logger.info(f"Token de {label} validado para usuário: {info['user']['login']}")
+            except Exception as e:
+                raise Exception(f"Erro na validação do token de {label}: {str(e)}")
+
+        # Verifica plano do usuário
+        if dest_info['user'].get('plan'):
+            logger.info("Permissões verificadas na conta de destino")
+        else:
+            logger.info("Aviso: Não foi possível verificar o plano da conta de destino")
         return True
+
+    def _load_cache(self):
+        if self.cache_file is None or not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _is_cached(self, token, role, info):
+        entry = self._load_cache().get(_token_hash(token), {})
+        validated_at = entry.get('roles', {}).get(role)
+        return (validated_at is not None
+                and time.time() - validated_at <= self.ttl
+                and entry.get('login') == info['user'].get('login')
+                and entry.get('scopes_header') == info['scopes_header'])
+
+    def _remember(self, token, role, info):
+        if self.cache_file is None:
+            return
+        with self.lock:
+            cache = self._load_cache()
+            key = _token_hash(token)
+            entry = cache.get(key, {})
+            if entry.get('login') != info['user'].get('login') or entry.get('scopes_header') != info['scopes_header']:
+                entry = {}
+            entry.update(login=info['user'].get('login'), scopes_header=info['scopes_header'])
+            entry.setdefault('roles', {})[role] = time.time()
+            cache[key] = entry
+            try:
+                tmp = self.cache_file.with_suffix('.tmp')
+                with open(tmp, 'w') as f:
+                    json.dump(cache, f)
+                tmp.replace(self.cache_file)
+            except OSError:
+                pass  # The cache only saves requests; validation itself succeeded
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+def get_validation_session(cache_file=None):
+    """Process-wide session shared by the CLI, the GUI and BackupExecutor.
+
+    ``cache_file`` moves the persistent cache of the shared session (e.g.
+    next to the progress file); results already fetched are kept.
+    """
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = TokenValidationSession()
+        if cache_file is not None:
+            with _default_session.lock:
+                _default_session.cache_file = Path(cache_file)
+        return _default_session
+
+def validate_token(token):
+    """Basic token validation for UI checks."""
+    try:
+        return get_validation_session().validate_token(token)
     except BadCredentialsException:
         return False
     except Exception:
         return False
 
-def validate_tokens(source_token, dest_token, logger, error_logger):
+def validate_tokens(source_token, dest_token, logger, error_logger, cache_file=None):
     """Valida os tokens e permissões das contas GitHub
 
     Verifica se os tokens de origem e destino são válidos e se a conta
-    de destino tem todas as permissões necessárias
-  
-
+    de destino tem todas as permissões necessárias. As duas contas são
+    verificadas em paralelo e resultados recentes são reaproveitados
+    (ver ``TokenValidationSession``), guardados em ``cache_file``.
     """
-
     try:
-        # Valida formato dos tokens
-        if not _validate_token_format(source_token):
-            raise Exception("Token de origem em formato inválido")
-        if not _validate_token_format(dest_token):
-            raise Exception("Token de destino em formato inválido")
-
-        # Valida token de origem
-        source_github = Github(source_token.strip())
-        try:
-            source_user = source_github.get_user()
-            source_user.id
-            _check_rate_limits(source_github, logger)
-            source_scopes = REQUIRED_SCOPES['source'].copy()
-            _validate_scopes(source_token, source_scopes, 'origem', logger)
-            logger.info(f"Token de origem validado para usuário: {source_user.login}")
-        except Exception as e:
-            raise Exception(f"Erro na validação do token de origem: {str(e)}")
-
-        # Valida token de destino
-        dest_github = Github(dest_token.strip())
-        try:
-            dest_user = dest_github.get_user()
-            dest_user.id
-            _check_rate_limits(dest_github, logger)
-            _validate_scopes(dest_token, REQUIRED_SCOPES['dest'], 'destino', logger)
-            logger.info(f"Token de destino validado para usuário: {dest_user.login}")
-         # Testa permissões específicas na conta destino
-            private_repos = list(dest_user.get_repos(type='private'))
-            logger.info("Permissão de leitura de repos privados verificada")
-
-            # Verifica plano do usuário
-            user_data = dest_github.get_user().raw_data
-            if 'plan' in user_data and user_data['plan']:
-                logger.info("Permissões verificadas na conta de destino")
-            else:
-                logger.info("Aviso: Não foi possível verificar o plano da conta de destino")
-
-        except Exception as e:
-            raise Exception(f"Erro na validação do token de destino: {str(e)}")
-
-        return True
-
+        return get_validation_session(cache_file).validate_tokens(source_token.strip(), dest_token.strip(), logger)
     except Exception as e:
         # Log the error but also re-raise it so callers can handle it
         error_logger.log_error(e, "Erro na validação dos tokens")
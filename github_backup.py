@@ -1,4 +1,5 @@
 import os
+import argparse
 import tkinter as tk
 import sys
 import os
@@ -6,14 +7,155 @@ from dotenv import load_dotenv, find_dotenv
 from backup_logic.backup_execution import BackupExecutor
 from backup_logic import backup_execution
 from backup_logic.progress_management import ProgressManager
+from backup_logic.scheduling import ORDER_POLICIES, ORDER_SOURCE
+from backup_logic.repo_settings import DEFAULT_SYNC_FIELDS, SETTING_FIELDS
 from logger_config import setup_logger
 from error_logger import setup_error_logger
 from input_validation import validate_input
 from backup_logic.token_validation import validate_token
+from backup_logic.http_cache import ensure_cache
+from backup_logic.maintenance import MaintenanceScheduler
+from backup_logic.disk_usage import DiskUsageIndex
+from backup_logic.cold_storage import ColdStorage
+from backup_logic.snapshots import parse_retention
 from gui.gui_components import BackupGUIComponents
 from threading import Event, Thread
 
-def run_cli():
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="GitHub Repository Backup Tool")
+    parser.add_argument('--cli', action='store_true', help="Executa em modo linha de comando")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Número de repositórios processados em paralelo (padrão: 1)")
+    parser.add_argument('--fetch-jobs', type=int, default=None,
+                        help="Workers da etapa de download da origem (padrão: --jobs)")
+    parser.add_argument('--provision-jobs', type=int, default=None,
+                        help="Workers da etapa de criação dos repositórios de destino (padrão: --jobs)")
+    parser.add_argument('--push-jobs', type=int, default=None,
+                        help="Workers da etapa de push e sincronização de configurações (padrão: --jobs)")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="Ajusta o paralelismo automaticamente conforme vazão, erros e limites da API")
+    parser.add_argument('--max-jobs', type=int, default=None,
+                        help="Limite máximo de repositórios simultâneos por lado no modo --adaptive (padrão: 8)")
+    parser.add_argument('--order', choices=ORDER_POLICIES, default=ORDER_SOURCE,
+                        help="Ordem de processamento dos repositórios (padrão: ordem da listagem)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Verifica todos os repositórios, mas pula os que não tiveram alterações nas refs")
+    parser.add_argument('--sync-fields', default=','.join(DEFAULT_SYNC_FIELDS),
+                        help="Configurações copiadas para o destino, separadas por vírgula "
+                             f"(disponíveis: {', '.join(SETTING_FIELDS)}; padrão: {','.join(DEFAULT_SYNC_FIELDS)})")
+    parser.add_argument('--export-bundles', metavar='DIR', default=None,
+                        help="Exporta bundles git incrementais de cada repositório alterado para DIR")
+    parser.add_argument('--export-jobs', type=int, default=None,
+                        help="Workers da etapa de exportação de bundles (padrão: --jobs)")
+    parser.add_argument('--shared-objects', action='store_true',
+                        help="Compartilha os objetos git entre forks da mesma rede (git alternates)")
+    parser.add_argument('--no-lfs', dest='lfs', action='store_false',
+                        help="Não copia os objetos Git LFS (por padrão são copiados quando o git-lfs está instalado)")
+    parser.add_argument('--lfs-transfers', type=int, default=None,
+                        help="Transferências LFS paralelas por repositório (padrão: 8)")
+    parser.add_argument('--min-free-gb', type=float, default=2.0,
+                        help="Espaço livre mínimo (GB) em BACKUP_DIR; abaixo dele novos clones aguardam (0 desativa; padrão: 2)")
+    parser.add_argument('--cold-after', type=int, default=None, metavar='N',
+                        help="Move para o armazenamento frio (bundle compactado) os mirrors sem alterações há N execuções "
+                             "incrementais ou arquivados na origem")
+    parser.add_argument('--snapshot', action='store_true',
+                        help="Cria um snapshot (hardlinks) de BACKUP_DIR em BACKUP_DIR/.snapshots ao fim de um backup completo")
+    parser.add_argument('--snapshot-retention', default='7,4,12', metavar='D,W,M',
+                        help="Snapshots mantidos: diários,semanais,mensais (padrão: 7,4,12)")
+    parser.add_argument('--disk-usage', action='store_true',
+                        help="Mostra o tamanho do backup, o crescimento e os maiores repositórios (sem varrer o disco) e sai")
+    parser.add_argument('--rebuild-disk-usage', action='store_true',
+                        help="Recria o índice de uso de disco medindo todos os mirrors e sai")
+    parser.add_argument('--top', type=int, default=10,
+                        help="Quantidade de repositórios listados por --disk-usage (padrão: 10)")
+    parser.add_argument('--maintenance', action='store_true',
+                        help="Executa apenas a manutenção dos mirrors locais (repack, commit-graph, prune) e sai")
+    parser.add_argument('--idle-maintenance', action='store_true',
+                        help="Executa uma passada de manutenção ao fim de cada backup, com as opções --maintenance-*")
+    parser.add_argument('--maintenance-jobs', type=int, default=1,
+                        help="Mirrors mantidos em paralelo durante a manutenção (padrão: 1)")
+    parser.add_argument('--maintenance-budget', type=int, default=None,
+                        help="Tempo máximo da manutenção em segundos; depois disso nenhum mirror novo é iniciado")
+    parser.add_argument('--maintenance-io-budget', type=int, default=None,
+                        help="Máximo de MB de objetos reescritos por repack em uma passada de manutenção")
+    args = parser.parse_args(argv)
+    args.sync_fields = [name.strip() for name in args.sync_fields.split(',') if name.strip()]
+    unknown = [name for name in args.sync_fields if name not in SETTING_FIELDS]
+    if unknown:
+        parser.error(f"--sync-fields: configurações desconhecidas: {', '.join(unknown)}")
+    for option in ('jobs', 'fetch_jobs', 'provision_jobs', 'push_jobs', 'export_jobs', 'max_jobs',
+                   'maintenance_jobs', 'maintenance_budget', 'maintenance_io_budget', 'lfs_transfers', 'top', 'cold_after'):
+        value = getattr(args, option)
+        if value is not None and value < 1:
+            parser.error(f"--{option.replace('_', '-')} deve ser maior ou igual a 1")
+    if args.min_free_gb < 0:
+        parser.error("--min-free-gb deve ser maior ou igual a 0")
+    try:
+        args.snapshot_retention = parse_retention(args.snapshot_retention)
+    except ValueError as e:
+        parser.error(f"--snapshot-retention: {str(e)}")
+    return args
+
+def load_backup_dir(logger):
+    """BACKUP_DIR from the environment/.env for the commands that need no tokens"""
+    load_dotenv(dotenv_path=os.path.join(os.getcwd(), '.env'))
+    load_dotenv()
+
+    backup_dir = os.getenv('BACKUP_DIR')
+    if not backup_dir or not os.path.isdir(backup_dir):
+        logger.error("BACKUP_DIR não definido ou inexistente")
+        sys.exit(1)
+    return backup_dir
+
+def run_disk_usage(args):
+    """Print the disk usage report, rebuilding the index first if asked"""
+    logger = setup_logger()
+    error_logger = setup_error_logger()
+    backup_dir = load_backup_dir(logger)
+    index = DiskUsageIndex()
+    try:
+        if args.rebuild_disk_usage:
+            logger.info(f"Recriando o índice de uso de disco de {backup_dir}...")
+            index.rebuild(backup_dir)
+        logger.info(index.report(args.top))
+        logger.info(ColdStorage(backup_dir, logger).describe())
+    except Exception as e:
+        error_logger.log_error(e, "Error reading disk usage")
+        logger.error(f"Error reading disk usage: {str(e)}")
+        sys.exit(1)
+
+def maintenance_options(args):
+    """MaintenanceScheduler keyword arguments from the --maintenance-* options"""
+    return {
+        'workers': args.maintenance_jobs,
+        'time_budget': args.maintenance_budget,
+        'byte_budget': args.maintenance_io_budget * 1024 * 1024 if args.maintenance_io_budget else None,
+    }
+
+def run_maintenance(args):
+    """Run one maintenance pass over the mirrors in BACKUP_DIR (no tokens needed)"""
+    logger = setup_logger()
+    error_logger = setup_error_logger()
+    backup_dir = load_backup_dir(logger)
+
+    disk_usage = DiskUsageIndex()
+    try:
+        scheduler = MaintenanceScheduler(
+            backup_dir,
+            logger,
+            disk_usage=disk_usage,
+            **maintenance_options(args)
+        )
+        scheduler.run_pass()
+    except Exception as e:
+        error_logger.log_error(e, "Error during maintenance")
+        logger.error(f"Error during maintenance: {str(e)}")
+        sys.exit(1)
+    finally:
+        disk_usage.close()
+
+def run_cli(args):
     """Run the backup process in command line mode"""
     load_dotenv(dotenv_path=os.path.join(os.getcwd(), '.env'))
     load_dotenv()
@@ -21,6 +163,7 @@ def run_cli():
     logger = setup_logger()
     error_logger = setup_error_logger()
     progress_manager = ProgressManager()
+    ensure_cache(logger=logger)
 
     try:
         source_token, dest_token, backup_dir = validate_input()
@@ -39,13 +182,36 @@ def run_cli():
             is_running=True,
             pause_event=None,
             cancel_event=None,
-            retry_count=2  # Default to 2 retries
+            retry_count=2,  # Default to 2 retries
+            repo_limit=None,
+            jobs=args.jobs,
+            stage_workers={
+                'fetch': args.fetch_jobs,
+                'provision': args.provision_jobs,
+                'push': args.push_jobs,
+                'export': args.export_jobs
+            },
+            adaptive=args.adaptive,
+            max_jobs=args.max_jobs,
+            order=args.order,
+            incremental=args.incremental,
+            sync_fields=args.sync_fields,
+            shared_objects=args.shared_objects,
+            export_dir=args.export_bundles,
+            lfs=args.lfs,
+            lfs_transfers=args.lfs_transfers,
+            min_free_space=int(args.min_free_gb * 1e9),
+            cold_after=args.cold_after,
+            snapshot_retention=args.snapshot_retention if args.snapshot else None,
+            maintenance=maintenance_options(args) if args.idle_maintenance else None
         )
 
     except Exception as e:
         error_logger.log_error(e, "Error during backup")
         logger.error(f"Error during backup: {str(e)}")
         sys.exit(1)
+    finally:
+        progress_manager.close()
 
 def run_gui():
     """Run the backup process with GUI interface"""
@@ -59,6 +225,7 @@ def run_gui():
     logger = setup_logger()
     error_logger = setup_error_logger()
     progress_manager = ProgressManager()
+    ensure_cache(logger=logger)
     
     gui = BackupGUIComponents(root, logger, error_logger)
     pause_event = Event()
@@ -74,13 +241,39 @@ def run_gui():
                 gui.status_section.add_status_message("Erro: Todos os campos são obrigatórios", "error")
                 return
 
-            if not validate_token(source_token):
-                gui.status_section.add_status_message("Erro: Token de origem inválido", "error")
-                return
-            if not validate_token(dest_token):
-                gui.status_section.add_status_message("Erro: Token de destino inválido", "error")
-                return
+            # Token checks make network requests: run them off the Tk thread
+            def check_tokens():
+                if not validate_token(source_token):
+                    return "Erro: Token de origem inválido"
+                if not validate_token(dest_token):
+                    return "Erro: Token de destino inválido"
+                return None
+
+            def on_checked(error):
+                if error:
+                    gui.status_section.add_status_message(error, "error")
+                    gui.control_section.start_button.config(state=tk.NORMAL)
+                    return
+                launch_backup(source_token, dest_token, backup_dir)
+
+            def on_check_error(e):
+                error_msg = f"Erro ao validar tokens: {str(e)}"
+                gui.status_section.add_status_message(error_msg, "error")
+                error_logger.log_error(e, error_msg)
+                gui.control_section.start_button.config(state=tk.NORMAL)
 
+            gui.control_section.start_button.config(state=tk.DISABLED)
+            gui.status_section.add_status_message("Validando tokens...", "info")
+            gui.run_in_background(check_tokens, on_checked, on_check_error)
+
+        except Exception as e:
+            error_msg = f"Erro ao iniciar backup: {str(e)}"
+            gui.status_section.add_status_message(error_msg, "error")
+            error_logger.log_error(e, error_msg)
+            gui.control_section.start_button.config(state=tk.NORMAL)
+
+    def launch_backup(source_token, dest_token, backup_dir):
+        try:
             # Save configuration if checkbox is checked
             if gui.options_section.get_save_config_var():
                 with open('.env', 'w') as f:
@@ -104,12 +297,20 @@ def run_gui():
                         source_token=source_token,
                         dest_token=dest_token,
                         backup_dir=backup_dir,
-                        progress_var=gui.status_section.progress_var,
+                        progress_var=None,
+                        # Worker threads report progress; Tk is only touched from its own thread
+                        progress_callback=lambda value: root.after(0, lambda: gui.status_section.update_progress(value)),
                         is_running=True,
                         pause_event=pause_event,
                         cancel_event=cancel_event,
                         retry_count=gui.options_section.get_retry_count(),
-                        repo_limit=gui.options_section.get_repo_limit() # Pass repo limit
+                        repo_limit=gui.options_section.get_repo_limit(), # Pass repo limit
+                        jobs=gui.options_section.get_jobs(),
+                        adaptive=gui.options_section.get_adaptive_var(),
+                        concurrency_callback=lambda limits: root.after(0, lambda: gui.status_section.set_concurrency(limits)),
+                        transfer_callback=lambda snapshot: root.after(0, lambda: gui.status_section.set_transfer(snapshot)),
+                        order=gui.options_section.get_order(),
+                        incremental=gui.options_section.get_incremental_var()
                     )
 
                     # Update GUI from main thread
@@ -124,6 +325,8 @@ def run_gui():
                     root.after(0, lambda: gui.status_section.add_status_message(error_msg, "error"))
                     root.after(0, lambda: gui.show_error("Erro", error_msg))
                     root.after(0, lambda: complete_backup())
+                finally:
+                    progress_manager.close()
 
             def complete_backup():
                 gui.control_section.start_button.config(state=tk.NORMAL)
@@ -170,8 +373,13 @@ def run_gui():
     root.mainloop()
 
 if __name__ == "__main__":
+    args = parse_args()
     # Check if running in CLI mode
-    if len(sys.argv) > 1 and sys.argv[1] == '--cli':
-        run_cli()
+    if args.disk_usage or args.rebuild_disk_usage:
+        run_disk_usage(args)
+    elif args.maintenance:
+        run_maintenance(args)
+    elif args.cli:
+        run_cli(args)
     else:
         run_gui()
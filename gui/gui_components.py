@@ -1,8 +1,11 @@
+import hashlib
+import threading
 import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog, messagebox
 from ttkthemes import ThemedTk
 from backup_logic.token_validation import validate_tokens as validate_github_tokens
-from github import Github
+from backup_logic.inventory import count_repositories
+from github import GithubException
 
 from .token_section import TokenSection
 from .backup_section import BackupSection
@@ -16,6 +19,7 @@ class BackupGUIComponents:
         self.root = root
         self.logger = logger
         self.error_logger = error_logger
+        self._repo_counts = {}  # source token hash -> repository count
         if isinstance(root, ThemedTk):
             self.root.set_theme("arc")  # Modern theme
 
@@ -88,8 +92,32 @@ class BackupGUIComponents:
     def get_repo_limit(self):
         return self.options_section.get_repo_limit()
 
+    def get_jobs(self):
+        return self.options_section.get_jobs()
+
+    def get_adaptive_var(self):
+        return self.options_section.get_adaptive_var()
+
+    def get_order(self):
+        return self.options_section.get_order()
+
+    def get_incremental_var(self):
+        return self.options_section.get_incremental_var()
+
+    def run_in_background(self, work, on_success, on_error):
+        """Run ``work`` on a worker thread and deliver its outcome on the Tk event loop."""
+        def worker():
+            try:
+                result = work()
+            except Exception as e:
+                self.root.after(0, lambda: on_error(e))
+            else:
+                self.root.after(0, lambda: on_success(result))
+
+        threading.Thread(target=worker, daemon=True).start()
+
     def validate_tokens(self):
-        """Validate tokens using token_validation.validate_tokens"""
+        """Validate tokens using token_validation.validate_tokens, off the main thread"""
         source_token = self.get_source_token()
         dest_token = self.get_dest_token()
 
@@ -97,21 +125,31 @@ class BackupGUIComponents:
             self.add_status_message("Erro: Ambos os tokens são necessários", "error")
             return
 
-        try:
-            self.add_status_message("Validando tokens...", "info")
-            if validate_github_tokens(source_token, dest_token, self.logger, self.error_logger):
+        def on_success(valid):
+            self.control_section.validate_button.config(state=tk.NORMAL)
+            if valid:
                 self.add_status_message("Tokens validados com sucesso!", "success")
                 self.show_success("Sucesso", "Ambos os tokens são válidos e têm as permissões necessárias")
             else:
                 self.add_status_message("Erro na validação dos tokens", "error")
                 self.show_error("Erro", "Um ou mais tokens são inválidos ou não têm permissões suficientes")
-        except Exception as e:
+
+        def on_error(e):
+            self.control_section.validate_button.config(state=tk.NORMAL)
             error_msg = str(e)
             self.add_status_message(f"Erro: {error_msg}", "error")
             self.show_error("Erro na Validação", error_msg)
             if self.error_logger:
                 self.error_logger.log_error(Exception(error_msg), "Token validation error")
 
+        self.add_status_message("Validando tokens...", "info")
+        self.control_section.validate_button.config(state=tk.DISABLED)
+        self.run_in_background(
+            lambda: validate_github_tokens(source_token, dest_token, self.logger, self.error_logger),
+            on_success,
+            on_error
+        )
+
     def save_tokens_to_env(self):
         """Saves tokens to .env file"""
         source_token = self.get_source_token()
@@ -142,7 +180,11 @@ class BackupGUIComponents:
             self.backup_section.backup_dir_entry.insert(0, directory)
 
     def refresh_repo_count(self):
-        """Refreshes the repository count for the source account"""
+        """Refreshes the repository count for the source account.
+
+        The count takes a single request on a worker thread and is kept until
+        the source token changes.
+        """
         source_token = self.get_source_token()
 
         if not source_token:
@@ -150,26 +192,29 @@ class BackupGUIComponents:
             self.token_section.set_repo_count_label("Repositórios: -")
             return
 
-        try:
-            try:
-                # Try to ping GitHub API first to check connectivity
-                import socket
-                socket.create_connection(("api.github.com", 443), timeout=5)
-
-                # Create a GitHub client and get repository count
-                g = Github(source_token)
-                user = g.get_user()
-                repos = list(user.get_repos())
-                count = len(repos)
-                self.token_section.set_repo_count_label(f"Repositórios: {count}")
-                self.add_status_message(f"Contagem atualizada: {count} repositórios encontrados", "success")
-            except socket.error:
-                raise Exception("Não foi possível conectar ao GitHub. Verifique sua conexão com a internet.")
-        except Exception as e:
-            error_msg = f"Erro ao obter contagem: {str(e)}"
-            self.add_status_message(error_msg, "error")
+        token_hash = hashlib.sha256(source_token.encode()).hexdigest()
+        if token_hash in self._repo_counts:
+            self.token_section.set_repo_count_label(f"Repositórios: {self._repo_counts[token_hash]}")
+            return
+
+        def on_success(count):
+            self._repo_counts[token_hash] = count
+            self.token_section.refresh_count_button.config(state=tk.NORMAL)
+            self.token_section.set_repo_count_label(f"Repositórios: {count}")
+            self.add_status_message(f"Contagem atualizada: {count} repositórios encontrados", "success")
+
+        def on_error(e):
+            self.token_section.refresh_count_button.config(state=tk.NORMAL)
+            if isinstance(e, GithubException) and e.status == 0:
+                # Status 0: the request never reached GitHub
+                e = Exception("Não foi possível conectar ao GitHub. Verifique sua conexão com a internet.")
+            self.add_status_message(f"Erro ao obter contagem: {str(e)}", "error")
             self.token_section.set_repo_count_label("Repositórios: -")
 
+        self.token_section.refresh_count_button.config(state=tk.DISABLED)
+        self.token_section.set_repo_count_label("Repositórios: ...")
+        self.run_in_background(lambda: count_repositories(source_token), on_success, on_error)
+
     # Placeholder commands for buttons - to be implemented later
     def start_backup(self):
         self.add_status_message("Backup iniciado...", "info")
@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
+from backup_logic.scheduling import ORDER_POLICIES, ORDER_SOURCE
 
 class OptionsSection:
     def __init__(self, parent, save_tokens_to_env_command):
@@ -50,6 +51,36 @@ class OptionsSection:
         self.repo_limit_spinbox = ttk.Spinbox(options_frame, from_=1, to=1000, width=5) # Assuming max 1000 repos is reasonable
         self.repo_limit_spinbox.grid(row=3, column=1, sticky=tk.W)
 
+        # Parallel workers
+        ttk.Label(options_frame, text="Repositórios processados em paralelo:").grid(row=4, column=0, sticky=tk.W)
+        self.jobs_spinbox = ttk.Spinbox(options_frame, from_=1, to=16, width=5)
+        self.jobs_spinbox.grid(row=4, column=1, sticky=tk.W)
+        self.jobs_spinbox.set(1)
+
+        # Adaptive concurrency; off by default, like --adaptive in the command line
+        self.adaptive_var = tk.BooleanVar(value=False)
+        self.adaptive_check = ttk.Checkbutton(
+            options_frame,
+            text="Ajustar paralelismo automaticamente",
+            variable=self.adaptive_var
+        )
+        self.adaptive_check.grid(row=5, column=0, sticky=tk.W)
+
+        # Queue ordering policy
+        ttk.Label(options_frame, text="Ordem de processamento:").grid(row=6, column=0, sticky=tk.W)
+        self.order_combobox = ttk.Combobox(options_frame, values=ORDER_POLICIES, state="readonly", width=18)
+        self.order_combobox.grid(row=6, column=1, sticky=tk.W)
+        self.order_combobox.set(ORDER_SOURCE)
+
+        # Incremental mode
+        self.incremental_var = tk.BooleanVar()
+        self.incremental_check = ttk.Checkbutton(
+            options_frame,
+            text="Modo incremental (pular repositórios sem alterações)",
+            variable=self.incremental_var
+        )
+        self.incremental_check.grid(row=7, column=0, sticky=tk.W)
+
     def get_save_config_var(self):
         return self.save_config_var.get()
 
@@ -59,6 +90,21 @@ class OptionsSection:
     def get_retry_count(self):
         return int(self.retry_count.get())
 
+    def get_jobs(self):
+        jobs_str = self.jobs_spinbox.get().strip()
+        if jobs_str:
+            return max(1, int(jobs_str))
+        return 1
+
+    def get_adaptive_var(self):
+        return self.adaptive_var.get()
+
+    def get_incremental_var(self):
+        return self.incremental_var.get()
+
+    def get_order(self):
+        return self.order_combobox.get() or ORDER_SOURCE
+
     def get_repo_limit(self):
         limit_str = self.repo_limit_spinbox.get().strip()
         if limit_str:
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 from datetime import datetime
+from backup_logic.git_progress import PHASE_NAMES, format_size
 
 class StatusSection:
     def __init__(self, parent):
@@ -36,6 +37,15 @@ class StatusSection:
         )
         self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
 
+        # Current concurrency limits reported by the backup executor
+        self.concurrency_label = ttk.Label(status_frame, text="Concorrência: -")
+        self.concurrency_label.grid(row=2, column=0, columnspan=2, sticky=tk.W)
+
+        # Live git transfers (clone/fetch/push), one line per running repository
+        self.transfers = {}
+        self.transfer_label = ttk.Label(status_frame, text="", justify=tk.LEFT)
+        self.transfer_label.grid(row=3, column=0, columnspan=2, sticky=tk.W)
+
     def update_progress(self, value, text=None):
         """Updates progress bar and label"""
         self.progress_var.set(value)
@@ -44,6 +54,26 @@ class StatusSection:
         else:
             self.progress_label.config(text=f"{int(value)}%")
 
+    def set_concurrency(self, limits):
+        """Shows the current source/destination concurrency limits"""
+        self.concurrency_label.config(
+            text=f"Concorrência: origem {limits['source_repos']} repos / {limits['source_api']} API, "
+                 f"destino {limits['dest_repos']} repos / {limits['dest_api']} API"
+        )
+
+    def set_transfer(self, snapshot):
+        """Shows the progress of a running git transfer; finished transfers are removed"""
+        if snapshot['done']:
+            self.transfers.pop(snapshot['repository'], None)
+        else:
+            text = f"{snapshot['repository']} ({snapshot['operation']}): {PHASE_NAMES.get(snapshot['phase'], snapshot['phase'] or '...')}"
+            if snapshot['percent'] is not None:
+                text += f" {snapshot['percent']}%"
+            if snapshot['bytes']:
+                text += f" - {format_size(snapshot['bytes'])}, {format_size(snapshot['throughput'])}/s"
+            self.transfers[snapshot['repository']] = text
+        self.transfer_label.config(text="\n".join(self.transfers.values()))
+
     def add_status_message(self, message, message_type="info"):
         """Adds message to status area with color coding"""
         tags = {